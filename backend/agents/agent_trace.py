@@ -0,0 +1,105 @@
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Tool name LangChain uses for the retry step after an unparseable LLM output
+PARSE_ERROR_TOOL = "_Exception"
+
+
+def tool_label(name: Optional[str]) -> str:
+    """Tool name without the per-company suffix (CompanyDocTool-12 -> CompanyDocTool)."""
+    if not name:
+        return "none"
+    return name.rsplit("-", 1)[0] if name.rsplit("-", 1)[-1].isdigit() else name
+
+
+class AgentTraceCollector(BaseCallbackHandler):
+    """Records one agent run step by step: LLM latency and tokens, the tool chosen and its latency.
+
+    Pass a fresh collector per run (agent_executor.run(query, callbacks=[collector]))
+    and read summary() afterwards.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: List[dict] = []
+        self._llm_started: Dict[UUID, float] = {}
+        self._tool_started: Dict[UUID, float] = {}
+
+    def _step(self) -> dict:
+        if not self.steps or self.steps[-1]["done"]:
+            self.steps.append({
+                "step": len(self.steps) + 1, "llm_ms": 0, "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "tool": None, "tool_input": None, "tool_ms": None, "parse_error": False, "error": None, "done": False,
+            })
+        return self.steps[-1]
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any):
+        self._llm_started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any):
+        self._llm_started[run_id] = time.perf_counter()
+
+    def _end_llm(self, run_id: UUID) -> dict:
+        step = self._step()
+        started = self._llm_started.pop(run_id, None)
+        if started is not None:
+            step["llm_ms"] += int((time.perf_counter() - started) * 1000)
+        step["llm_calls"] += 1
+        return step
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        step = self._end_llm(run_id)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        step["prompt_tokens"] += usage.get("prompt_tokens", 0)
+        step["completion_tokens"] += usage.get("completion_tokens", 0)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end_llm(run_id)["error"] = f"{type(error).__name__}: {error}"[:300]
+
+    def on_agent_action(self, action, *, run_id: UUID, **kwargs: Any):
+        step = self._step()
+        step["tool"] = action.tool
+        step["tool_input"] = str(action.tool_input)[:200]
+        step["parse_error"] = action.tool == PARSE_ERROR_TOOL
+
+    def on_tool_start(self, serialized, input_str: str, *, run_id: UUID, **kwargs: Any):
+        self._tool_started[run_id] = time.perf_counter()
+
+    def _end_tool(self, run_id: UUID) -> dict:
+        step = self._step()
+        started = self._tool_started.pop(run_id, None)
+        if started is not None:
+            step["tool_ms"] = int((time.perf_counter() - started) * 1000)
+        step["done"] = True
+        return step
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any):
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end_tool(run_id)["error"] = f"{type(error).__name__}: {error}"[:300]
+
+    def on_agent_finish(self, finish, *, run_id: UUID, **kwargs: Any):
+        self._step()["done"] = True
+
+    def summary(self) -> dict:
+        """JSON-serialisable trace: per-step detail plus totals per tool."""
+        steps = [{key: value for key, value in step.items() if key != "done"} for step in self.steps]
+        tool_ms: Dict[str, int] = {}
+        for step in steps:
+            if step["tool_ms"] is not None:
+                label = tool_label(step["tool"])
+                tool_ms[label] = tool_ms.get(label, 0) + step["tool_ms"]
+        return {
+            "iterations": len(steps),
+            "total_ms": int((time.perf_counter() - self.started) * 1000),
+            "llm_ms": sum(step["llm_ms"] for step in steps),
+            "llm_calls": sum(step["llm_calls"] for step in steps),
+            "prompt_tokens": sum(step["prompt_tokens"] for step in steps),
+            "completion_tokens": sum(step["completion_tokens"] for step in steps),
+            "tool_ms": tool_ms,
+            "parse_errors": sum(1 for step in steps if step["parse_error"]),
+            "steps": steps,
+        }
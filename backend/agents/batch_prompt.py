@@ -0,0 +1,112 @@
+import os
+import re
+import json
+import hashlib
+from typing import Callable, Dict, List
+from pydantic import ValidationError
+from pydantic_models.datatypes import BatchItemAnswer
+
+# Max number of RFP items answered by a single batched LLM call
+BATCH_SIZE = int(os.getenv("RFP_BATCH_SIZE", "8"))
+
+
+def group_items_by_context(items: List[dict], retriever, text_key: str = "text") -> List[dict]:
+    """Group items whose best matching company chunk is the same.
+
+    Returns a list of {"context": str, "items": [...]} in first-seen order so
+    items that share retrieved context can be answered by one prompt.
+    """
+    groups: Dict[str, dict] = {}
+    for item in items:
+        docs = retriever.invoke(item.get(text_key, ""))
+        context = docs[0].page_content if docs else ""
+        key = hashlib.sha1(context.encode("utf-8")).hexdigest()
+        group = groups.setdefault(key, {"context": context, "items": []})
+        group["items"].append(item)
+    return list(groups.values())
+
+
+def build_batch_prompt(context: str, items: List[dict], text_key: str = "text") -> str:
+    lines = "\n".join(f'- id: {item["id"]} | {item.get(text_key, "")}' for item in items)
+    return f"""
+    You are answering RFP compliance items on behalf of our company using ONLY the company context below.
+
+    Company context:
+    {context or "No relevant company documentation found."}
+
+    Items:
+    {lines}
+
+    For every item return one object with:
+      "id": the item id exactly as given,
+      "answer": a short evidence-based answer,
+      "satisfied": true if the company meets the item, false if it does not, null if unknown.
+
+    Respond ONLY with a JSON array of these objects, one per item, in the same order.
+    """
+
+
+def parse_batch_response(content: str, expected_ids: List[str]) -> Dict[str, BatchItemAnswer]:
+    """Parse and validate the JSON array; returns only the valid, expected entries."""
+    match = re.search(r"```(?:json)?\s*(\[.*\])\s*```", content, re.DOTALL)
+    if match:
+        json_str = match.group(1)
+    else:
+        start = content.find("[")
+        end = content.rfind("]") + 1
+        if start == -1 or end == 0:
+            return {}
+        json_str = content[start:end]
+    try:
+        entries = json.loads(json_str)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(entries, list):
+        return {}
+
+    valid: Dict[str, BatchItemAnswer] = {}
+    for entry in entries:
+        try:
+            parsed = BatchItemAnswer.model_validate(entry)
+        except ValidationError:
+            continue
+        item_id = str(parsed.id)
+        if item_id in expected_ids and item_id not in valid:
+            valid[item_id] = parsed
+    return valid
+
+
+def run_batched(
+    items: List[dict],
+    retriever,
+    llm_call: Callable[[str], str],
+    single_call: Callable[[dict], BatchItemAnswer],
+    text_key: str = "text",
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, BatchItemAnswer]:
+    """Answer items in groups of shared context with one LLM call per batch.
+
+    `llm_call` takes a prompt and returns the raw model text. Items missing
+    or invalid in the batched output are retried one at a time through
+    `single_call`. Results are keyed by str(item id).
+    """
+    results: Dict[str, BatchItemAnswer] = {}
+    retry: List[dict] = []
+
+    for group in group_items_by_context(items, retriever, text_key):
+        group_items = group["items"]
+        for start in range(0, len(group_items), batch_size):
+            batch = group_items[start:start + batch_size]
+            expected_ids = [str(item["id"]) for item in batch]
+            try:
+                content = llm_call(build_batch_prompt(group["context"], batch, text_key))
+                parsed = parse_batch_response(content, expected_ids)
+            except Exception as e:
+                print(f"Batched call failed, retrying items individually: {e}")
+                parsed = {}
+            results.update(parsed)
+            retry.extend(item for item in batch if str(item["id"]) not in parsed)
+
+    for item in retry:
+        results[str(item["id"])] = single_call(item)
+    return results
@@ -0,0 +1,128 @@
+import os
+import re
+import json
+from typing import Callable, Dict, List
+import numpy as np
+from sqlalchemy import text
+from methods.deadline import DeadlineExceeded
+from methods.resources import get_embeddings, get_vector_engine
+from pydantic_models.datatypes import ComplianceVerdict
+
+# Cosine similarity bands for deciding a requirement without the LLM
+MATCH_THRESHOLD = float(os.getenv("COMPLIANCE_MATCH_THRESHOLD", "0.75"))
+MISS_THRESHOLD = float(os.getenv("COMPLIANCE_MISS_THRESHOLD", "0.35"))
+# Number of company chunks given to the LLM for an ambiguous requirement
+CONTEXT_CHUNKS = 3
+
+
+def load_company_chunks(company_id: int):
+    """All chunk texts and embeddings of a company's documents as (texts, matrix)."""
+    query = text("""
+        SELECT e.document, e.embedding::text
+        FROM langchain_pg_embedding e
+        JOIN langchain_pg_collection c ON c.uuid = e.collection_id
+        WHERE c.name = 'company_docs' AND e.cmetadata->>'company_id' = :company_id
+    """)
+    with get_vector_engine().connect() as conn:
+        rows = conn.execute(query, {"company_id": str(company_id)}).fetchall()
+    texts = [row[0] for row in rows]
+    if not rows:
+        return texts, np.zeros((0, 0), dtype=np.float32)
+    matrix = np.array([json.loads(row[1]) for row in rows], dtype=np.float32)
+    return texts, matrix
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def parse_verdict(req_id, content: str) -> ComplianceVerdict:
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON object found in LLM response.")
+    data = json.loads(match.group(0))
+    # null fields fall back like missing ones; anything else goes through the model's validation
+    confidence, evidence = data.get("confidence"), data.get("evidence")
+    return ComplianceVerdict.model_validate({
+        "id": req_id,
+        "satisfied": data.get("satisfied"),
+        "confidence": 0.5 if confidence is None else confidence,
+        "evidence": "" if evidence is None else str(evidence),
+        "decided_by": "llm",
+    })
+
+
+def llm_verdict(req: dict, context: List[str], llm_call: Callable[[str], str]) -> ComplianceVerdict:
+    prompt = f"""
+    You check whether our company satisfies an RFP requirement using ONLY the company context below.
+
+    Company context:
+    {chr(10).join(context) or "No relevant company documentation found."}
+
+    Requirement: {req["text"]}
+
+    Respond ONLY with a JSON object:
+    {{"satisfied": true, false or null if unknown, "confidence": number between 0 and 1, "evidence": "short justification"}}
+    """
+    try:
+        return parse_verdict(req["id"], llm_call(prompt))
+    except DeadlineExceeded:
+        # Out of time for every remaining requirement, not just this one
+        raise
+    except Exception as e:
+        # A failed call or an unusable answer leaves this requirement for review, not the whole check
+        print(f"Invalid compliance verdict for requirement {req['id']}: {e}")
+        return ComplianceVerdict(
+            id=req["id"], satisfied=None, confidence=0.0,
+            evidence="Could not determine compliance automatically.", decided_by="llm",
+        )
+
+
+def classify_requirements(
+    company_id: int,
+    requirements: List[dict],
+    llm_call: Callable[[str], str],
+) -> Dict[str, ComplianceVerdict]:
+    """Score all requirements against the company's chunks in one matrix product.
+
+    Requirements whose best chunk similarity is above MATCH_THRESHOLD are
+    marked satisfied, those below MISS_THRESHOLD unsatisfied; only the band in
+    between is sent to the LLM. Results are keyed by str(requirement id).
+    """
+    if not requirements:
+        return {}
+    texts, chunk_matrix = load_company_chunks(company_id)
+    if not texts:
+        return {
+            str(req["id"]): ComplianceVerdict(
+                id=req["id"], satisfied=False, confidence=1.0,
+                evidence="No company documentation available.", decided_by="embedding",
+            )
+            for req in requirements
+        }
+
+    req_matrix = np.array(get_embeddings().embed_documents([req["text"] for req in requirements]), dtype=np.float32)
+    scores = normalize(req_matrix) @ normalize(chunk_matrix).T
+    ranked = np.argsort(-scores, axis=1)[:, :CONTEXT_CHUNKS]
+
+    verdicts: Dict[str, ComplianceVerdict] = {}
+    for row, req in enumerate(requirements):
+        best = float(scores[row, ranked[row, 0]])
+        best_text = texts[ranked[row, 0]]
+        if best >= MATCH_THRESHOLD:
+            verdict = ComplianceVerdict(
+                id=req["id"], satisfied=True, confidence=best,
+                evidence=best_text[:500], decided_by="embedding",
+            )
+        elif best < MISS_THRESHOLD:
+            verdict = ComplianceVerdict(
+                id=req["id"], satisfied=False, confidence=1.0 - best,
+                evidence=f"No supporting company documentation found (best match similarity {best:.2f}).",
+                decided_by="embedding",
+            )
+        else:
+            verdict = llm_verdict(req, [texts[i] for i in ranked[row]], llm_call)
+        verdicts[str(req["id"])] = verdict
+    return verdicts
@@ -0,0 +1,61 @@
+import os
+import re
+from typing import Callable, List
+import numpy as np
+from agents.compliance import normalize
+from methods.resources import get_embeddings
+
+# Minimum cosine similarity for two differently worded items to share one answer
+DEDUP_THRESHOLD = float(os.getenv("RFP_DEDUP_THRESHOLD", "0.95"))
+
+# List numbering only ("3.", "iv)", "3.1", "a)", bullets); a bare leading number is content ("24 hours")
+NUMBERING = re.compile(r"^\s*(?:[\divxlc]+[.)]|\d+(?:\.\d+)+\.?|[a-z][.)]|[-*•])\s+", re.IGNORECASE)
+NON_WORD = re.compile(r"[^\w%$]+")
+
+
+def normalize_text(text: str) -> str:
+    """Case-, punctuation- and numbering-insensitive form used for exact duplicate matching."""
+    text = NUMBERING.sub("", text or "")
+    return NON_WORD.sub(" ", text.lower()).strip()
+
+
+def find_duplicates(items: List[dict], text_of: Callable[[dict], str], threshold: float = DEDUP_THRESHOLD,
+                    embeddings=None) -> List[int]:
+    """Index of the first equivalent item for every item (its own index when it is the first).
+
+    Items are equivalent when their normalized texts are equal or, with
+    threshold < 1, when their embeddings are at least `threshold` similar to
+    the first member of a group. Only distinct normalized texts are embedded.
+    """
+    representative = []
+    first_by_text = {}
+    distinct = []
+    for index, item in enumerate(items):
+        key = normalize_text(text_of(item))
+        if not key:
+            # Nothing to compare: an empty item only stands for itself
+            representative.append(index)
+            continue
+        if key in first_by_text:
+            representative.append(first_by_text[key])
+            continue
+        first_by_text[key] = index
+        representative.append(index)
+        distinct.append(index)
+    if threshold >= 1 or len(distinct) < 2:
+        return representative
+
+    embeddings = embeddings or get_embeddings()
+    matrix = normalize(np.array(embeddings.embed_documents([text_of(items[i]) for i in distinct]), dtype=np.float32))
+    group_rows = []
+    group_of = {}
+    for row, index in enumerate(distinct):
+        if group_rows:
+            similarities = matrix[group_rows] @ matrix[row]
+            best = int(np.argmax(similarities))
+            if similarities[best] >= threshold:
+                group_of[index] = distinct[group_rows[best]]
+                continue
+        group_rows.append(row)
+        group_of[index] = index
+    return [group_of.get(first, first) for first in representative]
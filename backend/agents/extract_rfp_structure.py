@@ -1,8 +1,14 @@
 from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, UnstructuredExcelLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-import google.generativeai as genai
+import os
+import re
 import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException
+from agents.llm_gateway import complete_sync
+from agents.rule_extractor import pre_extract, is_confident, missing_metadata
+from agents.structure_stream import stream_structure
 
 # Document processing functions
 def process_document(file_path):
@@ -29,20 +35,17 @@ def process_document(file_path):
     
     return chunks
 
+def load_rfp_text(file_path):
+    """Parse an RFP file into the combined text sent to the LLM (CPU-bound, safe to run in a child process)"""
+    chunks = process_document(file_path)
+    return " ".join([chunk.page_content for chunk in chunks])
+
 def extract_rfp_structure(file_path):
     """Extract RFP structure and generate structured JSON data"""
     print("hello2")
-    chunks = process_document(file_path)
-    combined_text = " ".join([chunk.page_content for chunk in chunks])
-    
-    # Use the Gemini 1.5 Flash model
-    llm = genai.GenerativeModel("gemini-1.5-flash")
-    print("hello llm")
-    # Using LLM to extract structured data from RFP
-    prompt = (
-        """
-        You are an expert in analyzing RFP documents. Extract the structure and key information from the following RFP text and return it as structured JSON with the following format:
+    return extract_rfp_structure_from_text(load_rfp_text(file_path))
 
+STRUCTURE_FORMAT = """
         {
           "metadata": {
             "title": "...",
@@ -87,7 +90,83 @@ def extract_rfp_structure(file_path):
             }
           ]
         }
+"""
+
+# "auto" extracts long documents window by window in parallel, "single" always sends one prompt
+RFP_EXTRACTION_MODE = os.getenv("RFP_EXTRACTION_MODE", "auto")
+RFP_EXTRACTION_WINDOW_CHARS = int(os.getenv("RFP_EXTRACTION_WINDOW_CHARS", "30000"))
+RFP_EXTRACTION_WINDOW_OVERLAP = int(os.getenv("RFP_EXTRACTION_WINDOW_OVERLAP", "1500"))
+RFP_EXTRACTION_CONCURRENCY = int(os.getenv("RFP_EXTRACTION_CONCURRENCY", "8"))
+# Cross-window links added by section are capped per item
+MAX_SECTION_LINKS = 10
+# "auto" lets the rule-based pre-pass replace full extraction when it finds enough structure, "off" disables it
+RFP_RULE_EXTRACTION = os.getenv("RFP_RULE_EXTRACTION", "auto")
+# Opening text sent along with the pre-extracted items so the LLM can fill missing metadata
+RULE_GAP_CONTEXT_CHARS = int(os.getenv("RFP_RULE_GAP_CONTEXT_CHARS", "6000"))
+# Item text sent for classification is cut to this length
+RULE_GAP_ITEM_CHARS = 300
+# Stored structures from another version are extracted again: bump the number when prompts, parsing or
+# merging change; the settings that shape the output are part of it
+EXTRACTOR_VERSION = f"5:{RFP_EXTRACTION_MODE}:{RFP_RULE_EXTRACTION}"
+
+
+def parse_structure_json(content):
+    """The JSON object of an extraction response (fenced or bare)."""
+    match = re.search(r"```json\s*(\{.*\})\s*```", content, re.DOTALL)
+    if match:
+        json_str = match.group(1)
+    else:
+        # Fallback: extract from first '{' to last '}'
+        json_start = content.find('{')
+        json_end = content.rfind('}') + 1
+        if json_start == -1 or json_end == 0:
+            raise ValueError("No JSON object found in LLM response.")
+        json_str = content[json_start:json_end]
+    return json.loads(json_str)
+
+
+def emit_structure(structure, on_item):
+    """Report a structure that was assembled at once item by item, like a streamed one."""
+    if on_item is None:
+        return structure
+    on_item("metadata", structure["metadata"])
+    for kind in ("sections", "questions", "requirements"):
+        for item in structure[kind]:
+            on_item(kind[:-1], item)
+    return structure
+
+
+def parse_structure_or_fail(content):
+    try:
+        return parse_structure_json(content)
+    except Exception as e:
+        print(f"Error extracting JSON: {e}")
+        print(f"Response content: {content}")
+        raise HTTPException(status_code=500, detail=f"Failed to extract RFP structure: {str(e)}")
+
 
+def extract_rfp_structure_from_text(combined_text, company_id=None, rfp_id=None, on_item=None):
+    """Ask the LLM for the structured JSON of already-parsed RFP text
+
+    `on_item(kind, item)` sees the metadata and every section, question and
+    requirement as soon as it is known (see StructureAssembler).
+    """
+    if RFP_RULE_EXTRACTION != "off":
+        structure = pre_extract(combined_text)
+        if is_confident(structure):
+            return emit_structure(fill_structure_gaps(structure, combined_text, company_id, rfp_id), on_item)
+    windows = split_windows(combined_text)
+    if RFP_EXTRACTION_MODE != "single" and len(windows) > 1:
+        # Window items only get their final ids once merged
+        return emit_structure(extract_rfp_structure_map_reduce(windows, company_id, rfp_id), on_item)
+    print("hello llm")
+    # Using LLM to extract structured data from RFP
+    prompt = (
+        """
+        You are an expert in analyzing RFP documents. Extract the structure and key information from the following RFP text and return it as structured JSON with the following format:
+"""
+        + STRUCTURE_FORMAT +
+        """
         RFP Text:
         """
         + combined_text +
@@ -100,33 +179,279 @@ def extract_rfp_structure(file_path):
 
     # chain = prompt | llm
     # response = chain.invoke({"text": combined_text})
-    response = llm.generate_content(prompt)
-    print("hello by llm")
-    # Extract JSON from response
+    # Whole documents go to the long-context route (Gemini), streamed and validated item by item
+    return stream_structure(prompt, "extract_rfp_structure", company_id, rfp_id, on_item, parse_structure_or_fail)
+
+
+def gap_prompt(structure, combined_text):
+    missing = missing_metadata(structure["metadata"])
+    sections = "\n".join(f"- {s['id']} | {s['title']}" for s in structure["sections"])
+    requirements = "\n".join(f"- {r['id']} | {r['text'][:RULE_GAP_ITEM_CHARS]}" for r in structure["requirements"])
+    questions = "\n".join(f"- {q['id']} | {q['text'][:RULE_GAP_ITEM_CHARS]}" for q in structure["questions"]) or "(none)"
+    return (
+        """
+        You are analyzing RFP documents. The sections, questions and requirements of the RFP below were already
+        extracted; do not extract them again. Fill the gaps and classify the items, returning JSON in this format:
+
+        {
+          "metadata": {only the missing fields listed below, same names; nested as "contact_info": {...}},
+          "requirements": [{"id": "...", "category": "...", "mandatory": true/false}],
+          "questions": [{"id": "...", "type": "...", "response_format": "...", "word_limit": number or null}]
+        }
+
+        Categories are short lowercase labels such as technical, security, compliance, commercial, support,
+        submission or general. A requirement is mandatory unless the RFP makes it optional or desirable.
+        """
+        + f"""
+        Missing metadata fields: {", ".join(missing) or "(none)"}
+
+        Sections:
+        {sections}
+
+        Requirements:
+        {requirements}
+
+        Questions:
+        {questions}
+
+        RFP Text (opening part, for the metadata):
+        """
+        + combined_text[:RULE_GAP_CONTEXT_CHARS] +
+        """
+
+        Respond ONLY with the JSON data.
+        """
+    )
+
+
+def fill_structure_gaps(structure, combined_text, company_id=None, rfp_id=None):
+    """Complete a rule-based pre-extraction with one small LLM call for missing metadata and classification.
+
+    The prompt carries the extracted items and the opening of the RFP
+    rather than the whole document. If the call or its JSON fails, the
+    pre-extraction is returned with its heuristic categories.
+    """
+    print(f"RFP {rfp_id}: rules found {len(structure['sections'])} sections, "
+          f"{len(structure['requirements'])} requirements, {len(structure['questions'])} questions")
     try:
-        import re
-        # Safely get the content from the response
-        if hasattr(response, "candidates"):
-            content = response.candidates[0].content.parts[0].text
-        elif hasattr(response, "content"):
-            content = response.content
-        else:
-            content = str(response)
-
-        match = re.search(r"```json\s*(\{.*\})\s*```", content, re.DOTALL)
-        if match:
-            json_str = match.group(1)
-        else:
-            # Fallback: extract from first '{' to last '}'
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            if json_start == -1 or json_end == 0:
-                raise ValueError("No JSON object found in LLM response.")
-            json_str = content[json_start:json_end]
-        structured_data = json.loads(json_str)
-        return structured_data
+        response = complete_sync(gap_prompt(structure, combined_text), "extract_rfp_gaps", route="long",
+                                 company_id=company_id, rfp_id=rfp_id)
+        gaps = parse_structure_json(response.text)
     except Exception as e:
-        print(f"Error extracting JSON: {e}")
-        print(f"Response content: {getattr(response, 'content', str(response))}")
-        from fastapi import HTTPException
-        raise HTTPException(status_code=500, detail=f"Failed to extract RFP structure: {str(e)}")
\ No newline at end of file
+        print(f"Gap filling failed, keeping rule-based structure: {e}")
+        return structure
+
+    _merge_metadata(structure["metadata"], gaps.get("metadata"))
+    for kind, fields in (("requirements", ("category", "mandatory")),
+                         ("questions", ("type", "response_format", "word_limit"))):
+        by_id = {item["id"]: item for item in structure[kind]}
+        for update in gaps.get(kind) or []:
+            item = by_id.get(str(update.get("id")))
+            if item is None:
+                continue
+            for field in fields:
+                value = update.get(field)
+                if field == "mandatory" and isinstance(value, bool):
+                    item[field] = value
+                elif field == "word_limit" and (value is None or isinstance(value, int)):
+                    item[field] = value
+                elif field not in ("mandatory", "word_limit") and isinstance(value, str) and value and value != "...":
+                    item[field] = value
+    return structure
+
+
+def split_windows(text, size=RFP_EXTRACTION_WINDOW_CHARS, overlap=RFP_EXTRACTION_WINDOW_OVERLAP):
+    """Overlapping windows of at most `size` characters, cut at a sentence or line end when possible."""
+    if len(text) <= size:
+        return [text]
+    windows = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            cut = max(text.rfind("\n", start + size // 2, end), text.rfind(". ", start + size // 2, end))
+            if cut > 0:
+                end = cut + 1
+        windows.append(text[start:end])
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return windows
+
+
+def window_prompt(window, index, count):
+    return (
+        f"""
+        You are an expert in analyzing RFP documents. The text below is part {index} of {count} of one RFP.
+        Extract the structure and key information that appears in this part and return it as structured JSON with the following format:
+"""
+        + STRUCTURE_FORMAT +
+        """
+        Ids only need to be unique within this part. If a section's parent section is not in this part,
+        set "parent_id" to null and add "parent_title" with the parent section's title. If the section of a
+        question or requirement is not in this part, set "section" to that section's title. Leave metadata
+        fields that this part does not mention empty.
+
+        RFP Text:
+        """
+        + window +
+        """
+
+        Respond ONLY with the JSON data.
+        """
+    )
+
+
+def extract_window(window, index, count, company_id=None, rfp_id=None):
+    def fallback(content):
+        try:
+            return parse_structure_json(content)
+        except Exception as e:
+            print(f"Error extracting JSON from window {index}/{count}: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to extract RFP structure (part {index}): {str(e)}")
+
+    return stream_structure(window_prompt(window, index, count), "extract_rfp_window", company_id, rfp_id,
+                            fallback=fallback)
+
+
+def extract_rfp_structure_map_reduce(windows, company_id=None, rfp_id=None):
+    """Extract every window in parallel, then merge the partial structures in document order."""
+    print(f"Extracting RFP {rfp_id} in {len(windows)} windows")
+    with ThreadPoolExecutor(max_workers=min(RFP_EXTRACTION_CONCURRENCY, len(windows))) as pool:
+        # Each call runs in a copy of this context so the trace and deadline reach the gateway
+        futures = [
+            pool.submit(contextvars.copy_context().run, extract_window, window, index, len(windows), company_id, rfp_id)
+            for index, window in enumerate(windows, start=1)
+        ]
+        parts = [future.result() for future in futures]
+    return merge_window_structures(parts)
+
+
+def _merge_metadata(metadata, part):
+    for key, value in (part or {}).items():
+        if isinstance(value, list):
+            merged = metadata.setdefault(key, [])
+            merged.extend(item for item in value if item and item not in merged)
+        elif isinstance(value, dict):
+            _merge_metadata(metadata.setdefault(key, {}), value)
+        elif value and value != "..." and not metadata.get(key):
+            metadata[key] = value
+
+
+def merge_window_structures(parts):
+    """Merge per-window structures into one, independent of the order the windows finished in.
+
+    Items repeated in the overlap of two consecutive windows are kept once,
+    ids are renumbered S1.., Q1.., R1.. in document order, parents and
+    sections given by title or only known from an earlier window are
+    resolved, and questions and requirements without explicit links are
+    linked to the ones in the same section.
+    """
+    from agents.dedup import normalize_text
+
+    metadata = {}
+    sections, questions, requirements = [], [], []
+    section_by_title = {}
+    # Latest section seen per level, to parent sections whose parent is in an earlier window
+    open_sections = {}
+    previous_keys = {"section": {}, "question": {}, "requirement": {}}
+
+    for part in parts:
+        _merge_metadata(metadata, part.get("metadata"))
+        keys = {"section": {}, "question": {}, "requirement": {}}
+        local_sections, local_questions, local_requirements = {}, {}, {}
+        window_relations = []
+
+        for section in part.get("sections") or []:
+            title = str(section.get("title") or "").strip()
+            key = normalize_text(title)
+            duplicate = previous_keys["section"].get(key) if key else None
+            if duplicate is not None:
+                # Same section cut by the window overlap: keep the fuller content
+                if len(str(section.get("content") or "")) > len(duplicate["content"]):
+                    duplicate["content"] = str(section.get("content") or "")
+                local_sections[str(section.get("id"))] = duplicate["id"]
+                keys["section"][key] = duplicate
+                continue
+            level = section.get("level") if isinstance(section.get("level"), int) else 1
+            parent_id = local_sections.get(str(section.get("parent_id")))
+            if parent_id is None and section.get("parent_title"):
+                parent = section_by_title.get(normalize_text(str(section["parent_title"])))
+                parent_id = parent["id"] if parent else None
+            if parent_id is None and level > 1:
+                parent = next((open_sections[l] for l in range(level - 1, 0, -1) if l in open_sections), None)
+                parent_id = parent["id"] if parent else None
+            merged = {
+                "id": f"S{len(sections) + 1}",
+                "title": title,
+                "parent_id": parent_id,
+                "content": str(section.get("content") or ""),
+                "level": level,
+            }
+            sections.append(merged)
+            local_sections[str(section.get("id"))] = merged["id"]
+            if key:
+                section_by_title.setdefault(key, merged)
+                keys["section"][key] = merged
+            open_sections[level] = merged
+            for deeper in [l for l in open_sections if l > level]:
+                del open_sections[deeper]
+
+        def resolve_section(value):
+            if value is None:
+                return None
+            if str(value) in local_sections:
+                return local_sections[str(value)]
+            by_title = section_by_title.get(normalize_text(str(value)))
+            if by_title:
+                return by_title["id"]
+            return sections[-1]["id"] if sections else None
+
+        for kind, items, merged_items, local_ids, prefix in (
+            ("question", part.get("questions") or [], questions, local_questions, "Q"),
+            ("requirement", part.get("requirements") or [], requirements, local_requirements, "R"),
+        ):
+            for item in items:
+                key = normalize_text(str(item.get("text") or ""))
+                duplicate = previous_keys[kind].get(key) if key else None
+                if duplicate is not None:
+                    local_ids[str(item.get("id"))] = duplicate["id"]
+                    keys[kind][key] = duplicate
+                    continue
+                merged = {**item, "id": f"{prefix}{len(merged_items) + 1}", "section": resolve_section(item.get("section"))}
+                merged_items.append(merged)
+                local_ids[str(item.get("id"))] = merged["id"]
+                if key:
+                    keys[kind][key] = merged
+                window_relations.append((kind, merged, item))
+
+        # Local related ids -> global ids, made symmetric
+        for kind, merged, item in window_relations:
+            if kind == "question":
+                field, other_ids = "related_requirements", local_requirements
+            else:
+                field, other_ids = "related_questions", local_questions
+            merged[field] = [other_ids[str(other)] for other in item.get(field) or [] if str(other) in other_ids]
+        for question in questions:
+            for requirement_id in question.get("related_requirements") or []:
+                requirement = requirements[int(requirement_id[1:]) - 1]
+                if question["id"] not in requirement["related_questions"]:
+                    requirement["related_questions"].append(question["id"])
+        previous_keys = keys
+
+    # Items still unlinked are linked to the questions/requirements of their section
+    by_section = {}
+    for requirement in requirements:
+        by_section.setdefault(requirement["section"], {"questions": [], "requirements": []})["requirements"].append(requirement["id"])
+    for question in questions:
+        by_section.setdefault(question["section"], {"questions": [], "requirements": []})["questions"].append(question["id"])
+    for question in questions:
+        question.setdefault("related_requirements", [])
+        if not question["related_requirements"] and question["section"] is not None:
+            question["related_requirements"] = by_section[question["section"]]["requirements"][:MAX_SECTION_LINKS]
+    for requirement in requirements:
+        requirement.setdefault("related_questions", [])
+        if not requirement["related_questions"] and requirement["section"] is not None:
+            requirement["related_questions"] = by_section[requirement["section"]]["questions"][:MAX_SECTION_LINKS]
+
+    return {"metadata": metadata, "sections": sections, "questions": questions, "requirements": requirements}
@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import random
+import asyncio
+import hashlib
+from collections import defaultdict
+import httpx
+from agents.llm_gateway import LLMError, LLMRequest, LLMResult
+
+# Selected with LLM_PROVIDER=fake: every gateway provider is replaced by a FakeProvider
+# so the pipeline runs offline. Answers depend only on the prompt and FAKE_LLM_SEED.
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+# Latency is log-normal around the median, plus a per-token decode time
+FAKE_LLM_LATENCY_MEDIAN = float(os.getenv("FAKE_LLM_LATENCY_MEDIAN_SECONDS", "0.2"))
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.3"))
+FAKE_LLM_SECONDS_PER_TOKEN = float(os.getenv("FAKE_LLM_SECONDS_PER_TOKEN", "0"))
+# Error injection, as fractions of attempts
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+FAKE_LLM_TIMEOUT_RATE = float(os.getenv("FAKE_LLM_TIMEOUT_RATE", "0"))
+FAKE_LLM_RETRY_AFTER = float(os.getenv("FAKE_LLM_RETRY_AFTER_SECONDS", "1"))
+# Characters per chunk when a caller streams the answer
+FAKE_LLM_STREAM_CHUNK_CHARS = 64
+
+REQUIREMENT_PATTERN = re.compile(r"[^.\n]*\b(?:shall|must|required to)\b[^.\n]*\.", re.IGNORECASE)
+QUESTION_PATTERN = re.compile(r"[^.?\n]*\?")
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (4 characters per token), enough for usage accounting."""
+    return max(1, len(text) // 4)
+
+
+def fake_structure(rfp_text: str, rng: random.Random) -> dict:
+    """Schema-valid extract_rfp_structure JSON built from the sentences of the RFP text."""
+    sentences = [s.strip() for s in REQUIREMENT_PATTERN.findall(rfp_text)][:30]
+    if not sentences:
+        sentences = [f"The vendor shall support capability {i}." for i in range(rng.randint(3, 8))]
+    questions = [q.strip() for q in QUESTION_PATTERN.findall(rfp_text) if len(q.strip()) > 15][:5]
+    if not questions:
+        questions = ["Describe your approach to delivering the requested services?"]
+    section_count = min(len(sentences), rng.randint(2, 5))
+    sections = [
+        {"id": f"S{i + 1}", "title": f"Section {i + 1}", "parent_id": None,
+         "content": " ".join(sentences[i::section_count])[:400], "level": 1}
+        for i in range(section_count)
+    ]
+    return {
+        "metadata": {
+            "title": "Request for Proposal",
+            "issuer": "Offline Issuer",
+            "issue_date": "2030-01-01",
+            "due_date": "2030-02-01",
+            "contact_info": {"name": "Procurement Office", "email": "procurement@example.com", "phone": "000-000-0000"},
+            "submission_requirements": ["Submit one PDF proposal."],
+        },
+        "sections": sections,
+        "questions": [
+            {"id": f"Q{i + 1}", "text": text, "section": "S1", "type": "narrative", "response_format": "text",
+             "word_limit": rng.choice([None, 250, 500]), "related_requirements": []}
+            for i, text in enumerate(questions)
+        ],
+        "requirements": [
+            {"id": f"R{i + 1}", "text": text, "section": sections[i % section_count]["id"],
+             "category": rng.choice(["technical", "security", "commercial", "support"]),
+             "mandatory": rng.random() < 0.8, "related_questions": []}
+            for i, text in enumerate(sentences)
+        ],
+    }
+
+
+def fake_answer(subject: str, rng: random.Random) -> str:
+    return rng.choice([
+        "Yes. Our platform supports this out of the box, as described in our product documentation",
+        "Yes. This is covered by our standard service agreement and operating procedures",
+        "Partially. We meet this with a configuration change agreed during onboarding",
+    ]) + f": {subject[:120].strip()}"
+
+
+def fake_proposal(rng: random.Random) -> str:
+    sections = rng.randint(3, 6)
+    body = "\n\n".join(
+        f"## Section {i + 1}\n"
+        f"We meet the stated requirements with a proven, supported solution.\n\n"
+        f"* **Delivery**: phased rollout with weekly status reports\n* **Support**: 24/7 with a named account manager"
+        for i in range(sections)
+    )
+    return f"# Proposal\n\n## Executive Summary\nWe meet every stated requirement.\n\n{body}\n\n## Conclusion\nWe look forward to working with you.\n"
+
+
+def fake_repair(prompt: str) -> list:
+    """Rebuild every malformed structure fragment of a repair prompt from its id and first text value."""
+    repaired = []
+    for kind, fragment in re.findall(r"^Fragment \d+ \((\w+)\)[^\n]*\n(.*?)(?=^Fragment \d+ \(|\Z)", prompt, re.M | re.S):
+        if kind == "metadata":
+            repaired.append({})
+            continue
+        item_id = re.search(r'"id"\s*:\s*"?([\w.-]+)', fragment)
+        text = re.search(r'"(?:title|text)"\s*:\s*"([^"\n]*)', fragment)
+        repaired.append({
+            "id": item_id.group(1) if item_id else f"{kind[0].upper()}{len(repaired) + 1}",
+            "title" if kind == "sections" else "text": text.group(1) if text else "Recovered item",
+        })
+    return repaired
+
+
+def fake_completion(request: LLMRequest, rng: random.Random) -> str:
+    """Answer in the format the call site parses, recognised from the prompt text."""
+    prompt = "\n".join(m["content"] for m in request.messages)
+    if "malformed fragments of an RFP structure" in prompt:
+        return json.dumps(fake_repair(prompt))
+    if "analyzing RFP documents" in prompt:
+        rfp_text = prompt.split("RFP Text:", 1)[-1]
+        return "```json\n" + json.dumps(fake_structure(rfp_text, rng), indent=2) + "\n```"
+    ids = re.findall(r"- id: ([^|]+?) \|", prompt)
+    if ids:
+        return json.dumps([
+            {"id": item_id, "answer": fake_answer(item_id, rng), "satisfied": rng.random() < 0.85} for item_id in ids
+        ])
+    if "Requirement:" in prompt and "Respond ONLY with a JSON object" in prompt:
+        return json.dumps({"satisfied": rng.random() < 0.85, "confidence": round(rng.uniform(0.5, 0.95), 2),
+                           "evidence": "Covered by our security and operations documentation."})
+    if "Final Answer:" in prompt:
+        # ReAct agent prompt: answer the last question directly, without tool calls
+        question = prompt.rsplit("Question:", 1)[-1].split("\n", 1)[0]
+        return f"Thought: I now know the final answer\nFinal Answer: {fake_answer(question, rng)}"
+    if request.operation in ("generate_response", "fallback_tool"):
+        return fake_answer(prompt.strip().splitlines()[-1] if prompt.strip() else "", rng)
+    return fake_proposal(rng)
+
+
+class FakeProvider:
+    """Offline gateway provider with seeded latency, token counts and injected errors."""
+
+    def __init__(self, name: str, median_latency: float = FAKE_LLM_LATENCY_MEDIAN,
+                 sigma: float = FAKE_LLM_LATENCY_SIGMA, seconds_per_token: float = FAKE_LLM_SECONDS_PER_TOKEN,
+                 error_rate: float = FAKE_LLM_ERROR_RATE, rate_limit_rate: float = FAKE_LLM_RATE_LIMIT_RATE,
+                 timeout_rate: float = FAKE_LLM_TIMEOUT_RATE, seed: int = FAKE_LLM_SEED):
+        self.name = name
+        self.model = f"fake-{name}"
+        self.median_latency = median_latency
+        self.sigma = sigma
+        self.seconds_per_token = seconds_per_token
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.seed = seed
+        # Attempts per prompt, so a retried prompt draws a different latency and error outcome
+        self._attempts = defaultdict(int)
+
+    def _digest(self, request: LLMRequest) -> str:
+        key = json.dumps([self.seed, self.name, request.operation, request.messages], sort_keys=True)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    async def acomplete(self, client: httpx.AsyncClient, request: LLMRequest) -> LLMResult:
+        digest = self._digest(request)
+        if len(self._attempts) > 100_000:
+            self._attempts.clear()
+        attempt = self._attempts[digest]
+        self._attempts[digest] += 1
+        chance = random.Random(f"{digest}:{attempt}")
+        text = fake_completion(request, random.Random(digest))
+        prompt_tokens = sum(count_tokens(m["content"]) for m in request.messages)
+        completion_tokens = count_tokens(text)
+
+        latency = 0.0
+        if self.median_latency > 0:
+            latency = self.median_latency * chance.lognormvariate(0, self.sigma)
+        decode = self.seconds_per_token * completion_tokens
+        roll = chance.random()
+        if roll < self.timeout_rate:
+            await asyncio.sleep((latency + decode) * 3)
+            raise httpx.ReadTimeout(f"{self.model} timed out")
+        await asyncio.sleep(latency if request.on_text is not None else latency + decode)
+        roll -= self.timeout_rate
+        if roll < self.rate_limit_rate:
+            raise LLMError(self.name, "HTTP 429: fake rate limit", 429, retryable=True,
+                           retry_after=FAKE_LLM_RETRY_AFTER)
+        roll -= self.rate_limit_rate
+        if roll < self.error_rate:
+            raise LLMError(self.name, "HTTP 503: fake overload", 503, retryable=True)
+        if request.on_text is not None:
+            for end in range(FAKE_LLM_STREAM_CHUNK_CHARS, len(text) + FAKE_LLM_STREAM_CHUNK_CHARS,
+                             FAKE_LLM_STREAM_CHUNK_CHARS):
+                await asyncio.sleep(decode * FAKE_LLM_STREAM_CHUNK_CHARS / max(1, len(text)))
+                request.on_text(text[:end])
+        return LLMResult(text=text, provider=self.name, model=self.model,
+                         prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+def fake_providers(names, **kwargs) -> dict:
+    """FakeProvider per gateway provider name, keeping routes and failover intact."""
+    return {name: FakeProvider(name, **kwargs) for name in names}
@@ -0,0 +1,323 @@
+import asyncio
+from langchain.agents import initialize_agent
+from langchain.agents.agent_types import AgentType
+from agents.tools.company_doc_tool import get_company_qa_tool, get_company_retriever
+from agents.tools.fall_back_tool import make_fallback_tool
+from agents.batch_prompt import run_batched
+from agents.compliance import classify_requirements
+from agents.dedup import find_duplicates
+from agents.agent_trace import AgentTraceCollector
+from agents.llm_gateway import GatewayChatModel
+from methods.answer_cache import ANSWER_CACHE_ENABLED, TenantAnswerCache, cache_fields
+from methods.metrics import record_agent_trace, stage_timer
+from methods.tracing import set_attributes
+from methods.llm_usage import record_usage
+from methods.deadline import (
+    Deadline, DeadlineExceeded, RFP_GENERATION_DEADLINE, RFP_ITEM_MAX_SECONDS, RFP_ITEM_MIN_SECONDS, run_in_thread,
+)
+from pydantic_models.datatypes import BatchItemAnswer
+
+
+def build_agent(company_id, rfp_id=None):
+    """Create the ReAct agent and its LLM for one company's documents."""
+    CompanyDocTool = get_company_qa_tool(company_id)
+    # Tools
+    tools = [CompanyDocTool, make_fallback_tool(company_id, rfp_id)]
+
+    # Groq through the gateway, failing over to Gemini
+    llm = GatewayChatModel(operation="generate_response", route="fast", company_id=company_id, rfp_id=rfp_id)
+    agent_executor = initialize_agent(
+        tools,
+        llm,
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=True,
+        handle_parsing_errors=True
+    )
+    return agent_executor, llm
+
+
+def output_skeleton(structured_data: dict) -> dict:
+    return {
+        "company_id": structured_data["company_id"],
+        "rfp_id": structured_data["rfp_id"],
+        "employee_id": structured_data["employee_id"],
+        "metadata": structured_data["metadata"],
+        "sections": [],
+        "questions": [],
+        "requirements": []
+    }
+
+
+def count_items(structured_data: dict) -> int:
+    """Number of items iter_generated_items answers for this RFP."""
+    return (
+        len(structured_data["sections"])
+        + min(len(structured_data["questions"]), 1)
+        + len(structured_data["requirements"])
+    )
+
+
+# Request body flags that change how items are generated
+GENERATION_OPTIONS = {
+    # Group short requirement checks into one LLM call per shared context
+    "batch_mode": False,
+    # Decide clear requirement matches/misses from embeddings, LLM only for the rest
+    "compliance_precheck": False,
+    # Reuse the company's cached answers to near-identical questions
+    "use_answer_cache": ANSWER_CACHE_ENABLED,
+    # Ignore cached answers and generate (and re-cache) fresh ones
+    "regenerate": False,
+    # Answer repeated (identical or near-identical) sections and requirements once
+    "dedup": True,
+    # Overall time budget; items that do not fit are returned with "pending": true
+    "deadline_seconds": RFP_GENERATION_DEADLINE,
+}
+
+PENDING_ANSWER = "Answer pending: the time budget for this RFP ran out before this item was answered."
+
+
+def section_text(section: dict) -> str:
+    return f"{section['title']} - {section['content']}"
+
+
+def requirement_query(req: dict) -> str:
+    return f"Does the company satisfy this requirement: {req['text']}?"
+
+
+def trace_fields(trace) -> dict:
+    """The agent's step trace for entries answered by the agent (see agents.agent_trace)."""
+    return {"agent_trace": trace} if trace else {}
+
+
+def pending_fields(pending: bool) -> dict:
+    return {"pending": True} if pending else {}
+
+
+def duplicate_fields(items: list, representative: list, index: int) -> dict:
+    """Extra field on an entry whose answer was copied from an earlier equivalent item."""
+    first = representative[index]
+    return {"duplicate_of": items[first]["id"]} if first != index else {}
+
+
+def generation_options(json_data: dict) -> dict:
+    return {key: json_data.get(key, default) for key, default in GENERATION_OPTIONS.items()}
+
+
+async def iter_generated_items(structured_data: dict, options: dict = None, done: set = None):
+    """Answer every section, question and requirement of an RFP.
+
+    Yields (kind, entry) tuples as soon as each item is answered, where kind is
+    "section", "question" or "requirement" and entry is the dict appended to
+    the matching list of the final output. Items whose (kind, str(id)) is in
+    `done` are skipped, which lets a resumed job avoid repeating LLM work.
+
+    The run shares one Deadline: each item gets a slice of the time left
+    (passed on to retrieval and LLM calls), and items that cannot be
+    answered in time are yielded with "pending": true instead of holding up
+    the response. Cached answers are still served after the deadline.
+    """
+    options = {**GENERATION_OPTIONS, **(options or {})}
+    done = done or set()
+    sections = [s for s in structured_data["sections"] if ("section", str(s["id"])) not in done]
+    # Stop after the first question
+    questions = structured_data["questions"][:1]
+    questions = [q for q in questions if ("question", str(q["id"])) not in done]
+    requirements = [r for r in structured_data["requirements"] if ("requirement", str(r["id"])) not in done]
+    if not (sections or questions or requirements):
+        return
+    company_id = structured_data["company_id"]
+    rfp_id = structured_data.get("rfp_id")
+
+    agent_executor, llm = build_agent(company_id, rfp_id)
+
+    # Index of the first equivalent item per item; only those reach the LLM
+    if options["dedup"]:
+        with stage_timer("dedup", company_id):
+            section_first = await asyncio.to_thread(find_duplicates, sections, section_text)
+            requirement_first = await asyncio.to_thread(find_duplicates, requirements, lambda r: r["text"])
+        print(f"Dedup: {len(sections) - len(set(section_first))} sections and "
+              f"{len(requirements) - len(set(requirement_first))} requirements reuse an earlier answer")
+    else:
+        section_first = list(range(len(sections)))
+        requirement_first = list(range(len(requirements)))
+
+    def account_cache_hit():
+        record_usage("cache", None, "generate_response", company_id=company_id, rfp_id=rfp_id, cache_hit=True)
+
+    cache = TenantAnswerCache(company_id, options["use_answer_cache"], options["regenerate"])
+
+    # Step traces of agent runs by query, moved onto the entry they answered
+    agent_traces = {}
+
+    def run_agent(query):
+        collector = AgentTraceCollector()
+        with stage_timer("agent_step", company_id):
+            try:
+                return agent_executor.run(query, callbacks=[collector])
+            finally:
+                trace = agent_traces[query] = collector.summary()
+                record_agent_trace(trace, company_id)
+                set_attributes(agent_iterations=trace["iterations"], agent_llm_ms=trace["llm_ms"],
+                               agent_parse_errors=trace["parse_errors"])
+
+    deadline = Deadline(float(options["deadline_seconds"]))
+    items_left = len(sections) + len(questions) + len(requirements)
+
+    async def within_budget(fn, arg):
+        """fn(arg) in a thread within this item's share of the deadline; None when out of time."""
+        if deadline.remaining() < RFP_ITEM_MIN_SECONDS:
+            return None
+        budget = deadline.share(items_left, RFP_ITEM_MIN_SECONDS, RFP_ITEM_MAX_SECONDS)
+        try:
+            return await run_in_thread(deadline.child(budget), fn, arg)
+        except DeadlineExceeded:
+            return None
+
+    section_answers = {}
+    for index, section in enumerate(sections):
+        print(f"Processing section: {section}")
+        query = f"Answer this RFP section based on our docs: {section['title']} - {section['content']}"
+        cache_key = section_text(section)
+        first = section_first[index]
+        if first != index:
+            # Same section seen earlier in this RFP: reuse its answer without another lookup
+            answer, cached, pending = section_answers[first]
+        else:
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            pending = False
+            if cached:
+                answer = cached["answer"]
+                account_cache_hit()
+            else:
+                try:
+                    answer = await within_budget(run_agent, query)
+                    pending = answer is None
+                    if pending:
+                        answer = PENDING_ANSWER
+                    else:
+                        await asyncio.to_thread(cache.put, cache_key, answer)
+                except Exception as e:
+                    import requests
+                    if isinstance(e, requests.exceptions.ConnectionError):
+                        answer = "Wikipedia lookup failed due to network error."
+                    else:
+                        answer = f"Error occurred: {str(e)}"
+            section_answers[index] = answer, cached, pending
+        yield "section", {
+            "id": section["id"],
+            "title": section["title"],
+            "parent_id": section["parent_id"],
+            "content": section["content"],
+            "answer": answer,
+            "level": section["level"],
+            **cache_fields(cached),
+            **duplicate_fields(sections, section_first, index),
+            **pending_fields(pending),
+            **trace_fields(agent_traces.pop(query, None)),
+        }
+        items_left -= 1
+        # await asyncio.sleep(5)
+
+    for idx, question in enumerate(questions):
+        print(f"Processing question: {question}")
+        query = f"Answer this RFP question based on our docs: {question.get('title', '')} - {question.get('content', '')}"
+        cached = await asyncio.to_thread(cache.get, question["text"])
+        pending = False
+        if cached:
+            answer = cached["answer"]
+            account_cache_hit()
+        else:
+            try:
+                answer = await within_budget(run_agent, query)
+                pending = answer is None
+                if pending:
+                    answer = PENDING_ANSWER
+                else:
+                    await asyncio.to_thread(cache.put, question["text"], answer)
+            except Exception as e:
+                answer = f"Error occurred: {str(e)}"
+
+        yield "question", {
+            "id": question["id"],
+            "text": question["text"],
+            "answer": answer,
+            "section": question["section"],
+            "type": question["type"],
+            "response_format": question["response_format"],
+            "word_limit": question["word_limit"],
+            "related_requirements": question["related_requirements"],
+            **cache_fields(cached),
+            **pending_fields(pending),
+            **trace_fields(agent_traces.pop(query, None)),
+        }
+        items_left -= 1
+
+    def check_requirement(req):
+        evidence = run_agent(requirement_query(req))
+        satisfied = "yes" in evidence.lower() or "satisfied" in evidence.lower()
+        return BatchItemAnswer(id=req["id"], answer=evidence, satisfied=satisfied)
+
+    distinct_requirements = [req for index, req in enumerate(requirements) if requirement_first[index] == index]
+    # One call covers every requirement in these modes; if it runs out of time they all stay pending
+    verdicts, batched = {}, {}
+    try:
+        if options["compliance_precheck"] and requirements:
+            verdicts = await run_in_thread(
+                deadline,
+                classify_requirements,
+                company_id,
+                distinct_requirements,
+                lambda prompt: llm.invoke(prompt).content,
+            )
+        elif options["batch_mode"] and requirements:
+            batched = await run_in_thread(
+                deadline,
+                run_batched,
+                distinct_requirements,
+                get_company_retriever(company_id),
+                lambda prompt: llm.invoke(prompt).content,
+                check_requirement,
+            )
+    except DeadlineExceeded:
+        print(f"Requirement checks for RFP {rfp_id} ran out of time")
+
+    checked = {}
+    for index, req in enumerate(requirements):
+        print(f"Processing requirement: {req}")
+        # Answers of repeated requirements come from their first occurrence
+        first = requirement_first[index]
+        source_id = str(requirements[first]["id"])
+        entry = {
+            "id": req["id"],
+            "text": req["text"],
+            "section": req["section"],
+            "category": req["category"],
+            "mandatory": req["mandatory"],
+            "related_questions": req["related_questions"],
+        }
+        if options["compliance_precheck"]:
+            verdict = verdicts.get(source_id)
+            if verdict is not None:
+                entry.update({
+                    "satisfied": verdict.satisfied,  # None: could not decide, needs review
+                    "evidence": verdict.evidence,
+                    "confidence": verdict.confidence,
+                    "decided_by": verdict.decided_by,
+                })
+        else:
+            if options["batch_mode"]:
+                result = batched.get(source_id)
+            elif first in checked:
+                result = checked[first]
+            else:
+                result = checked[index] = await within_budget(check_requirement, req)
+            if result is not None:
+                entry.update({"satisfied": result.satisfied, "evidence": result.answer})
+        if "satisfied" not in entry:
+            entry.update({"satisfied": False, "evidence": PENDING_ANSWER, "pending": True})
+        entry.update(duplicate_fields(requirements, requirement_first, index))
+        entry.update(trace_fields(agent_traces.pop(requirement_query(req), None)))
+
+        yield "requirement", entry
+        items_left -= 1
+        # await asyncio.sleep(5)
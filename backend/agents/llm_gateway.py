@@ -0,0 +1,517 @@
+import os
+import json
+import atexit
+import time
+import queue
+import random
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Union
+import httpx
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from agents.llm_scheduler import BATCH, FairScheduler
+from methods.deadline import Deadline, DeadlineExceeded, current_deadline
+from methods.llm_usage import record_usage
+from methods.tracing import current_traceparent, span
+
+load_dotenv()
+
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+
+# Provider chains per route; later providers are only tried when LLM_FAILOVER is on.
+# "fast" serves the agent and short checks, "long" whole documents and proposals.
+ROUTES = {
+    "fast": os.getenv("LLM_ROUTE_FAST", "groq,gemini").split(","),
+    "long": os.getenv("LLM_ROUTE_LONG", "gemini").split(","),
+}
+LLM_FAILOVER = os.getenv("LLM_FAILOVER", "1") == "1"
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+# Send a second request when the first has not answered after this many seconds (0 disables hedging)
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+# "live" calls Groq and Gemini; "fake" answers offline from agents.fake_llm (no keys or network)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "live")
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+Messages = List[dict]  # [{"role": "system" | "user" | "assistant", "content": str}]
+
+
+class LLMError(Exception):
+    def __init__(self, provider: str, message: str, status: Optional[int] = None, retryable: bool = False,
+                 retry_after: Optional[float] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+@dataclass
+class LLMRequest:
+    messages: Messages
+    operation: str
+    company_id: Optional[int] = None
+    rfp_id: Optional[int] = None
+    stop: Optional[List[str]] = None
+    temperature: Optional[float] = None
+    # "interactive" (a user is waiting) or "batch"; interactive calls are scheduled first
+    priority: str = BATCH
+    max_tokens: Optional[int] = None
+    traceparent: Optional[str] = None  # caller's trace; the gateway loop does not inherit its context
+    deadline: Optional[Deadline] = None  # likewise the caller's deadline, if any
+    # Set to stream: called on the gateway loop with the text received so far in the current attempt
+    on_text: Optional[Callable[[str], None]] = field(default=None, repr=False)
+
+
+@dataclass
+class LLMResult:
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+    retries: int = 0
+    hedged: bool = False
+    queue_wait: float = 0.0
+    raw: Any = field(default=None, repr=False)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _raise_for_status(provider: str, response: httpx.Response):
+    if response.status_code < 400:
+        return
+    raise LLMError(
+        provider, f"HTTP {response.status_code}: {response.text[:300]}", response.status_code,
+        retryable=response.status_code in RETRYABLE_STATUSES, retry_after=_retry_after(response),
+    )
+
+
+async def _sse_events(provider: str, client: httpx.AsyncClient, url: str, body: dict, headers: dict):
+    """JSON payloads of a server-sent-events response."""
+    async with client.stream("POST", url, json=body, headers=headers) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            _raise_for_status(provider, response)
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                data = line[5:].strip()
+                if data and data != "[DONE]":
+                    yield json.loads(data)
+
+
+class GroqProvider:
+    name = "groq"
+
+    def __init__(self, model: str = GROQ_MODEL):
+        self.model = model
+
+    async def acomplete(self, client: httpx.AsyncClient, request: LLMRequest) -> LLMResult:
+        body = {"model": self.model, "messages": request.messages}
+        if request.stop:
+            body["stop"] = request.stop[:4]
+        if request.temperature is not None:
+            body["temperature"] = request.temperature
+        if request.max_tokens:
+            body["max_tokens"] = request.max_tokens
+        headers = {"Authorization": f"Bearer {os.getenv('GROQ_API_KEY', '')}"}
+        if request.on_text is not None:
+            return await self._astream(client, request, body, headers)
+        response = await client.post(f"{GROQ_BASE_URL}/chat/completions", json=body, headers=headers)
+        _raise_for_status(self.name, response)
+        data = response.json()
+        usage = data.get("usage") or {}
+        return LLMResult(
+            text=data["choices"][0]["message"]["content"] or "", provider=self.name, model=self.model,
+            prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0),
+            raw=data,
+        )
+
+    async def _astream(self, client: httpx.AsyncClient, request: LLMRequest, body: dict, headers: dict) -> LLMResult:
+        body = {**body, "stream": True, "stream_options": {"include_usage": True}}
+        text, usage = "", {}
+        async for chunk in _sse_events(self.name, client, f"{GROQ_BASE_URL}/chat/completions", body, headers):
+            for choice in chunk.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    text += delta
+                    request.on_text(text)
+            usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or usage
+        return LLMResult(
+            text=text, provider=self.name, model=self.model,
+            prompt_tokens=usage.get("prompt_tokens", 0), completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+
+class GeminiProvider:
+    name = "gemini"
+
+    def __init__(self, model: str = GEMINI_MODEL):
+        self.model = model
+
+    async def acomplete(self, client: httpx.AsyncClient, request: LLMRequest) -> LLMResult:
+        system = [m["content"] for m in request.messages if m["role"] == "system"]
+        body = {"contents": [
+            {"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+            for m in request.messages if m["role"] != "system"
+        ]}
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": "\n\n".join(system)}]}
+        config = {}
+        if request.stop:
+            config["stopSequences"] = request.stop[:5]
+        if request.temperature is not None:
+            config["temperature"] = request.temperature
+        if request.max_tokens:
+            config["maxOutputTokens"] = request.max_tokens
+        if config:
+            body["generationConfig"] = config
+        headers = {"x-goog-api-key": os.getenv("GEMINI_API_KEY", "")}
+        if request.on_text is not None:
+            return await self._astream(client, request, body, headers)
+        response = await client.post(f"{GEMINI_BASE_URL}/models/{self.model}:generateContent", json=body,
+                                     headers=headers)
+        _raise_for_status(self.name, response)
+        data = response.json()
+        candidates = data.get("candidates") or []
+        if not candidates:
+            raise LLMError(self.name, f"no candidates returned: {data.get('promptFeedback')}")
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        usage = data.get("usageMetadata") or {}
+        return LLMResult(
+            text="".join(part.get("text", "") for part in parts), provider=self.name, model=self.model,
+            prompt_tokens=usage.get("promptTokenCount", 0), completion_tokens=usage.get("candidatesTokenCount", 0),
+            raw=data,
+        )
+
+    async def _astream(self, client: httpx.AsyncClient, request: LLMRequest, body: dict, headers: dict) -> LLMResult:
+        url = f"{GEMINI_BASE_URL}/models/{self.model}:streamGenerateContent?alt=sse"
+        text, usage, received = "", {}, False
+        async for chunk in _sse_events(self.name, client, url, body, headers):
+            for candidate in (chunk.get("candidates") or [])[:1]:
+                received = True
+                delta = "".join(part.get("text", "") for part in (candidate.get("content") or {}).get("parts") or [])
+                if delta:
+                    text += delta
+                    request.on_text(text)
+            usage = chunk.get("usageMetadata") or usage
+        if not received:
+            raise LLMError(self.name, "no candidates returned")
+        return LLMResult(
+            text=text, provider=self.name, model=self.model,
+            prompt_tokens=usage.get("promptTokenCount", 0), completion_tokens=usage.get("candidatesTokenCount", 0),
+        )
+
+
+PROVIDERS = {"groq": GroqProvider, "gemini": GeminiProvider}
+
+
+def default_providers() -> dict:
+    if LLM_PROVIDER == "fake":
+        from agents.fake_llm import fake_providers
+        return fake_providers(PROVIDERS)
+    return {name: cls() for name, cls in PROVIDERS.items()}
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0)
+
+
+class LLMGateway:
+    """Single entry point for LLM calls: pooled async HTTP, retries, failover and hedging.
+
+    The gateway owns an event loop in a background thread so one connection
+    pool serves async handlers, worker threads (agents, to_thread calls) and
+    sync handlers alike.
+    """
+
+    def __init__(self, providers: dict = None, routes: dict = None, failover: bool = LLM_FAILOVER,
+                 max_retries: int = LLM_MAX_RETRIES, hedge_after: float = LLM_HEDGE_AFTER):
+        self.providers = providers or default_providers()
+        self.routes = routes or ROUTES
+        self.failover = failover
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after
+        self.scheduler = FairScheduler()
+        self._loop = asyncio.new_event_loop()
+        self._client = None
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True)
+        self._thread.start()
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+                limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def _with_retries(self, provider, request: LLMRequest) -> LLMResult:
+        attempt = 0
+        queue_wait = 0.0
+        while True:
+            try:
+                async with self.scheduler.slot(provider.name, request) as ticket:
+                    queue_wait += ticket.started - ticket.enqueued
+                    result = await provider.acomplete(self._http(), request)
+                    self.scheduler.settle(ticket, result.prompt_tokens + result.completion_tokens)
+                result.retries = attempt
+                result.queue_wait = queue_wait
+                return result
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = LLMError(provider.name, f"{type(e).__name__}: {e}", retryable=True)
+            except LLMError as e:
+                error = e
+            if error.status == 429:
+                # Hold every caller of this provider, not just this one, until it accepts calls again
+                self.scheduler.pause(provider.name, error.retry_after or backoff_delay(attempt))
+            if not error.retryable or attempt >= self.max_retries:
+                raise error
+            delay = backoff_delay(attempt, error.retry_after)
+            if request.deadline is not None and delay >= request.deadline.remaining():
+                raise error
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _hedged(self, provider, request: LLMRequest) -> LLMResult:
+        """Return the first good answer of the request and, if it is slow, a duplicate of it."""
+        # Two streams would interleave their text
+        if not self.hedge_after or request.on_text is not None:
+            return await self._with_retries(provider, request)
+        first = asyncio.ensure_future(self._with_retries(provider, request))
+        second = None
+        # Cancelling this coroutine (the deadline's wait_for) must not leave either call running
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+            if done:
+                return first.result()
+            second = asyncio.ensure_future(self._with_retries(provider, request))
+            pending = {first, second}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        result = task.result()
+                        result.hedged = task is second
+                        return result
+                    error = task.exception()
+            raise error
+        finally:
+            for task in (first, second):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _complete(self, request: LLMRequest, route: str) -> LLMResult:
+        chain = self.routes.get(route) or self.routes["fast"]
+        if not self.failover:
+            chain = chain[:1]
+        last_error = None
+        for name in chain:
+            provider = self.providers[name.strip()]
+            if request.deadline is not None:
+                request.deadline.check(f"llm.{provider.name}")
+            started = time.perf_counter()
+            with span(f"llm.{provider.name}", request.traceparent, operation=request.operation, llm_model=provider.model,
+                      company_id=request.company_id, rfp_id=request.rfp_id) as current:
+                try:
+                    if request.deadline is None:
+                        result = await self._hedged(provider, request)
+                    else:
+                        result = await asyncio.wait_for(self._hedged(provider, request), request.deadline.remaining())
+                except asyncio.CancelledError:
+                    raise
+                except (asyncio.TimeoutError, DeadlineExceeded) as e:
+                    record_usage(provider.name, provider.model, request.operation, time.perf_counter() - started,
+                                 company_id=request.company_id, rfp_id=request.rfp_id, error=True)
+                    current.set_attribute("llm_error", "deadline exceeded")
+                    # No time left for a failover provider either
+                    raise DeadlineExceeded(f"deadline exceeded in {request.operation}") from e
+                except Exception as e:
+                    last_error = e
+                    record_usage(provider.name, provider.model, request.operation, time.perf_counter() - started,
+                                 company_id=request.company_id, rfp_id=request.rfp_id, error=True)
+                    current.set_attribute("llm_error", str(e)[:300])
+                    continue
+                result.latency = time.perf_counter() - started - result.queue_wait
+                current.set_attribute("llm_queue_wait_ms", int(result.queue_wait * 1000))
+                current.set_attribute("llm_retries", result.retries)
+                current.set_attribute("llm_hedged", result.hedged)
+                current.set_attribute("llm_prompt_tokens", result.prompt_tokens)
+                current.set_attribute("llm_completion_tokens", result.completion_tokens)
+            record_usage(result.provider, result.model, request.operation, result.latency,
+                         result.prompt_tokens, result.completion_tokens, request.company_id, request.rfp_id,
+                         retries=result.retries)
+            return result
+        raise last_error
+
+    def submit(self, request: LLMRequest, route: str = "fast"):
+        """concurrent.futures.Future of the call, running on the gateway's loop."""
+        return asyncio.run_coroutine_threadsafe(self._complete(request, route), self._loop)
+
+    async def _aclose(self):
+        # Calls still running are abandoned; their callers are exiting too
+        others = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in others:
+            task.cancel()
+        await asyncio.gather(*others, return_exceptions=True)
+        await self.scheduler.close()
+        if self._client is not None:
+            await self._client.aclose()
+
+    def close(self, timeout: float = 5.0):
+        """Cancel pending work, close the HTTP client and stop the loop thread."""
+        if self._loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._aclose(), self._loop).result(timeout=timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._loop.close()
+
+
+_gateway = None
+_gateway_pid = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway, created lazily so forked and spawned workers build their own."""
+    global _gateway, _gateway_pid
+    with _gateway_lock:
+        if _gateway is None or _gateway_pid != os.getpid():
+            _gateway = LLMGateway()
+            _gateway_pid = os.getpid()
+        return _gateway
+
+
+def close_gateway():
+    """Close this process's gateway, if it built one (app shutdown and interpreter exit)."""
+    global _gateway
+    with _gateway_lock:
+        # A gateway inherited through fork has no loop thread in this process
+        if _gateway is None or _gateway_pid != os.getpid():
+            return
+        gateway, _gateway = _gateway, None
+    gateway.close()
+
+
+# Scripts (benchmarks, the job worker, the load test) exit without a shutdown hook
+atexit.register(close_gateway)
+
+
+def _request(prompt: Union[str, Messages], operation: str, **kwargs) -> LLMRequest:
+    messages = [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+    kwargs.setdefault("deadline", current_deadline())
+    return LLMRequest(messages=messages, operation=operation, traceparent=current_traceparent(), **kwargs)
+
+
+async def complete(prompt: Union[str, Messages], operation: str, route: str = "fast", **kwargs) -> LLMResult:
+    """Await one LLM completion from any event loop; `operation` names the call site for accounting."""
+    return await asyncio.wrap_future(get_gateway().submit(_request(prompt, operation, **kwargs), route))
+
+
+def complete_sync(prompt: Union[str, Messages], operation: str, route: str = "fast", **kwargs) -> LLMResult:
+    """Blocking variant of complete() for sync handlers and worker threads."""
+    return get_gateway().submit(_request(prompt, operation, **kwargs), route).result()
+
+
+class CompletionStream:
+    """Iterate over the text of a streamed completion as it grows; `result` is set once iteration ends.
+
+    Every item is the whole text received so far. A retried or failed-over
+    attempt starts again from the beginning, so an item that does not
+    extend the previous one means the text was restarted.
+    """
+
+    def __init__(self, request: LLMRequest, route: str):
+        self._queue = queue.Queue()
+        request.on_text = self._queue.put
+        self.result: Optional[LLMResult] = None
+        self._future = get_gateway().submit(request, route)
+        self._future.add_done_callback(lambda _: self._queue.put(None))
+
+    def __iter__(self):
+        done = False
+        while not done:
+            text = self._queue.get()
+            if text is None:
+                break
+            # Skip to the latest text when the consumer is slower than the stream
+            while not self._queue.empty():
+                latest = self._queue.get()
+                if latest is None:
+                    done = True
+                    break
+                text = latest
+            yield text
+        self.result = self._future.result()
+
+
+def stream_sync(prompt: Union[str, Messages], operation: str, route: str = "fast", **kwargs) -> CompletionStream:
+    """Streaming variant of complete_sync(): for text in stream_sync(...), then stream.result."""
+    return CompletionStream(_request(prompt, operation, **kwargs), route)
+
+
+ROLE_BY_MESSAGE_TYPE = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def to_gateway_messages(messages) -> Messages:
+    return [{"role": ROLE_BY_MESSAGE_TYPE.get(m.type, "user"), "content": m.content} for m in messages]
+
+
+class GatewayChatModel(BaseChatModel):
+    """LangChain chat model backed by the gateway, for agents and llm.invoke() call sites."""
+
+    operation: str = "chat"
+    route: str = "fast"
+    priority: str = BATCH
+    company_id: Optional[int] = None
+    rfp_id: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-gateway"
+
+    def _result(self, result: LLMResult) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=result.text))],
+            llm_output={
+                "provider": result.provider,
+                "model_name": result.model,
+                "token_usage": {"prompt_tokens": result.prompt_tokens, "completion_tokens": result.completion_tokens},
+            },
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self._result(complete_sync(
+            to_gateway_messages(messages), self.operation, self.route,
+            company_id=self.company_id, rfp_id=self.rfp_id, stop=stop, priority=self.priority,
+        ))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self._result(await complete(
+            to_gateway_messages(messages), self.operation, self.route,
+            company_id=self.company_id, rfp_id=self.rfp_id, stop=stop, priority=self.priority,
+        ))
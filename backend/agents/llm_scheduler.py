@@ -0,0 +1,263 @@
+import os
+import time
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from methods.metrics import LLM_QUEUE_DEPTH, observe_queue_wait
+
+# Lanes in dispatch order: interactive calls (a user waiting on an edit) always go first
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+# Provider limits as "provider=requests_per_minute:tokens_per_minute", e.g. "groq=30:6000";
+# unlisted providers and 0 are unlimited
+LLM_RATE_LIMITS = os.getenv("LLM_RATE_LIMITS", "")
+# Calls in flight per provider; the rest queue in fair order
+LLM_PROVIDER_CONCURRENCY = int(os.getenv("LLM_PROVIDER_CONCURRENCY", "16"))
+# Per-company quota across providers (0 = unlimited)
+LLM_COMPANY_RPM = float(os.getenv("LLM_COMPANY_RPM", "0"))
+LLM_COMPANY_TPM = float(os.getenv("LLM_COMPANY_TPM", "0"))
+# Fair-share weights as "company_id=weight,..."; companies not listed weigh 1
+LLM_COMPANY_WEIGHTS = os.getenv("LLM_COMPANY_WEIGHTS", "")
+# Limits are enforced per process, not shared: set this to the number of processes
+# calling providers with the same keys (gunicorn WEB_CONCURRENCY plus every
+# generation_worker.py process) and each one keeps to its share of the limits above
+LLM_SCHEDULER_PROCESSES = max(1, int(os.getenv("LLM_SCHEDULER_PROCESSES", "1")))
+# Completion tokens assumed for requests without max_tokens
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "512"))
+
+
+def parse_rate_limits(spec: str) -> Dict[str, tuple]:
+    limits = {}
+    for part in spec.split(","):
+        name, _, values = part.partition("=")
+        if name.strip():
+            rpm, _, tpm = values.partition(":")
+            limits[name.strip()] = (float(rpm or 0), float(tpm or 0))
+    return limits
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for part in spec.split(","):
+        company_id, _, weight = part.partition("=")
+        if company_id.strip():
+            weights[company_id.strip()] = float(weight or 1)
+    return weights
+
+
+def estimate_tokens(request) -> int:
+    """Prompt plus expected completion tokens, at 4 characters per token."""
+    prompt = sum(len(m["content"]) for m in request.messages) // 4
+    return prompt + (request.max_tokens or LLM_EXPECTED_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to one minute's worth; 0 means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (requests larger than the bucket wait for a full one)."""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float):
+        """Debit `amount`; the balance may go negative when correcting an estimate."""
+        if self.capacity:
+            self._refill(now)
+            self.tokens -= min(amount, self.capacity) if amount > 0 else amount
+
+
+@dataclass(order=True)
+class Ticket:
+    finish: float
+    seq: int
+    start: float = field(compare=False)
+    provider: str = field(compare=False)
+    lane: str = field(compare=False)
+    company: str = field(compare=False)
+    cost: int = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False)
+    started: Optional[float] = field(default=None, compare=False)
+
+
+class FairScheduler:
+    """Admission control in front of every provider call, run on the gateway's event loop.
+
+    Calls wait in one queue per lane. Within a lane, companies share
+    providers by weighted fair queuing on estimated tokens, so a company
+    with hundreds of queued items gets its share rather than the whole
+    provider. A call starts when its provider has a free concurrency slot
+    and room in its request and token buckets, and its company has quota
+    left. Calls blocked only on their company quota do not hold up others.
+
+    State lives in this process only. With several processes each one gets
+    1/`processes` of every limit and quota, so together they stay within
+    the configured totals (a process cannot borrow an idle one's share).
+    """
+
+    def __init__(self, rate_limits: dict = None, concurrency: int = LLM_PROVIDER_CONCURRENCY,
+                 company_rpm: float = LLM_COMPANY_RPM, company_tpm: float = LLM_COMPANY_TPM,
+                 weights: dict = None, processes: int = LLM_SCHEDULER_PROCESSES):
+        rate_limits = parse_rate_limits(LLM_RATE_LIMITS) if rate_limits is None else rate_limits
+        self.rate_limits = {
+            provider: (rpm / processes, tpm / processes) for provider, (rpm, tpm) in rate_limits.items()
+        }
+        self.concurrency = max(1, concurrency // processes)
+        self.company_rpm = company_rpm / processes
+        self.company_tpm = company_tpm / processes
+        self.weights = parse_weights(LLM_COMPANY_WEIGHTS) if weights is None else weights
+        self._queues = {lane: [] for lane in LANES}
+        self._virtual_time = {lane: 0.0 for lane in LANES}
+        self._last_finish = {lane: {} for lane in LANES}
+        self._provider_buckets = {}
+        self._company_buckets = {}
+        self._in_flight = {}
+        self._paused_until = {}
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._dispatcher = None
+
+    def _buckets(self, provider: str):
+        if provider not in self._provider_buckets:
+            rpm, tpm = self.rate_limits.get(provider, (0, 0))
+            self._provider_buckets[provider] = (TokenBucket(rpm), TokenBucket(tpm))
+        return self._provider_buckets[provider]
+
+    def _company(self, company: str):
+        if company not in self._company_buckets:
+            self._company_buckets[company] = (TokenBucket(self.company_rpm), TokenBucket(self.company_tpm))
+        return self._company_buckets[company]
+
+    def _enqueue(self, provider: str, request) -> Ticket:
+        lane = INTERACTIVE if request.priority == INTERACTIVE else BATCH
+        company = str(request.company_id)
+        cost = estimate_tokens(request)
+        start = max(self._virtual_time[lane], self._last_finish[lane].get(company, 0.0))
+        finish = start + cost / self.weights.get(company, 1.0)
+        self._last_finish[lane][company] = finish
+        ticket = Ticket(finish, next(self._seq), start, provider, lane, company, cost,
+                        asyncio.get_running_loop().create_future(), time.monotonic())
+        self._queues[lane].append(ticket)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._run())
+        self._wakeup.set()
+        return ticket
+
+    def _wait_time(self, ticket: Ticket, now: float):
+        """(seconds until the ticket may start or None if waiting on a slot, blocked on the provider)."""
+        if self._in_flight.get(ticket.provider, 0) >= self.concurrency:
+            return None, True
+        requests, tokens = self._buckets(ticket.provider)
+        provider_wait = max(self._paused_until.get(ticket.provider, 0.0) - now,
+                            requests.wait_time(1, now), tokens.wait_time(ticket.cost, now))
+        if provider_wait > 0:
+            return provider_wait, True
+        requests, tokens = self._company(ticket.company)
+        return max(requests.wait_time(1, now), tokens.wait_time(ticket.cost, now)), False
+
+    def _start(self, ticket: Ticket, now: float):
+        for bucket, amount in zip(self._buckets(ticket.provider) + self._company(ticket.company),
+                                  (1, ticket.cost, 1, ticket.cost)):
+            bucket.take(amount, now)
+        self._in_flight[ticket.provider] = self._in_flight.get(ticket.provider, 0) + 1
+        self._virtual_time[ticket.lane] = max(self._virtual_time[ticket.lane], ticket.start)
+        ticket.started = now
+        ticket.future.set_result(None)
+
+    def _dispatch_ready(self) -> Optional[float]:
+        """Start every ticket that may start, in lane then fair order; returns the next timed wait."""
+        now = time.monotonic()
+        delay = None
+        # Providers whose earliest waiting ticket cannot start: later tickets must not overtake it
+        blocked = set()
+        for lane in LANES:
+            queue = self._queues[lane]
+            for ticket in sorted(queue):
+                if ticket.future.done():
+                    queue.remove(ticket)
+                    continue
+                if ticket.provider in blocked:
+                    continue
+                wait, provider_blocked = self._wait_time(ticket, now)
+                if wait == 0:
+                    queue.remove(ticket)
+                    self._start(ticket, now)
+                    continue
+                if provider_blocked:
+                    blocked.add(ticket.provider)
+                if wait is not None:
+                    delay = wait if delay is None else min(delay, wait)
+        depth = {}
+        for lane in LANES:
+            for ticket in self._queues[lane]:
+                depth[ticket.provider, lane] = depth.get((ticket.provider, lane), 0) + 1
+        for provider in self._provider_buckets:
+            for lane in LANES:
+                LLM_QUEUE_DEPTH.labels(provider, lane).set(depth.get((provider, lane), 0))
+        return delay
+
+    async def _run(self):
+        while True:
+            delay = self._dispatch_ready()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _release(self, ticket: Ticket):
+        self._in_flight[ticket.provider] -= 1
+        self._wakeup.set()
+
+    @asynccontextmanager
+    async def slot(self, provider: str, request):
+        """Wait for the scheduler to admit a call of `request` to `provider`; yields the ticket."""
+        ticket = self._enqueue(provider, request)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                self._release(ticket)
+            raise
+        observe_queue_wait(provider, ticket.lane, request.company_id, ticket.started - ticket.enqueued)
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def settle(self, ticket: Ticket, actual_tokens: int):
+        """Correct the token buckets once the provider reports what the call really used."""
+        now = time.monotonic()
+        difference = actual_tokens - ticket.cost
+        self._buckets(ticket.provider)[1].take(difference, now)
+        self._company(ticket.company)[1].take(difference, now)
+
+    def pause(self, provider: str, seconds: float):
+        """Hold all calls to `provider` after it rate-limited us (Retry-After)."""
+        self._paused_until[provider] = max(self._paused_until.get(provider, 0.0), time.monotonic() + seconds)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self):
+        """Stop the dispatcher task; run on the gateway's loop before it stops."""
+        if self._dispatcher is not None and not self._dispatcher.done():
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
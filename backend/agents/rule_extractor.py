@@ -0,0 +1,219 @@
+import os
+import re
+
+# A pre-extraction with at least this much structure only needs the LLM for gaps
+RFP_RULES_MIN_SECTIONS = int(os.getenv("RFP_RULES_MIN_SECTIONS", "2"))
+RFP_RULES_MIN_REQUIREMENTS = int(os.getenv("RFP_RULES_MIN_REQUIREMENTS", "3"))
+SECTION_CONTENT_CHARS = 1500
+MAX_SUBMISSION_REQUIREMENTS = 10
+
+HEADING_PATTERNS = (
+    # "Section 3: Scope of Work", "ARTICLE IV - Terms", "Part 2.1 Pricing"
+    re.compile(r"^\s*(?:section|article|part)\s+([0-9ivxlc]+(?:\.\d+)*)\s*[.:)\-]?\s+(\S.{2,100})$", re.IGNORECASE),
+    # "3. Scope of Work", "3.1 Technical Requirements"
+    re.compile(r"^\s*(\d{1,2}(?:\.\d{1,2}){0,3})\.?\)?\s+([A-Z][^\n]{2,100})$"),
+)
+QUESTION_PATTERN = re.compile(r"^\s*(?:Q|Question)\s*(\d+(?:\.\d+)*)\s*[.:)\-]\s*(\S.{5,})$", re.IGNORECASE)
+OPEN_QUESTION_PATTERN = re.compile(r"^\s*(?:\d+(?:\.\d+)*[.)]?\s+)?([A-Z][^\n]{15,400}\?)\s*$")
+# A sentence ends at . ! or ? not followed by a word character (so "99.9%" and "e.g." hold), or at a blank line
+SENTENCE_PATTERN = re.compile(r"(?:[^.!?\n]|\n(?!\s*\n)|[.!?](?=[\w%]))+[.!?]")
+REQUIREMENT_WORDS = re.compile(r"\b(?:shall|must|is required to|are required to)\b", re.IGNORECASE)
+OPTIONAL_WORDS = re.compile(r"\b(?:should|may|preferred|desirable)\b", re.IGNORECASE)
+SUBMISSION_WORDS = re.compile(r"\b(?:submit|submission|submitted)\b", re.IGNORECASE)
+
+METADATA_PATTERNS = {
+    "due_date": re.compile(
+        r"(?:due date|proposals? (?:are |is )?due|submission deadline|closing date|response deadline)\s*[:\-]?\s*([^\n]{4,60})",
+        re.IGNORECASE),
+    "issue_date": re.compile(r"(?:issue date|date issued|release date|issued on)\s*[:\-]?\s*([^\n]{4,60})", re.IGNORECASE),
+    "issuer": re.compile(r"(?:issued by|issuing (?:agency|organi[sz]ation|office)|agency name)\s*[:\-]\s*([^\n]{3,100})",
+                         re.IGNORECASE),
+    "title": re.compile(r"^\s*((?:request for (?:proposals?|quotations?|information)|rfp|rfq)\b[^\n]{0,120})$",
+                        re.IGNORECASE | re.MULTILINE),
+}
+CONTACT_NAME = re.compile(r"(?:point of contact|contact person|contact name|contact)\s*[:\-]\s*([^\n,;]{3,60})",
+                          re.IGNORECASE)
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE = re.compile(r"(?:\+?\d{1,2}[\s.-])?\(?\d{3}\)?[\s.-]\d{3}[\s.-]\d{4}")
+
+CATEGORY_WORDS = (
+    ("security", re.compile(r"\b(?:security|secure|encrypt\w*|access control|password|vulnerab\w*|breach|sso|"
+                            r"single sign-on|authenticat\w*|mfa)\b", re.I)),
+    ("compliance", re.compile(r"\b(?:comply|compliance|regulat\w*|law|statut\w*|certif\w*|accredit\w*)\b", re.I)),
+    ("commercial", re.compile(r"\b(?:price|pricing|cost|invoice|payment|insurance|liabilit\w*|warrant\w*|bond)\b", re.I)),
+    # "support" alone is usually the verb ("must support SSO"); only support-service phrases count
+    ("support", re.compile(r"(?:\b(?:24/7|24x7|technical|customer|user|ongoing|on-?site|remote|provide|offer)\s+support|"
+                           r"\bsupport\s+(?:services?|team|staff|hours|desk|plan|contract|tickets?|requests?)|"
+                           r"\b(?:training|maintenance|sla|help ?desk|service level))\b", re.I)),
+    ("submission", re.compile(r"\b(?:submit\w*|proposal|page limit|format)\b", re.I)),
+    ("technical", re.compile(r"\b(?:system|software|integrat\w*|api|platform|data|hosting|network|interface)\b", re.I)),
+)
+
+
+def normalize_space(text: str) -> str:
+    return " ".join(text.split())
+
+
+def guess_category(text: str) -> str:
+    for category, pattern in CATEGORY_WORDS:
+        if pattern.search(text):
+            return category
+    return "general"
+
+
+def _match_heading(line: str):
+    if len(line) > 120 or REQUIREMENT_WORDS.search(line) or line.rstrip().endswith(("?", ",", ";")):
+        return None
+    for pattern in HEADING_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            number, title = match.group(1), match.group(2).strip().rstrip(".:")
+            # A sentence rather than a title
+            if len(title.split()) > 14:
+                return None
+            return number, title
+    return None
+
+
+def _extract_metadata(text: str) -> dict:
+    metadata = {key: "" for key in ("title", "issuer", "issue_date", "due_date")}
+    for key, pattern in METADATA_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            metadata[key] = normalize_space(match.group(1)).strip(" .:-")
+    name, email, phone = CONTACT_NAME.search(text), EMAIL.search(text), PHONE.search(text)
+    metadata["contact_info"] = {
+        "name": normalize_space(name.group(1)) if name else "",
+        "email": email.group(0) if email else "",
+        "phone": phone.group(0) if phone else "",
+    }
+    metadata["submission_requirements"] = []
+    return metadata
+
+
+def pre_extract(text: str) -> dict:
+    """Structure JSON (same shape as the LLM's) found with compiled patterns alone.
+
+    Sections come from numbered headings, questions from "Q1."-style and
+    question-mark lines, requirements from shall/must sentences, metadata
+    from labelled lines. Questions and requirements belong to the closest
+    heading above them.
+    """
+    metadata = _extract_metadata(text)
+
+    # Headings with their character offsets
+    headings = []
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        heading = _match_heading(line.strip())
+        if heading:
+            headings.append((offset, offset + len(line), heading))
+        offset += len(line)
+
+    sections = []
+    seen_titles = set()
+    last_top = None
+    for index, (start, body_start, (number, title)) in enumerate(headings):
+        key = (number, title.lower())
+        if key in seen_titles:
+            # Repeated by overlapping parser chunks or a table of contents
+            continue
+        seen_titles.add(key)
+        body_end = headings[index + 1][0] if index + 1 < len(headings) else len(text)
+        level = 1 if "." not in number.strip(".") else 2
+        section = {
+            "id": f"S{len(sections) + 1}",
+            "title": title,
+            "parent_id": last_top["id"] if level == 2 and last_top else None,
+            "content": normalize_space(text[body_start:body_end])[:SECTION_CONTENT_CHARS],
+            "level": level,
+            "_start": start,
+        }
+        if level == 1:
+            last_top = section
+        sections.append(section)
+
+    def section_at(position: int):
+        current = None
+        for section in sections:
+            if section["_start"] > position:
+                break
+            current = section["id"]
+        return current
+
+    questions, seen_questions = [], set()
+    # Heading and question lines are masked out of the text searched for requirement sentences
+    masked = set(start for start, _, _ in headings)
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        match = QUESTION_PATTERN.match(line.strip())
+        question = match.group(2) if match else None
+        if question is None:
+            match = OPEN_QUESTION_PATTERN.match(line.strip())
+            question = match.group(1) if match else None
+        if question:
+            masked.add(offset)
+            key = normalize_space(question).lower()
+            if key not in seen_questions:
+                seen_questions.add(key)
+                questions.append({
+                    "id": f"Q{len(questions) + 1}", "text": normalize_space(question), "section": section_at(offset),
+                    "type": "narrative", "response_format": "text", "word_limit": None, "related_requirements": [],
+                })
+        offset += len(line)
+
+    body, offset = [], 0
+    for line in text.splitlines(keepends=True):
+        content = line.rstrip("\r\n")
+        # Same length, so offsets still map to sections; the dots end any sentence running into the line
+        body.append("." * len(content) + line[len(content):] if offset in masked else line)
+        offset += len(line)
+
+    requirements, seen_requirements = [], set()
+    for match in SENTENCE_PATTERN.finditer("".join(body)):
+        sentence = normalize_space(match.group(0))
+        if not REQUIREMENT_WORDS.search(sentence) or len(sentence) < 20:
+            continue
+        key = sentence.lower()
+        if key in seen_requirements:
+            continue
+        seen_requirements.add(key)
+        requirements.append({
+            "id": f"R{len(requirements) + 1}", "text": sentence, "section": section_at(match.start()),
+            "category": guess_category(sentence), "mandatory": not OPTIONAL_WORDS.search(sentence),
+            "related_questions": [],
+        })
+        if SUBMISSION_WORDS.search(sentence) and len(metadata["submission_requirements"]) < MAX_SUBMISSION_REQUIREMENTS:
+            metadata["submission_requirements"].append(sentence)
+
+    for section in sections:
+        del section["_start"]
+    link_by_section(questions, requirements)
+    return {"metadata": metadata, "sections": sections, "questions": questions, "requirements": requirements}
+
+
+def link_by_section(questions: list, requirements: list, limit: int = 10):
+    """Link questions and requirements of the same section where no links exist yet."""
+    for question in questions:
+        if not question.get("related_requirements") and question["section"] is not None:
+            question["related_requirements"] = [
+                r["id"] for r in requirements if r["section"] == question["section"]
+            ][:limit]
+    for requirement in requirements:
+        if not requirement.get("related_questions") and requirement["section"] is not None:
+            requirement["related_questions"] = [
+                q["id"] for q in questions if q["section"] == requirement["section"]
+            ][:limit]
+
+
+def missing_metadata(metadata: dict) -> list:
+    """Dotted names of metadata fields the patterns did not find."""
+    missing = [key for key in ("title", "issuer", "issue_date", "due_date") if not metadata.get(key)]
+    missing += [f"contact_info.{key}" for key, value in metadata["contact_info"].items() if not value]
+    return missing
+
+
+def is_confident(structure: dict) -> bool:
+    """Enough mechanical structure that the LLM only has to fill gaps and classify."""
+    return (len(structure["sections"]) >= RFP_RULES_MIN_SECTIONS
+            and len(structure["requirements"]) >= RFP_RULES_MIN_REQUIREMENTS)
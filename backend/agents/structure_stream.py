@@ -0,0 +1,271 @@
+import os
+import re
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from agents.llm_gateway import complete_sync, stream_sync
+from pydantic_models.datatypes import RFPMetadata, RFPQuestion, RFPRequirement, RFPSection
+
+# Start of a list item; seen inside a string it means a stray quote swapped strings and structure
+ITEM_START = re.compile(r'\{\s*"id"\s*:')
+ITEM_START_LOOKAHEAD = 16
+ITEM_MODELS = {"metadata": RFPMetadata, "sections": RFPSection, "questions": RFPQuestion, "requirements": RFPRequirement}
+LIST_KEYS = ("sections", "questions", "requirements")
+# Repair calls for fragments that fail to parse or validate (0 drops them)
+RFP_STRUCTURE_REPAIR_ATTEMPTS = int(os.getenv("RFP_STRUCTURE_REPAIR_ATTEMPTS", "1"))
+
+
+class StructureStreamParser:
+    """Cuts a structure JSON into its metadata object and list items as each one closes.
+
+    feed() takes the whole response text received so far and returns the
+    (kind, fragment) pairs completed since the previous call; only the new
+    characters are scanned. Fragments are not parsed here, but the scan
+    gets back in step after common damage so one bad item does not take
+    the rest with it: a raw newline (never valid inside a JSON string) ends
+    a string left open by a stray quote, so does the start of the next list
+    item ({"id": ...) on a single-line response, and a new item starting,
+    or the list closing, inside an unterminated item cuts that item off as
+    is.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.position = 0  # next character to scan
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_string = None
+        self.key = None
+        self.fragment = None  # (kind, start offset, stack depth) of the item being read
+        self.previous = None  # last significant character outside strings
+        self.done = False
+
+    def _cut_fragment(self, end: int, fragments: list):
+        """Emit the unterminated item up to `end` and return to the list holding it."""
+        kind, start, depth = self.fragment
+        fragments.append((kind, self.text[start:end].rstrip().rstrip(",")))
+        del self.stack[depth - 1:]
+        self.fragment = None
+
+    def _item_start_in_string(self, i: int, final: bool) -> Optional[bool]:
+        """Whether text[i] ('{' inside a string of a list item) starts the next item; None to wait for more text."""
+        if len(self.stack) < 2 or self.stack[1] != "[":
+            return False
+        if ITEM_START.match(self.text, i):
+            return True
+        if not final and len(self.text) - i < ITEM_START_LOOKAHEAD:
+            return None
+        return False
+
+    def feed(self, text: str, final: bool = False) -> List[Tuple[str, str]]:
+        fragments = []
+        self.text = text
+        while self.position < len(text):
+            i = self.position
+            if self.done:
+                break
+            c = text[i]
+            if self.in_string:
+                if c == "{" and not self.escape:
+                    starts_item = self._item_start_in_string(i, final)
+                    if starts_item is None:
+                        break
+                    if starts_item:
+                        self.in_string = False
+                        if self.fragment is not None:
+                            self._cut_fragment(i, fragments)
+                        self.previous = ","
+                if self.in_string:
+                    self.position += 1
+                    if self.escape:
+                        self.escape = False
+                    elif c == "\\":
+                        self.escape = True
+                    elif c == '"' or c == "\n":
+                        self.in_string = False
+                        self.previous = '"'
+                        if len(self.stack) == 1:
+                            self.last_string = text[self.string_start + 1:i]
+                    continue
+            self.position += 1
+            if c.isspace():
+                continue
+            if not self.stack:
+                # Anything before the top-level object (a ```json fence) is skipped
+                if c == "{":
+                    self.stack.append(c)
+                continue
+            if c == '"':
+                self.in_string = True
+                self.string_start = i
+            elif c == ":" and len(self.stack) == 1:
+                self.key = self.last_string
+            elif c in "{[":
+                # Inside an object a value needs a key first: the current item was never closed
+                if self.stack[-1] == "{" and self.previous != ":" and self.fragment is not None:
+                    self._cut_fragment(i, fragments)
+                self.stack.append(c)
+                if self.fragment is None and c == "{":
+                    if len(self.stack) == 2 and self.key == "metadata":
+                        self.fragment = ("metadata", i, 2)
+                    elif len(self.stack) == 3 and self.stack[1] == "[" and self.key in LIST_KEYS:
+                        self.fragment = (self.key, i, 3)
+            elif c in "}]":
+                if c == "}" and self.stack[-1] == "[":
+                    # A stray closing brace; the list is still open
+                    continue
+                if c == "]" and self.stack[-1] == "{" and self.fragment is not None:
+                    self._cut_fragment(i, fragments)
+                if self.fragment is not None and len(self.stack) == self.fragment[2]:
+                    fragments.append((self.fragment[0], text[self.fragment[1]:i + 1]))
+                    self.fragment = None
+                self.stack.pop()
+                self.done = not self.stack
+            self.previous = c
+        return fragments
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """Items held back for lookahead, and the item cut off by the end of the response, if any."""
+        fragments = self.feed(self.text, final=True)
+        if self.fragment is None:
+            return fragments
+        kind, start, _ = self.fragment
+        self.fragment = None
+        return fragments + [(kind, self.text[start:])]
+
+
+def validate_fragment(kind: str, fragment) -> Tuple[Optional[dict], Optional[str]]:
+    """(item, None) for a valid fragment (JSON text or already parsed), else (None, error)."""
+    if isinstance(fragment, str):
+        try:
+            fragment = json.loads(fragment)
+        except json.JSONDecodeError as e:
+            return None, f"invalid JSON: {e}"
+    try:
+        return ITEM_MODELS[kind].model_validate(fragment).model_dump(), None
+    except ValidationError as e:
+        return None, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()[:3])
+
+
+def repair_prompt(broken: List[dict]) -> str:
+    fields = "\n".join(f"- {kind}: {', '.join(model.model_fields)}" for kind, model in ITEM_MODELS.items())
+    fragments = "\n".join(
+        f"Fragment {n} ({entry['kind']}) error: {entry['error']}\n{entry['fragment']}\n" for n, entry in enumerate(broken, 1)
+    )
+    return f"""
+        Below are malformed fragments of an RFP structure JSON. Each should be one JSON object of the kind
+        given in its header, with these fields:
+{fields}
+
+        Fix only the syntax and field types; keep the ids and wording. Complete a fragment that was cut off
+        from what it already says. Return a JSON array with one object per fragment, in the same order, and
+        null for a fragment that cannot be recovered.
+
+{fragments}
+        Respond ONLY with the JSON array.
+        """
+
+
+class StructureAssembler:
+    """Collects validated fragments in document order and re-prompts only the malformed ones.
+
+    `on_item(kind, item)` is called for every item as soon as it is valid,
+    with kind "metadata", "section", "question" or "requirement", and with
+    ("reset", {}) when the response restarted and earlier items are void.
+    """
+
+    def __init__(self, on_item: Callable[[str, dict], None] = None):
+        self.on_item = on_item
+        self.reset()
+
+    def reset(self):
+        if getattr(self, "fragments", 0) and self.on_item is not None:
+            self.on_item("reset", {})
+        self.slots: Dict[str, list] = {kind: [] for kind in LIST_KEYS}
+        self.metadata = None
+        self.broken: List[dict] = []
+        self.fragments = 0
+
+    def _accept(self, kind: str, item: dict, slot: Optional[int] = None):
+        if kind == "metadata":
+            self.metadata = item
+        elif slot is None:
+            self.slots[kind].append(item)
+        else:
+            self.slots[kind][slot] = item
+        if self.on_item is not None:
+            self.on_item("metadata" if kind == "metadata" else kind[:-1], item)
+
+    def add(self, kind: str, fragment: str):
+        self.fragments += 1
+        item, error = validate_fragment(kind, fragment)
+        if item is not None:
+            self._accept(kind, item)
+            return
+        # Keep the item's place in document order for the repaired version
+        slot = None
+        if kind != "metadata":
+            slot = len(self.slots[kind])
+            self.slots[kind].append(None)
+        self.broken.append({"kind": kind, "fragment": fragment, "error": error, "slot": slot})
+
+    def repair(self, operation: str, company_id=None, rfp_id=None, attempts: int = RFP_STRUCTURE_REPAIR_ATTEMPTS):
+        for _ in range(attempts):
+            if not self.broken:
+                return
+            broken, self.broken = self.broken, []
+            print(f"Re-prompting {len(broken)} malformed structure fragments")
+            try:
+                response = complete_sync(repair_prompt(broken), operation, route="fast",
+                                         company_id=company_id, rfp_id=rfp_id)
+                match = re.search(r"\[.*\]", response.text, re.DOTALL)
+                repaired = json.loads(match.group(0)) if match else []
+            except Exception as e:
+                print(f"Structure repair failed: {e}")
+                repaired = []
+            for index, entry in enumerate(broken):
+                candidate = repaired[index] if isinstance(repaired, list) and index < len(repaired) else None
+                item, error = validate_fragment(entry["kind"], candidate) if candidate is not None else (None, "not repaired")
+                if item is not None:
+                    self._accept(entry["kind"], item, entry["slot"])
+                else:
+                    self.broken.append({**entry, "error": error})
+        for entry in self.broken:
+            print(f"Dropping malformed {entry['kind']} fragment: {entry['error']}")
+
+    def structure(self) -> dict:
+        structure = {"metadata": self.metadata or {}}
+        for kind in LIST_KEYS:
+            structure[kind] = [item for item in self.slots[kind] if item is not None]
+        return structure
+
+
+def stream_structure(prompt: str, operation: str, company_id=None, rfp_id=None,
+                     on_item: Callable[[str, dict], None] = None, fallback: Callable[[str], dict] = None) -> dict:
+    """Run one extraction call with streaming, validating each item as it completes.
+
+    Malformed items are re-prompted on their own instead of repeating the
+    whole extraction. If the response holds no recognisable structure at
+    all, `fallback(full_text)` decides (it may parse it another way or raise).
+    """
+    parser = StructureStreamParser()
+    assembler = StructureAssembler(on_item)
+    stream = stream_sync(prompt, operation, route="long", company_id=company_id, rfp_id=rfp_id)
+    for text in stream:
+        if not text.startswith(parser.text):
+            # A retried or failed-over attempt started the response again
+            parser.reset()
+            assembler.reset()
+        for kind, fragment in parser.feed(text):
+            assembler.add(kind, fragment)
+    for kind, fragment in parser.finish():
+        assembler.add(kind, fragment)
+    if not assembler.fragments and fallback is not None:
+        return fallback(stream.result.text)
+    assembler.repair(f"{operation}_repair", company_id, rfp_id)
+    return assembler.structure()
@@ -36,29 +36,11 @@
 #     description="Useful for answering questions about company-related topics."
 # )
 import os
-# from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import PGVector
-from langchain.chains import RetrievalQA
 from langchain.tools import Tool
-from langchain_groq import ChatGroq
 from langchain_core.documents import Document
-from dotenv import load_dotenv
-
-load_dotenv()
-raw_url = os.getenv("VECTOR_DATABASE_URL")
-if not raw_url:
-    raise ValueError("DATABASE_URL environment variable is not set")
-PGVECTOR_CONNECTION_STRING = raw_url.replace("postgresql://", "postgresql+psycopg2://", 1)
-
-# Load embeddings
-embeddings = HuggingFaceEmbeddings(model_name='all-MiniLM-L6-v2')
-
-# LLM (Groq + LLaMA 3)
-llm = ChatGroq(
-    model="llama-3.3-70b-versatile",
-    groq_api_key = "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"
-)
+from methods.resources import get_vectorstore
+from methods.metrics import stage_timer
+from methods.deadline import check_deadline
 
 # def get_company_qa_tool(company_id: int) -> Tool:
 #     """Create a Tool that queries company-specific documents from PGVector."""
@@ -81,16 +63,17 @@ llm = ChatGroq(
 #         func=company_qa.run,
 #         description=f"Answer queries using only documents from company_id={company_id}."
 #     )
+def get_company_retriever(company_id: int, k: int = 4):
+    """Retriever over the company_docs collection restricted to one company."""
+    return get_vectorstore().as_retriever(search_kwargs={"k": k, "filter": {"company_id": company_id}})
+
 def get_company_qa_tool(company_id: int):
-    vectorstore = PGVector(
-        collection_name="company_docs",
-        connection_string=PGVECTOR_CONNECTION_STRING,
-        embedding_function=embeddings
-    )
-    retriever = vectorstore.as_retriever(search_kwargs={"filter": {"company_id": company_id}})
+    retriever = get_company_retriever(company_id)
     # Use invoke instead of get_relevant_documents (per deprecation warning)
     def company_doc_query(query: str):
-        docs = retriever.invoke(query)
+        check_deadline("retrieve")
+        with stage_timer("retrieve", company_id):
+            docs = retriever.invoke(query)
         if not docs:
             return "No relevant company documentation found."
         # Return the most relevant doc's content (or concatenate top N)
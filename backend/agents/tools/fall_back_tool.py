@@ -1,10 +1,14 @@
 from langchain.tools import Tool
-import google.generativeai as genai
+from agents.llm_gateway import complete_sync
 
-llm = genai.GenerativeModel("gemini-1.5-flash")
 
-FallbackLLMTool = Tool(
-    name="FallbackLLMTool",
-    func=lambda q: llm.generate_content(q).text,
-    description="Use this if no tools return useful information. It generates an answer using LLM's general reasoning  make it neat and clear according to the company document there are some stars in side the result avoid that start if giving the timeline and cost give it in table format."
-)
\ No newline at end of file
+def make_fallback_tool(company_id=None, rfp_id=None):
+    """FallbackLLMTool whose calls are accounted to one company and RFP."""
+    return Tool(
+        name="FallbackLLMTool",
+        func=lambda q: complete_sync(q, "fallback_tool", route="long", company_id=company_id, rfp_id=rfp_id).text,
+        description="Use this if no tools return useful information. It generates an answer using LLM's general reasoning  make it neat and clear according to the company document there are some stars in side the result avoid that start if giving the timeline and cost give it in table format."
+    )
+
+
+FallbackLLMTool = make_fallback_tool()
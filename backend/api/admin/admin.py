@@ -10,15 +10,16 @@ from pydantic import BaseModel, RootModel
 from typing import Dict, List
 from sqlalchemy.exc import SQLAlchemyError
 from methods.functions import extract_text_from_docx,extract_text_from_excel,extract_text_from_pdf_bytes
+from methods.answer_cache import bump_corpus_version
 import datetime 
 import json
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, UploadFile, File, Form
-# from langchain.embeddings import HuggingFaceEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.vectorstores.pgvector import PGVector
 from langchain_core.documents import Document
+from methods.resources import get_vectorstore
+from methods.executor import cpu_pool
+import asyncio
 
 
 load_dotenv()
@@ -213,41 +214,30 @@ async def remove_rfp(
     db.commit()
     return {"message": f"RFP {rfp_id} deleted and unassigned from all employees."}
 
-load_dotenv()
-embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-raw_url = os.getenv("VECTOR_DATABASE_URL")
-if not raw_url:
-    raise RuntimeError("DATABASE_URL environment variable is not set. Please set it in your .env file or environment.")
-PGVECTOR_CONNECTION_STRING = raw_url.replace("postgresql://", "postgresql+psycopg2://", 1)
-
-vectorstore = PGVector(
-    collection_name="company_docs",
-    connection_string=PGVECTOR_CONNECTION_STRING,
-    embedding_function=embedding_model,
-)
-
 
 @router.post("/add-document/")
-async def add_document(company_id: int = Form(...), file: UploadFile = File(...)):
+async def add_document(company_id: int = Form(...), file: UploadFile = File(...), db: Session = Depends(get_db)):
     file_bytes = await file.read()
     filename = file.filename.lower()
 
     if filename.endswith(".pdf"):
-        text = extract_text_from_pdf_bytes(file_bytes)
+        extractor = extract_text_from_pdf_bytes
     elif filename.endswith(".docx"):
-        text = extract_text_from_docx(file_bytes)
+        extractor = extract_text_from_docx
     elif filename.endswith(".xlsx"):
-        text = extract_text_from_excel(file_bytes)
+        extractor = extract_text_from_excel
     else:
         return {"error": "Unsupported file type. Use .pdf, .docx or .xlsx"}
+    text = await cpu_pool.run(extractor, file_bytes)
 
     if not text.strip():
         return {"error": "No extractable text found in the document."}
 
     print("vectorizing")
     doc = Document(page_content=text, metadata={"company_id": company_id})
-    vectorstore.add_documents([doc])
+    await asyncio.to_thread(get_vectorstore().add_documents, [doc])
+    # New documents can change answers, so cached generated answers go stale
+    bump_corpus_version(db, company_id)
     print(doc)
     return {
         "message": f"{filename} embedded for company {company_id}",
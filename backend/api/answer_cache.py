@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Optional
+from methods.functions import Depends, Session, get_db
+from methods.answer_cache import get_corpus_version, lookup_answer, store_answer
+from models.schema import AnswerCache
+
+router = APIRouter(prefix="/api", tags=["AnswerCache"])
+
+
+class CacheLookup(BaseModel):
+    company_id: int
+    question: str
+
+
+class CacheEdit(BaseModel):
+    company_id: int
+    question: str
+    answer: str
+    employee_id: int
+
+
+@router.post("/answer-cache/lookup")
+def answer_cache_lookup(payload: CacheLookup, db: Session = Depends(get_db)):
+    """Return the company's cached answer to a near-identical question, if any."""
+    corpus_version = get_corpus_version(db, payload.company_id)
+    cached = lookup_answer(db, payload.company_id, payload.question, corpus_version)
+    return {"cached": cached is not None, "result": cached}
+
+
+@router.post("/answer-cache/edit")
+def answer_cache_edit(payload: CacheEdit, db: Session = Depends(get_db)):
+    """Store an employee-edited answer; it is preferred over regenerated ones."""
+    corpus_version = get_corpus_version(db, payload.company_id)
+    entry = store_answer(
+        db, payload.company_id, payload.question, payload.answer,
+        corpus_version, employee_id=payload.employee_id,
+    )
+    return {"message": "Answer saved to cache.", "cache_id": entry.id}
+
+
+@router.delete("/answer-cache/{cache_id}")
+def answer_cache_delete(cache_id: int, company_id: int, db: Session = Depends(get_db)):
+    """Delete one of the company's cache entries; other companies' entries are reported as not found."""
+    entry = (
+        db.query(AnswerCache)
+        .filter(AnswerCache.id == cache_id, AnswerCache.company_id == company_id)
+        .first()
+    )
+    if not entry:
+        raise HTTPException(status_code=404, detail="Cache entry not found")
+    db.delete(entry)
+    db.commit()
+    return {"message": f"Cache entry {cache_id} deleted."}
@@ -2,6 +2,9 @@
 from models.schema import User, UserRole, UserCreate, UserResponse, RFP, Employee, EmployeeCreate, Company
 from methods.functions import get_db, require_role, get_password_hash
 from methods.functions import Session
+from methods.executor import cpu_pool
+from methods.context_store import get_context_store
+from methods.metrics import observe_stage
 from fastapi import HTTPException, Depends, Form
 from fastapi import APIRouter
 from typing import List, Optional
@@ -10,14 +13,14 @@ from fastapi import status, Request
 from datetime import datetime
 import json
 from pydantic import BaseModel
-import google.generativeai as genai
+from agents.llm_gateway import complete_sync
+from methods.tracing import set_attributes
 
 router = APIRouter(prefix="/api", tags=["Employee"])
 
-# In-memory dictionary to store current_rfp_id for each employee
-# {employee_id: rfp_id}
-current_rfp_ids_in_memory: dict[int, int] = {}
-current_rfp_context_in_memory: dict[int, dict] = {} # {employee_id: {rfp_id, company_id, filename, file_url}}
+# Current RFP each employee is working on, shared across server workers
+# {employee_id: {rfp_id, company_id, filename, file_url}}
+current_rfp_store = get_context_store("current_rfp")
 
 
 class AssignedRFPResponse(BaseModel):
@@ -71,10 +74,23 @@ def set_current_rfp(
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    # Store in the in-memory variable
-    current_rfp_ids_in_memory[employee_id] = rfp_id
-    print(f"Stored in memory: Employee {employee_id} -> RFP {rfp_id}")
-    return {"message": "Current RFP ID set successfully (in-memory)", "current_rfp_id": rfp_id}
+    rfp = db.query(RFP).filter(RFP.id == rfp_id).first()
+    current_rfp_store.set(employee_id, {
+        "rfp_id": rfp_id,
+        "company_id": rfp.company_id if rfp else employee.company_id,
+        "filename": rfp.filename if rfp else None,
+        "file_url": rfp.file_url if rfp else None,
+    })
+    print(f"Stored current RFP: Employee {employee_id} -> RFP {rfp_id}")
+    return {"message": "Current RFP ID set successfully", "current_rfp_id": rfp_id}
+
+
+@router.get('/current_rfp/{employee_id}')
+def get_current_rfp(employee_id: int):
+    context = current_rfp_store.get(employee_id)
+    if not context:
+        raise HTTPException(status_code=404, detail="No current RFP set for this employee")
+    return {"current_rfp_id": context["rfp_id"], "context": context}
 
 
 @router.get("/employee/completed_rfps/{employee_id}")
@@ -136,11 +152,13 @@ def final_rfp(
     db: Session = Depends(get_db)
 ):
 
-    llm = genai.GenerativeModel("gemini-1.5-flash")
-    prompt = llm.generate_content(
+    prompt = complete_sync(
         f"""
         I have a document which contains the text "{text}". I want you to apply the following {changes} to each relevant part of the data. Modify the content accordingly and return the final output in the correct order, preserving structure and formatting. Apply only the changes mentioned—do not invent or omit anything.
-        """
+        """,
+        "employee_final_rfp",
+        route="long",
+        priority="interactive",
     )
     
     print(prompt.text)
@@ -183,7 +201,7 @@ def ok(
     print(rfp)
     if not rfp: # Added check for RFP
         raise HTTPException(status_code=404, detail="RFP not found")
-    
+    set_attributes(rfp_id=rfp.id, company_id=rfp.company_id)
     
     company = db.query(Company).filter(Company.id==rfp.company_id).first()
     print(company.subdomain)
@@ -192,10 +210,13 @@ def ok(
     subdomain = company.subdomain
     # Generate Word and PDF documents from proposal
     print("hi")
-    file_paths = generate_and_upload_proposal(company.id, {
+    # DOCX/PDF building is CPU-bound, so it runs in the process pool
+    file_paths = cpu_pool.run_sync(generate_and_upload_proposal, company.id, {
         "title": "RFP Response",
         "final_proposal": text
     },subdomain)
+    for stage, seconds in file_paths.pop("timings", {}).items():
+        observe_stage(stage, seconds, company.id)
     
     docx_url = file_paths.get("docx_url")
     pdf_url = file_paths.get("pdf_url")
@@ -223,14 +244,10 @@ def ok(
     return file_paths
     
 
-def generate_and_upload_proposal(company_id, responses, subdomain):
+def build_proposal_document(responses):
+    """Render the proposal markdown in responses["final_proposal"] into a python-docx Document"""
     from docx import Document
     from docx.shared import Pt
-    from docx2pdf import convert
-    import tempfile
-    import os
-    import uuid
-    import boto3
     from datetime import datetime
     import re
 
@@ -302,6 +319,25 @@ def generate_and_upload_proposal(company_id, responses, subdomain):
     while doc.paragraphs and not doc.paragraphs[0].text.strip():
         doc.paragraphs[0]._element.getparent().remove(doc.paragraphs[0]._element)
 
+    return doc
+
+
+def generate_and_upload_proposal(company_id, responses, subdomain):
+    from docx2pdf import convert
+    import tempfile
+    import os
+    import uuid
+    import boto3
+    from datetime import datetime
+
+    import time
+
+    # Stage timings travel back in the result: metrics recorded in a pool worker never reach /metrics
+    timings = {}
+    started = time.perf_counter()
+    doc = build_proposal_document(responses)
+    title = responses.get("title", "RFP Response")
+
     # Save to temp paths
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     filename_base = f"{title.replace(' ', '_')}_{timestamp}"
@@ -319,6 +355,7 @@ def generate_and_upload_proposal(company_id, responses, subdomain):
                 "status": "error",
                 "message": f"PDF conversion failed: {e}"
             }
+        timings["render"] = time.perf_counter() - started
 
         # AWS S3 Upload
         AWS_ACCESS_KEY_ID = os.getenv("ACCESS_KEY_AWS")
@@ -336,6 +373,7 @@ def generate_and_upload_proposal(company_id, responses, subdomain):
         docx_key = f"proposals/{unique_id}.{subdomain}.docx"
         pdf_key = f"proposals/{unique_id}.{subdomain}.pdf"
 
+        started = time.perf_counter()
         try:
             with open(docx_path, "rb") as docx_file:
                 s3.upload_fileobj(
@@ -357,8 +395,10 @@ def generate_and_upload_proposal(company_id, responses, subdomain):
         except Exception as e:
             return {
                 "status": "error",
-                "message": f"Failed to upload to S3: {e}"
+                "message": f"Failed to upload to S3: {e}",
+                "timings": timings,
             }
+        timings["s3_upload"] = time.perf_counter() - started
 
         docx_url = f"https://{BUCKET_NAME}.s3.amazonaws.com/{docx_key}"
         pdf_url = f"https://{BUCKET_NAME}.s3.amazonaws.com/{pdf_key}"
@@ -366,7 +406,8 @@ def generate_and_upload_proposal(company_id, responses, subdomain):
     return {
         "status": "success",
         "docx_url": docx_url,
-        "pdf_url": pdf_url
+        "pdf_url": pdf_url,
+        "timings": timings,
     }
 
 @router.get("/employee/rfps/{rfp_id}/response")
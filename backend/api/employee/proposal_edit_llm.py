@@ -2,16 +2,17 @@ import requests
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from models.schema import RFP, Employee, Company
-from methods.functions import get_db
-from langchain_groq import ChatGroq
+from methods.functions import get_db, extract_text_with_pdfreader, extract_text_from_docx
+from methods.executor import cpu_pool
+import asyncio
 from langchain.agents import initialize_agent, AgentType
 from agents.tools.company_doc_tool import get_company_qa_tool
 from agents.tools.fall_back_tool import FallbackLLMTool
 import os
 from PyPDF2 import PdfReader
 from io import BytesIO
-from google.generativeai import GenerativeModel
-import google.generativeai as genai
+from agents.llm_gateway import complete
+from methods.tracing import set_attributes
 
 router = APIRouter(prefix="/api", tags=["EmployeeProposalEdit"])
 
@@ -26,9 +27,9 @@ def extract_pdf_text(
     try:
         response = requests.get(rfp.pdf_url)
         response.raise_for_status()
-        pdf_bytes = BytesIO(response.content)
-        reader = PdfReader(pdf_bytes)
-        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        text = cpu_pool.run_sync(extract_text_with_pdfreader, response.content)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to extract PDF text: {str(e)}")
     return {"text": text}
@@ -44,26 +45,24 @@ def extract_file_text(
     if not rfp or (not rfp.pdf_url and not rfp.docx_url):
         print(f"[extract-file-text] RFP not found or missing file url. RFP: {rfp}")
         raise HTTPException(status_code=404, detail="RFP or file not found.")
+    set_attributes(rfp_id=rfp_id, company_id=rfp.company_id)
     try:
         print(f"[extract-file-text] RFP: {rfp}")
         if rfp.pdf_url:
             print(f"[extract-file-text] Trying PDF url: {rfp.pdf_url}")
             response = requests.get(rfp.pdf_url)
             response.raise_for_status()
-            pdf_bytes = BytesIO(response.content)
-            reader = PdfReader(pdf_bytes)
-            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+            text = cpu_pool.run_sync(extract_text_with_pdfreader, response.content)
         elif rfp.docx_url:
-            import docx
             print(f"[extract-file-text] Trying DOCX url: {rfp.docx_url}")
             response = requests.get(rfp.docx_url)
             response.raise_for_status()
-            docx_bytes = BytesIO(response.content)
-            doc = docx.Document(docx_bytes)
-            text = "\n".join([p.text for p in doc.paragraphs])
+            text = cpu_pool.run_sync(extract_text_from_docx, response.content)
         else:
             print("[extract-file-text] No file url present on RFP.")
             text = ""
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[extract-file-text] Exception: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to extract file text: {str(e)}")
@@ -88,31 +87,30 @@ async def employee_custom_prompt_edit(
         print(f"[custom-prompt-edit] RFP: {rfp}")
         if rfp.pdf_url:
             print(f"[custom-prompt-edit] Trying PDF url: {rfp.pdf_url}")
-            response = requests.get(rfp.pdf_url)
+            response = await asyncio.to_thread(requests.get, rfp.pdf_url)
             response.raise_for_status()
-            pdf_bytes = BytesIO(response.content)
-            reader = PdfReader(pdf_bytes)
-            file_text = "\n".join(page.extract_text() or "" for page in reader.pages)
+            file_text = await cpu_pool.run(extract_text_with_pdfreader, response.content)
         elif rfp.docx_url:
-            import docx
             print(f"[custom-prompt-edit] Trying DOCX url: {rfp.docx_url}")
-            response = requests.get(rfp.docx_url)
+            response = await asyncio.to_thread(requests.get, rfp.docx_url)
             response.raise_for_status()
-            docx_bytes = BytesIO(response.content)
-            doc = docx.Document(docx_bytes)
-            file_text = "\n".join([p.text for p in doc.paragraphs])
+            file_text = await cpu_pool.run(extract_text_from_docx, response.content)
         else:
             print("[custom-prompt-edit] No file url present on RFP.")
             file_text = ""
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[custom-prompt-edit] Exception during extraction: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to extract file text: {str(e)}")
     # LLM prompt
     try:
-        model = GenerativeModel("gemini-1.5-flash")
         full_prompt = f"File Content:\n{file_text}\n\nInstruction: {prompt}"
-        response = model.generate_content(full_prompt)
-        result = response.text if hasattr(response, 'text') else str(response)
+        response = await complete(
+            full_prompt, "custom_prompt_edit", route="long", priority="interactive",
+            company_id=rfp.company_id, rfp_id=rfp_id,
+        )
+        result = response.text
     except Exception as e:
         print(f"[custom-prompt-edit] Exception during LLM: {str(e)}")
         result = f"Error: {str(e)}"
@@ -133,11 +131,15 @@ async def employee_final_proposal(rfp_id: int, request: Request, db: Session = D
         if not rfp:
             raise HTTPException(status_code=404, detail="RFP not found.")
         # Optionally, you can add more context from the RFP or employee here
-        llm = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = llm.generate_content(
+        prompt = await complete(
             f"""
             You are an expert proposal writer. Refine and finalize the following proposal draft into a professional, cohesive document suitable for submission. Format with appropriate sections, summary, and conclusion. Return the result in Markdown format.\n\nProposal Draft:\n{proposal_text}
-            """
+            """,
+            "employee_final_proposal",
+            route="long",
+            priority="interactive",
+            company_id=rfp.company_id,
+            rfp_id=rfp_id,
         )
         final_proposal_markdown = prompt.text
         return {"result": final_proposal_markdown}
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, FastAPI, Request, HTTPException
-import google.generativeai as genai
+from agents.llm_gateway import complete_sync
+from methods.tracing import set_attributes
 from docx import Document
 from datetime import datetime
 import os
@@ -32,8 +33,8 @@ def going_to_edit(rfp_data: dict,
     employee_id = rfp_data.get("employee_id")
     print("id apro")
     print(employee_id)
-    llm = genai.GenerativeModel("gemini-1.5-flash")
-    prompt = llm.generate_content(
+    set_attributes(rfp_id=rfp_id, company_id=company_id)
+    prompt = complete_sync(
         f"""
         You are an expert proposal writer. Compile the following question responses into a cohesive, professional
         proposal document that addresses the original RFP requirements.
@@ -44,7 +45,12 @@ def going_to_edit(rfp_data: dict,
         The final proposal should be in Markdown format with appropriate headings, bullet points, and formatting.
 
         rfp_data: {rfp_data}
-        """
+        """,
+        "going_to_edit",
+        route="long",
+        priority="interactive",
+        company_id=company_id,
+        rfp_id=rfp_id,
     )
     print("inga iruke")
     final_proposal_markdown = prompt.text
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, HTTPException, Body, Request
+from typing import Optional
+from methods.functions import Depends, Session, get_db
+from methods.generation_jobs import create_job, assemble_job_output, is_stale
+from agents.generation import generation_options
+from models.schema import GenerationJob
+from methods.responses import fast_json_response
+from methods.rfp_structure import load_structured_data
+
+router = APIRouter(prefix="/api", tags=["RFP"])
+
+
+def job_status(job: GenerationJob) -> dict:
+    return {
+        "job_id": job.id,
+        "rfp_id": job.rfp_id,
+        "status": job.status,
+        "completed_items": job.completed_items,
+        "total_items": job.total_items,
+        "attempts": job.attempts,
+        "error": job.error,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+def get_job_or_404(job_id: int, db: Session) -> GenerationJob:
+    job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
+
+
+@router.post("/generation-jobs", response_model=dict)
+def create_generation_job(json_data: dict = Body(...), db: Session = Depends(get_db)):
+    """Queue a durable /generate-response run; a generation worker picks it up."""
+    structured_data = load_structured_data(db, json_data)
+    try:
+        job = create_job(db, structured_data, generation_options(json_data))
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing field in structured_data: {str(e)}")
+    return job_status(job)
+
+
+@router.get("/generation-jobs/{job_id}/status", response_model=dict)
+def get_generation_job_status(job_id: int, db: Session = Depends(get_db)):
+    return job_status(get_job_or_404(job_id, db))
+
+
+@router.get("/generation-jobs/{job_id}", response_model=dict)
+def get_generation_job(request: Request, job_id: int, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    """Status plus the answers completed so far, in the /generate-response format."""
+    job = get_job_or_404(job_id, db)
+    return fast_json_response(request, {**job_status(job), "result": assemble_job_output(db, job)}, fields)
+
+
+@router.post("/generation-jobs/{job_id}/resume", response_model=dict)
+def resume_generation_job(job_id: int, db: Session = Depends(get_db)):
+    """Requeue a failed (or stale running) job; items already checkpointed are not generated again."""
+    job = get_job_or_404(job_id, db)
+    if job.status == "completed":
+        raise HTTPException(status_code=409, detail="Generation job already completed")
+    if job.status == "running" and not is_stale(job):
+        raise HTTPException(status_code=409, detail="Generation job is already running")
+    job.status = "queued"
+    job.attempts = 0
+    job.error = None
+    db.commit()
+    db.refresh(job)
+    return job_status(job)
+
+
+@router.get("/generation-jobs", response_model=dict)
+def list_generation_jobs(rfp_id: int, db: Session = Depends(get_db)):
+    jobs = (
+        db.query(GenerationJob)
+        .filter(GenerationJob.rfp_id == rfp_id)
+        .order_by(GenerationJob.created_at.desc())
+        .all()
+    )
+    return {"jobs": [job_status(job) for job in jobs]}
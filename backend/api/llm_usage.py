@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import func
+from methods.functions import Depends, Session, get_db
+from methods.llm_usage import rollup_recent
+from models.schema import LLMUsageDaily
+
+router = APIRouter(prefix="/api", tags=["LLMUsage"])
+
+GROUP_COLUMNS = {
+    "day": LLMUsageDaily.day,
+    "company_id": LLMUsageDaily.company_id,
+    "rfp_id": LLMUsageDaily.rfp_id,
+    "provider": LLMUsageDaily.provider,
+    "model": LLMUsageDaily.model,
+    "operation": LLMUsageDaily.operation,
+}
+
+
+@router.get("/admin/llm-usage")
+def llm_usage(
+    company_id: Optional[int] = None,
+    rfp_id: Optional[int] = None,
+    days: int = 30,
+    group_by: str = "operation",
+    limit: int = 50,
+    db: Session = Depends(get_db),
+):
+    """Token, latency and call totals from the daily rollup, costliest groups first.
+
+    `group_by` is a comma-separated subset of day, company_id, rfp_id,
+    provider, model and operation. Read-only: the rollup is refreshed by
+    POST /admin/llm-usage/rollup (e.g. from a cron), so today's figures are
+    as recent as its last run.
+    """
+    keys = [key.strip() for key in group_by.split(",") if key.strip()]
+    unknown = [key for key in keys if key not in GROUP_COLUMNS]
+    if unknown or not keys:
+        raise HTTPException(status_code=400, detail=f"group_by must use: {', '.join(GROUP_COLUMNS)}")
+
+    columns = [GROUP_COLUMNS[key] for key in keys]
+    total_tokens = func.sum(LLMUsageDaily.prompt_tokens + LLMUsageDaily.completion_tokens)
+    query = (
+        db.query(
+            *columns,
+            func.sum(LLMUsageDaily.calls),
+            func.sum(LLMUsageDaily.errors),
+            func.sum(LLMUsageDaily.cache_hits),
+            func.sum(LLMUsageDaily.retries),
+            func.sum(LLMUsageDaily.prompt_tokens),
+            func.sum(LLMUsageDaily.completion_tokens),
+            total_tokens,
+            func.sum(LLMUsageDaily.total_latency_ms),
+            func.max(LLMUsageDaily.max_latency_ms),
+        )
+        .filter(LLMUsageDaily.day >= datetime.utcnow() - timedelta(days=days))
+    )
+    if company_id is not None:
+        query = query.filter(LLMUsageDaily.company_id == company_id)
+    if rfp_id is not None:
+        query = query.filter(LLMUsageDaily.rfp_id == rfp_id)
+    rows = query.group_by(*columns).order_by(total_tokens.desc()).limit(limit).all()
+
+    results = []
+    for row in rows:
+        calls, errors, cache_hits, retries, prompt, completion, total, latency, max_latency = row[len(keys):]
+        llm_calls = (calls or 0) - (cache_hits or 0)
+        results.append({
+            **dict(zip(keys, row[:len(keys)])),
+            "calls": calls or 0,
+            "errors": errors or 0,
+            "cache_hits": cache_hits or 0,
+            "retries": retries or 0,
+            "prompt_tokens": prompt or 0,
+            "completion_tokens": completion or 0,
+            "total_tokens": total or 0,
+            "avg_latency_ms": round((latency or 0) / llm_calls, 1) if llm_calls else 0,
+            "max_latency_ms": max_latency or 0,
+        })
+    return {"group_by": keys, "days": days, "results": results}
+
+
+@router.post("/admin/llm-usage/rollup")
+def llm_usage_rollup(days: int = 7, db: Session = Depends(get_db)):
+    """Recompute the daily rollup for the last `days` days (e.g. from a nightly cron)."""
+    rollup_recent(db, days=days)
+    return {"message": "LLM usage rolled up.", "days": days}
@@ -1,15 +1,26 @@
-from fastapi import FastAPI, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Form, Request
 import uuid
 import shutil
 import os
 from fastapi import UploadFile, File
-from agents.extract_rfp_structure import extract_rfp_structure
+from agents.extract_rfp_structure import load_rfp_text, extract_rfp_structure_from_text, emit_structure
 from pydantic_models.datatypes import RFP_STORE
 from fastapi import APIRouter
 import tempfile
 import requests
 from pydantic import BaseModel
-from methods.functions import Session,Depends,get_db,require_role1
+from fastapi.responses import StreamingResponse
+from methods.functions import Session,Depends,get_db,require_role1,SessionLocal
+from methods.executor import cpu_pool
+from methods.responses import fast_json_response
+from methods.metrics import stage_timer
+from methods.tracing import set_attributes
+from methods.rfp_structure import (
+    current_structure, find_structure_by_hash, path_sha256, store_structure, structure_payload,
+)
+from api.response_for_each import sse_event
+from typing import Optional
+import asyncio
 
 from models.schema import RFP,User,UserRole,Employee
 
@@ -17,63 +28,151 @@ router = APIRouter(prefix="/api", tags=["RFP"])
 
 class temp(BaseModel):
     file_name:str
+
+
+def download_to_temp_file(file_url):
+    """Stream a remote file to a named temp file and return its path."""
+    response = requests.get(file_url, stream=True)
+    if response.status_code != 200:
+        raise HTTPException(status_code=400, detail="Failed to download file from URL")
+    file_extension = os.path.splitext(file_url)[1] or ".tmp"
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
+    for chunk in response.iter_content(chunk_size=8192):
+        temp_file.write(chunk)
+    temp_file.close()
+    return temp_file.name
     
-@router.post("/upload-rfp/", response_model=dict)
-async def upload_rfp(
-    file_name: str = Form(...),
-    current_user: Employee = Depends(require_role1([UserRole.EMPLOYEE])),
-    db: Session = Depends(get_db)
-):
-    rfp = db.query(RFP).filter(RFP.filename==file_name).first()
-    file_url = rfp.file_url
-    rfp_id = rfp.id
+async def structure_rfp(rfp: RFP, db: Session, refresh: bool = False, on_item=None) -> bool:
+    """Make sure rfp.structured_data is current, extracting only when needed; True if nothing was extracted.
+
+    Stored structures and those of an identical file the company already
+    processed are reused unless `refresh`. `on_item` sees every item (see
+    extract_rfp_structure_from_text).
+    """
     company_id = rfp.company_id
-    
+    if not refresh:
+        if current_structure(rfp) is not None:
+            emit_structure(rfp.structured_data, on_item)
+            return True
+        same_file = find_structure_by_hash(db, company_id, rfp.file_hash)
+        if same_file is not None:
+            store_structure(db, rfp, rfp.file_hash, same_file)
+            emit_structure(same_file, on_item)
+            return True
+
+    if not rfp.file_url:
+        raise HTTPException(status_code=400, detail="No file or file_url provided")
+    file_path = None
     try:
-        if file_url:
-            # Download from S3 or HTTP(S) URL
-            response = requests.get(file_url, stream=True)
-            if response.status_code != 200:
-                raise HTTPException(status_code=400, detail="Failed to download file from URL")
-            file_extension = os.path.splitext(file_url)[1] or ".tmp"
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
-            for chunk in response.iter_content(chunk_size=8192):
-                temp_file.write(chunk)
-            temp_file.close()
-            file_path = temp_file.name
-        # elif file:
-        #     file_extension = os.path.splitext(file.filename)[1]
-        #     temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
-        #     shutil.copyfileobj(file.file, temp_file)
-        #     temp_file.close()
-        #     file_path = temp_file.name
-        #     print("santhosh2")
-        else:
-            raise HTTPException(status_code=400, detail="No file or file_url provided")
+        # Download from S3 or HTTP(S) URL
+        with stage_timer("download", company_id):
+            file_path = await asyncio.to_thread(download_to_temp_file, rfp.file_url)
 
-        print("santhosh3")
-        
-        structured_data = extract_rfp_structure(file_path)
-        
-        
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
-        
-        structured_data["company_id"] = company_id
-        structured_data["employee_id"] = current_user.id
-        structured_data["rfp_id"] = rfp_id
-        print(structured_data)
-        return {
-            "message": "RFP uploaded and processed successfully",
-            "structured_data": structured_data
-        }
+        # RFPs uploaded before file hashes were recorded
+        file_hash = rfp.file_hash or await asyncio.to_thread(path_sha256, file_path)
+        same_file = None if refresh or rfp.file_hash else find_structure_by_hash(db, company_id, file_hash)
+        if same_file is not None:
+            structured_data = emit_structure(same_file, on_item)
+        else:
+            # Parsing is CPU-bound: run it in the process pool, keep the LLM call off the event loop
+            with stage_timer("extract", company_id):
+                rfp_text = await cpu_pool.run(load_rfp_text, file_path)
+            with stage_timer("structure_llm", company_id):
+                structured_data = await asyncio.to_thread(
+                    extract_rfp_structure_from_text, rfp_text, company_id, rfp.id, on_item
+                )
+        store_structure(db, rfp, file_hash, structured_data)
+        return same_file is not None
+    except HTTPException:
+        raise
     except Exception as e:
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
         raise HTTPException(status_code=500, detail=f"Error processing RFP: {str(e)}")
     finally:
-        if temp_file:
+        if file_path and os.path.exists(file_path):
             try:
-                os.remove(temp_file.name)
+                os.remove(file_path)
             except Exception:
-                pass
\ No newline at end of file
+                pass
+
+
+def get_rfp_or_404(db: Session, file_name: str) -> RFP:
+    rfp = db.query(RFP).filter(RFP.filename==file_name).first()
+    if not rfp:
+        raise HTTPException(status_code=404, detail="RFP not found")
+    return rfp
+
+
+def upload_payload(rfp: RFP, employee_id, cached: bool) -> dict:
+    return {
+        "message": "RFP uploaded and processed successfully",
+        "cached": cached,
+        "structured_data": structure_payload(rfp, employee_id)
+    }
+
+
+@router.post("/upload-rfp/", response_model=dict)
+async def upload_rfp(
+    request: Request,
+    file_name: str = Form(...),
+    fields: Optional[str] = None,
+    refresh: bool = False,
+    current_user: Employee = Depends(require_role1([UserRole.EMPLOYEE])),
+    db: Session = Depends(get_db)
+):
+    """Structure of an uploaded RFP, extracted once per file and extractor version and stored on the RFP.
+
+    Repeat calls, and RFPs whose file is identical to one the company
+    already processed, are answered from the database; `refresh=true`
+    extracts again.
+    """
+    rfp = get_rfp_or_404(db, file_name)
+    set_attributes(rfp_id=rfp.id, company_id=rfp.company_id)
+    cached = await structure_rfp(rfp, db, refresh)
+    # `fields=id,text` trims every section/question/requirement to those keys
+    return fast_json_response(request, upload_payload(rfp, current_user.id, cached), fields)
+
+
+@router.post("/upload-rfp/stream")
+async def upload_rfp_stream(
+    file_name: str = Form(...),
+    refresh: bool = False,
+    current_user: Employee = Depends(require_role1([UserRole.EMPLOYEE])),
+    db: Session = Depends(get_db)
+):
+    """Server-sent-events variant of /upload-rfp/.
+
+    Emits `metadata`, `section`, `question` and `requirement` events as the
+    extraction produces them (a `reset` event voids the ones sent before),
+    then a `summary` event with the /upload-rfp/ payload. Failures end the
+    stream with an `error` event.
+    """
+    rfp_id = get_rfp_or_404(db, file_name).id
+    employee_id = current_user.id
+
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def on_item(kind, item):
+            loop.call_soon_threadsafe(events.put_nowait, (kind, item))
+
+        # The request's session is closed once streaming starts
+        with SessionLocal() as stream_db:
+            rfp = stream_db.query(RFP).filter(RFP.id == rfp_id).first()
+            set_attributes(rfp_id=rfp.id, company_id=rfp.company_id)
+            task = asyncio.ensure_future(structure_rfp(rfp, stream_db, refresh, on_item))
+            task.add_done_callback(lambda _: loop.call_soon(events.put_nowait, None))
+            while (event := await events.get()) is not None:
+                yield sse_event(*event)
+            try:
+                yield sse_event("summary", upload_payload(rfp, employee_id, task.result()))
+            except HTTPException as e:
+                yield sse_event("error", {"detail": e.detail})
+            except Exception as e:
+                yield sse_event("error", {"detail": f"Error processing RFP: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -18,6 +18,8 @@ from models.schema import (
     SubscriptionStatus, OrderRequest
 )
 from methods.functions import get_password_hash, get_db
+from methods.tracing import set_attributes
+from methods.rfp_structure import file_sha256
 import boto3
 import uuid
 import datetime
@@ -86,6 +88,8 @@ async def upload_file(
     )
 
     unique_filename = f"{uuid.uuid4()}.{subdomain + file.filename}"
+    # Lets /api/upload-rfp/ reuse the structure of an identical file uploaded before
+    file_hash = file_sha256(file.file)
     
     # Upload to S3
     s3.upload_fileobj(
@@ -106,10 +110,12 @@ async def upload_file(
         filename=unique_filename,
         content_type=file.content_type,
         file_url=file_url,
+        file_hash=file_hash,
     )
     db.add(document)
     db.commit()
     db.refresh(document)
+    set_attributes(rfp_id=document.id, company_id=companyid)
     return {
         "user_id":userid,
         "company_id":companyid,
@@ -0,0 +1,58 @@
+import hashlib
+
+
+class FakeAgentExecutor:
+    """Stand-in for the ReAct agent without retrieval: run(query) makes `steps` calls to `llm`.
+
+    Pass a GatewayChatModel so the steps go through the LLM gateway (and its
+    fake provider), exercising retries, routing and accounting.
+    """
+
+    def __init__(self, llm, steps: int = 2):
+        self.llm = llm
+        self.steps = steps
+
+    def run(self, query: str, callbacks=None) -> str:
+        config = {"callbacks": callbacks} if callbacks else None
+        for step in range(1, self.steps):
+            self.llm.invoke(f"{query}\nThought: step {step}", config=config)
+        return self.llm.invoke(query, config=config).content
+
+
+class HashingEmbeddings:
+    """Deterministic offline embeddings with the same dimension as all-MiniLM-L6-v2."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def embed_query(self, text: str):
+        vector = [0.0] * self.dim
+        for token in text.lower().split():
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def fake_rfp_structure(sections: int = 4, requirements: int = 6, questions: int = 1) -> dict:
+    """Structure JSON in the shape extract_rfp_structure asks Gemini for."""
+    return {
+        "metadata": {"title": "Synthetic RFP", "issuer": "Load Test Agency", "due_date": "2030-01-01"},
+        "sections": [
+            {"id": f"S{i}", "title": f"Section {i}", "parent_id": None, "content": f"Scope item {i}.", "level": 1}
+            for i in range(sections)
+        ],
+        "questions": [
+            {"id": f"Q{i}", "text": f"Describe your approach to item {i}.", "section": "S0", "type": "text",
+             "response_format": "text", "word_limit": None, "related_requirements": []}
+            for i in range(questions)
+        ],
+        "requirements": [
+            {"id": f"R{i}", "text": f"The vendor shall support capability {i}.", "section": "S0",
+             "category": "technical", "mandatory": True, "related_questions": []}
+            for i in range(requirements)
+        ],
+    }
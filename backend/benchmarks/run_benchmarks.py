@@ -0,0 +1,373 @@
+# RFP pipeline benchmark suite
+# Usage (from backend/):
+#   python -m benchmarks.run_benchmarks --output bench.json
+#   python -m benchmarks.run_benchmarks --save-baseline          # record benchmarks/baseline.json
+#   python -m benchmarks.run_benchmarks --only parser,render     # run a subset
+#
+# Runs offline: LLM calls go to the gateway's fake provider, the app database is an
+# in-memory SQLite stand-in and retrieval uses an in-memory numpy index
+# unless --pgvector-url points at a local Postgres with pgvector.
+# Exits with status 1 when a benchmark fails or a metric regresses past --tolerance
+# against the baseline. Baselines are machine-specific and not committed; without
+# one the run only warns, or fails with --require-baseline.
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+BENCHMARKS = ["parser", "embedding", "retrieval", "generate", "render"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def timed(fn, *args, repeat=3):
+    """Best-of-`repeat` wall time of fn(*args) in seconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Synthetic inputs
+# ---------------------------------------------------------------------------
+SENTENCE = (
+    "The vendor shall provide a secure, scalable cloud platform with 99.9% availability "
+    "and must describe its data protection, incident response and support processes."
+)
+
+
+def make_pdf(pages: int, lines_per_page: int = 50) -> bytes:
+    """Minimal text-only PDF with Helvetica lines, enough for text extraction benchmarks."""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for page in range(pages):
+        page_id, content_id = 4 + 2 * page, 5 + 2 * page
+        kids.append(f"{page_id} 0 R")
+        text = " T* ".join(f"({SENTENCE[:95]} {page}.{line})Tj" for line in range(lines_per_page))
+        stream = f"BT /F1 8 Tf 12 TL 30 770 Td {text} ET".encode("latin-1")
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1")
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode("latin-1")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n" % obj_id + objects[obj_id] + b"\nendobj\n")
+    xref = out.tell()
+    count = max(objects) + 1
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+    for obj_id in range(1, count):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref))
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int) -> bytes:
+    import docx
+    document = docx.Document()
+    for i in range(paragraphs):
+        document.add_paragraph(f"{i}. {SENTENCE}")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_xlsx(rows: int) -> bytes:
+    import openpyxl
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for i in range(rows):
+        sheet.append([i, "Requirement", SENTENCE, "Mandatory", i * 10])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def make_structured_data(sections: int, requirements: int, questions: int = 1) -> dict:
+    return {
+        "company_id": 1,
+        "rfp_id": 1,
+        "employee_id": 1,
+        "metadata": {"title": "Benchmark RFP"},
+        "sections": [
+            {"id": f"S{i}", "title": f"Section {i}", "parent_id": None, "content": SENTENCE, "level": 1}
+            for i in range(sections)
+        ],
+        "questions": [
+            {"id": f"Q{i}", "text": SENTENCE, "section": "S0", "type": "text",
+             "response_format": "text", "word_limit": None, "related_requirements": []}
+            for i in range(questions)
+        ],
+        "requirements": [
+            {"id": f"R{i}", "text": f"{SENTENCE} ({i})", "section": "S0", "category": "technical",
+             "mandatory": True, "related_questions": []}
+            for i in range(requirements)
+        ],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+def bench_parser(args) -> dict:
+    from methods.functions import extract_text_from_pdf_bytes, extract_text_from_docx, extract_text_from_excel
+    inputs = {
+        "pdf": (extract_text_from_pdf_bytes, make_pdf(pages=40)),
+        "docx": (extract_text_from_docx, make_docx(paragraphs=4000)),
+        "xlsx": (extract_text_from_excel, make_xlsx(rows=4000)),
+    }
+    metrics = {}
+    for name, (extractor, data) in inputs.items():
+        seconds = timed(extractor, data)
+        metrics[f"parser.{name}_mb_per_s"] = (len(data) / 1e6) / seconds
+    return metrics
+
+
+def bench_embedding(args) -> dict:
+    from methods.resources import get_embeddings
+    model = get_embeddings()
+    chunks = [(SENTENCE + " ") * 6 for _ in range(256)]
+    model.embed_documents(chunks[:8])  # warm-up
+    seconds = timed(model.embed_documents, chunks, repeat=2)
+    return {"embedding.chunks_per_s": len(chunks) / seconds}
+
+
+def _numpy_retrieval(size: int, queries: int, dim: int = 384):
+    import numpy as np
+    rng = np.random.default_rng(0)
+    corpus = rng.standard_normal((size, dim), dtype=np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    samples = []
+    for _ in range(queries):
+        query = rng.standard_normal(dim, dtype=np.float32)
+        query /= np.linalg.norm(query)
+        started = time.perf_counter()
+        scores = corpus @ query
+        np.argpartition(-scores, 4)[:4]
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _pgvector_retrieval(url: str, size: int, queries: int, dim: int = 384):
+    import random
+    from sqlalchemy import create_engine, text
+    rng = random.Random(0)
+    engine = create_engine(url)
+    vector = lambda: "[" + ",".join(f"{rng.gauss(0, 1):.5f}" for _ in range(dim)) + "]"
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.execute(text("DROP TABLE IF EXISTS bench_chunks"))
+        conn.execute(text(f"CREATE TABLE bench_chunks (id serial PRIMARY KEY, company_id int, embedding vector({dim}))"))
+        for start in range(0, size, 1000):
+            conn.execute(
+                text("INSERT INTO bench_chunks (company_id, embedding) VALUES (1, CAST(:embedding AS vector))"),
+                [{"embedding": vector()} for _ in range(min(1000, size - start))],
+            )
+    samples = []
+    with engine.connect() as conn:
+        for _ in range(queries):
+            query = vector()
+            started = time.perf_counter()
+            conn.execute(
+                text("SELECT id FROM bench_chunks WHERE company_id = 1 "
+                     "ORDER BY embedding <=> CAST(:query AS vector) LIMIT 4"),
+                {"query": query},
+            ).fetchall()
+            samples.append(time.perf_counter() - started)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS bench_chunks"))
+    return samples
+
+
+def bench_retrieval(args) -> dict:
+    metrics = {}
+    for size in args.corpus_sizes:
+        if args.pgvector_url:
+            samples = _pgvector_retrieval(args.pgvector_url, size, args.queries)
+        else:
+            samples = _numpy_retrieval(size, args.queries)
+        metrics[f"retrieval.{size}.p50_ms"] = percentile(samples, 50) * 1000
+        metrics[f"retrieval.{size}.p99_ms"] = percentile(samples, 99) * 1000
+    return metrics
+
+
+def bench_generate(args) -> dict:
+    from agents import generation
+    from agents.fake_llm import fake_providers
+    from agents.llm_gateway import GatewayChatModel, get_gateway
+    from benchmarks.fakes import FakeAgentExecutor
+
+    gateway = get_gateway()
+    gateway.providers = fake_providers(gateway.providers, median_latency=args.llm_latency)
+
+    def build_agent(company_id, rfp_id=None):
+        llm = GatewayChatModel(operation="generate_response", route="fast", company_id=company_id, rfp_id=rfp_id)
+        return FakeAgentExecutor(llm), llm
+
+    generation.build_agent = build_agent
+    structured_data = make_structured_data(sections=10, requirements=30)
+    per_rfp = generation.count_items(structured_data)
+    options = {"use_answer_cache": False, "dedup": False}
+
+    async def one_rfp():
+        async for _ in generation.iter_generated_items(structured_data, options):
+            pass
+
+    async def run(concurrency):
+        started = time.perf_counter()
+        await asyncio.gather(*(one_rfp() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+    metrics = {}
+    for concurrency in args.concurrency:
+        seconds = asyncio.run(run(concurrency))
+        metrics[f"generate.c{concurrency}.items_per_s"] = concurrency * per_rfp / seconds
+    return metrics
+
+
+def bench_render(args) -> dict:
+    from api.employee.employee import build_proposal_document
+    markdown = "\n".join(
+        f"## Section {i}\n{SENTENCE}\n\n* **Bullet** one\n* Bullet two\n\n**Bold** {SENTENCE}\n"
+        for i in range(60)
+    )
+    responses = {"title": "Benchmark Proposal", "final_proposal": markdown}
+
+    def render_docx():
+        build_proposal_document(responses).save(io.BytesIO())
+
+    metrics = {"render.docx_ms": timed(render_docx) * 1000}
+    try:
+        from docx2pdf import convert
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docx_path = os.path.join(tmpdir, "proposal.docx")
+            build_proposal_document(responses).save(docx_path)
+            started = time.perf_counter()
+            convert(docx_path, os.path.join(tmpdir, "proposal.pdf"))
+            metrics["render.pdf_ms"] = (time.perf_counter() - started) * 1000
+    except Exception as e:
+        print(f"Skipping PDF render benchmark: {e}", file=sys.stderr)
+    return metrics
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+def higher_is_better(metric: str) -> bool:
+    return "_per_s" in metric
+
+
+def compare(metrics: dict, baseline: dict, tolerance: float) -> list:
+    """Metrics worse than the baseline by more than `tolerance` (a fraction)."""
+    regressions = []
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = (value - base) / base
+        if higher_is_better(name):
+            regressed = change < -tolerance
+        else:
+            regressed = change > tolerance
+        if regressed:
+            regressions.append({"metric": name, "baseline": base, "current": value, "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RFP pipeline offline")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated subset of " + ",".join(BENCHMARKS))
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="fail when there is no baseline to compare against (for CI)")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression as a fraction")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="median fake LLM step latency in seconds")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--corpus-sizes", default="1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pgvector-url", default=os.getenv("BENCH_PGVECTOR_URL"))
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.corpus_sizes = [int(s) for s in args.corpus_sizes.split(",")]
+
+    metrics, errors = {}, {}
+    for name in args.only.split(","):
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        try:
+            metrics.update(globals()[f"bench_{name}"](args))
+        except Exception as e:
+            errors[name] = str(e)
+            print(f"{name} benchmark failed: {e}", file=sys.stderr)
+    metrics = {name: round(value, 4) for name, value in metrics.items()}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("metrics", {})
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}: regressions cannot be detected "
+              f"(run once with --save-baseline on the reference machine)", file=sys.stderr)
+    regressions = compare(metrics, baseline, args.tolerance)
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "retrieval_backend": "pgvector" if args.pgvector_url else "numpy",
+        "metrics": metrics,
+        "errors": errors,
+        "regressions": regressions,
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    if errors:
+        # A broken pipeline must not pass as "no regressions", nor become the baseline
+        print(f"{len(errors)} benchmark(s) failed: {', '.join(errors)}", file=sys.stderr)
+        sys.exit(1)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"timestamp": results["timestamp"], "metrics": metrics}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+    if not baseline and args.require_baseline:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Generation job worker
+# Usage: python generation_worker.py --processes 4
+#
+# Each process polls the generation_jobs table (Postgres SKIP LOCKED queue),
+# answers the items that are not checkpointed yet and stores every answer as
+# it completes, so a crashed or failed job resumes where it stopped.
+
+import os
+import time
+import asyncio
+import argparse
+import multiprocessing
+from dotenv import load_dotenv
+
+load_dotenv()
+
+POLL_INTERVAL = float(os.getenv("GENERATION_WORKER_POLL_SECONDS", "2"))
+
+
+def worker_loop():
+    from methods.functions import SessionLocal
+    from methods.generation_jobs import claim_next_job, run_job, default_worker_id
+    from methods.tracing import setup_tracing, flush
+    from methods.llm_usage import usage_recorder
+
+    setup_tracing()
+    worker_id = default_worker_id()
+    print(f"[generation-worker] {worker_id} started")
+    while True:
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db, worker_id)
+            if not job:
+                time.sleep(POLL_INTERVAL)
+                continue
+            print(f"[generation-worker] {worker_id} running job {job.id} ({job.completed_items}/{job.total_items} done)")
+            asyncio.run(run_job(db, job))
+            flush()
+            usage_recorder.flush()
+            print(f"[generation-worker] job {job.id} finished with status {job.status}")
+        except Exception as e:
+            print(f"[generation-worker] {worker_id} error: {e}")
+            time.sleep(POLL_INTERVAL)
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run RFP generation job workers")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("GENERATION_WORKER_PROCESSES", "1")))
+    args = parser.parse_args()
+
+    # Also creates generation_jobs and generation_job_items
+    from models.upgrade import upgrade_schema
+    upgrade_schema()
+
+    if args.processes <= 1:
+        worker_loop()
+        return
+    processes = [multiprocessing.Process(target=worker_loop, daemon=True) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
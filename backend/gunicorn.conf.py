@@ -0,0 +1,52 @@
+# Multi-worker server mode
+# Usage: gunicorn main:app -c gunicorn.conf.py
+#
+# The app and the embedding model are loaded once in the master process and
+# forked into the workers, which share the model memory copy-on-write.
+#
+# Set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory so /metrics
+# aggregates every worker instead of whichever one served the scrape.
+
+import os
+
+# Tokenizers refuse to use their thread pool after a fork; disable it up front
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Recycle workers after this many requests (with jitter so they don't restart together)
+max_requests = int(os.getenv("MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "100"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))
+graceful_timeout = int(os.getenv("WORKER_GRACEFUL_TIMEOUT", "60"))
+keepalive = 5
+
+# Torch threads per worker; the default of one thread per core oversubscribes the node
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "1"))
+
+
+def when_ready(server):
+    from methods.resources import preload_for_fork
+    preload_for_fork()
+    server.log.info("Embedding model loaded in master; forking %s workers", workers)
+
+
+def post_fork(server, worker):
+    # Database connections must never be shared across processes
+    from methods.functions import engine
+    engine.dispose(close=False)
+    try:
+        import torch
+        torch.set_num_threads(TORCH_THREADS_PER_WORKER)
+    except ImportError:
+        pass
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges from the shared Prometheus directory
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,79 @@
+import os
+import time
+import random
+import tempfile
+from urllib.parse import urlparse
+from benchmarks.fakes import FakeAgentExecutor
+
+
+class FakeS3:
+    """boto3 S3 client stand-in storing objects as files under `root`.
+
+    A directory (not a dict) so a harness process and a separately started
+    server see the same objects.
+    """
+
+    def __init__(self, root: str, median_latency: float = 0.02, seed: int = 0):
+        self.root = root
+        self.median_latency = median_latency
+        self.random = random.Random(seed)
+        os.makedirs(root, exist_ok=True)
+
+    def _sleep(self):
+        if self.median_latency > 0:
+            time.sleep(self.median_latency * self.random.lognormvariate(0, 0.3))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key.replace("/", "__"))
+
+    def put(self, key: str, data: bytes):
+        with open(self._path(key), "wb") as f:
+            f.write(data)
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        self._sleep()
+        self.put(key, fileobj.read())
+
+    def delete_object(self, Bucket, Key):
+        self._sleep()
+        try:
+            os.remove(self._path(Key))
+        except FileNotFoundError:
+            pass
+
+    def download_to_temp_file(self, file_url):
+        """Replacement for api.upload_rfp.download_to_temp_file reading from this store."""
+        self._sleep()
+        key = urlparse(file_url).path.lstrip("/")
+        suffix = os.path.splitext(key)[1] or ".tmp"
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        temp_file.write(self.get(key))
+        temp_file.close()
+        return temp_file.name
+
+
+def install_fakes(storage_dir: str, llm_latency: float = 0.2, storage_latency: float = 0.02, seed: int = 0) -> FakeS3:
+    """Route S3, the LLM gateway and the Groq agent of the imported app to local fakes."""
+    import boto3
+    from agents.fake_llm import fake_providers
+    from agents.llm_gateway import GatewayChatModel, get_gateway
+    from api import upload_rfp
+    from agents import generation
+
+    storage = FakeS3(storage_dir, storage_latency, seed)
+    boto3.client = lambda *args, **kwargs: storage
+    gateway = get_gateway()
+    gateway.providers = fake_providers(gateway.providers, median_latency=llm_latency, seed=seed)
+
+    def build_agent(company_id, rfp_id=None):
+        # The real agent needs pgvector retrieval; the stand-in keeps its LLM steps
+        llm = GatewayChatModel(operation="generate_response", route="fast", company_id=company_id, rfp_id=rfp_id)
+        return FakeAgentExecutor(llm), llm
+
+    generation.build_agent = build_agent
+    upload_rfp.download_to_temp_file = storage.download_to_temp_file
+    return storage
@@ -0,0 +1,344 @@
+# Synthetic multi-tenant load generator
+# Usage (from backend/):
+#   python -m loadtest.run_load --rate 20 --duration 60 --tenants 20
+#   python -m loadtest.run_load --mix admin_list=5,employee_generate=1 --output load.json
+#   python -m loadtest.run_load --base-url http://localhost:8000   # against `python -m loadtest.serve`
+#   FAKE_LLM_ERROR_RATE=0.05 python -m loadtest.run_load             # inject LLM errors (see agents/fake_llm.py)
+#
+# Requests arrive open-loop (Poisson) at --rate per second across a skewed
+# mix of tenants; each arrival picks a scenario from --mix. By default the app
+# runs in-process behind an ASGI transport with the gateway's fake LLM provider
+# and an S3 stand-in. DATABASE_URL should point at a disposable database: it is
+# seeded with synthetic companies, users, employees and RFPs.
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import defaultdict
+
+STORAGE_DIR = os.getenv("LOADTEST_STORAGE_DIR", os.path.join(tempfile.gettempdir(), "rfp-loadtest-s3"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'rfp-loadtest.db')}")
+os.environ.setdefault("JWT_SECRET", "loadtest-secret")
+os.environ.setdefault("WARM_UP_ON_STARTUP", "0")
+
+DEFAULT_MIX = "user_upload=1,employee_extract=1,employee_generate=1,employee_propose=1,admin_list=4,admin_assign=1"
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def parse_mix(mix: str) -> dict:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip():
+            weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}; choose from {', '.join(SCENARIOS)}")
+    return weights
+
+
+# ---------------------------------------------------------------------------
+# Tenants
+# ---------------------------------------------------------------------------
+class Tenant:
+    def __init__(self, company_id, admin_id, user_ids, employees, rfps):
+        self.company_id = company_id
+        self.admin_id = admin_id
+        self.user_ids = user_ids
+        self.employees = employees  # [(employee_id, bearer token)]
+        self.rfps = rfps  # [(rfp_id, filename)]
+        self.structured = []  # structure JSON returned by upload-rfp, reused by generate/propose
+
+
+def create_tables():
+    from methods.functions import engine
+    from models.schema import Base, User, Company, RFP, Employee
+    if engine.dialect.name == "postgresql":
+        Base.metadata.create_all(bind=engine, checkfirst=True)
+    else:
+        # Only the tables the scenarios touch; the rest need Postgres types
+        Base.metadata.create_all(bind=engine, tables=[
+            User.__table__, Company.__table__, RFP.__table__, Employee.__table__,
+        ], checkfirst=True)
+
+
+def seed_tenants(storage, tenants: int, users: int, employees: int, rfps: int) -> list:
+    """Insert synthetic companies with their admin, users, employees and RFP files."""
+    from benchmarks.run_benchmarks import make_pdf
+    from methods.functions import SessionLocal, create_access_token
+    from models.schema import User, UserRole, Company, RFP, Employee
+
+    create_tables()
+    pdf = make_pdf(pages=3)
+    run = uuid.uuid4().hex[:8]
+    seeded = []
+    with SessionLocal() as db:
+        for t in range(tenants):
+            admin = User(username=f"lt-{run}-admin{t}", email=f"admin{t}-{run}@loadtest.local",
+                         hashed_password="!", role=UserRole.ADMIN)
+            tenant_users = [
+                User(username=f"lt-{run}-user{t}-{u}", email=f"user{t}-{u}-{run}@loadtest.local",
+                     hashed_password="!", role=UserRole.USER)
+                for u in range(users)
+            ]
+            db.add_all([admin, *tenant_users])
+            db.flush()
+            company = Company(name=f"lt-{run}-company{t}", subdomain=f"lt{run}c{t}", userid=admin.id)
+            db.add(company)
+            db.flush()
+            tenant_employees = [
+                Employee(name=f"lt-{run}-emp{t}-{e}", email=f"emp{t}-{e}-{run}@loadtest.local",
+                         hashed_password="!", company_id=company.id, rfps_assigned=[], rfps_finished=[])
+                for e in range(employees)
+            ]
+            tenant_rfps = []
+            for r in range(rfps):
+                filename = f"{uuid.uuid4()}.lt{run}c{t}_seed{r}.pdf"
+                storage.put(filename, pdf)
+                tenant_rfps.append(RFP(filename=filename, content_type="application/pdf",
+                                       uploaded_by=tenant_users[0].id if tenant_users else admin.id,
+                                       company_id=company.id, file_url=f"https://fake-s3.local/{filename}",
+                                       message=[]))
+            db.add_all([*tenant_employees, *tenant_rfps])
+            db.commit()
+            seeded.append(Tenant(
+                company.id, admin.id, [u.id for u in tenant_users],
+                [(e.id, create_access_token({"sub": e.name})) for e in tenant_employees],
+                [(r.id, r.filename) for r in tenant_rfps],
+            ))
+    return seeded
+
+
+# ---------------------------------------------------------------------------
+# Scenarios: async fn(client, tenant, rng) -> list of (endpoint, status, seconds)
+# ---------------------------------------------------------------------------
+async def timed_request(client, endpoint: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        return response, (endpoint, response.status_code, time.perf_counter() - started)
+    except Exception as e:
+        return None, (endpoint, f"exception:{type(e).__name__}", time.perf_counter() - started)
+
+
+async def user_upload(client, tenant, rng):
+    from benchmarks.run_benchmarks import make_pdf
+    response, result = await timed_request(
+        client, "POST /api/user/upload", "POST", "/api/user/upload",
+        data={"userid": str(rng.choice(tenant.user_ids or [tenant.admin_id])), "companyid": str(tenant.company_id)},
+        files={"file": ("rfp.pdf", make_pdf(pages=rng.randint(1, 5)), "application/pdf")},
+    )
+    if response is not None and response.status_code == 200:
+        filename = response.json()["file_url"].rsplit("/", 1)[-1]
+        tenant.rfps.append((None, filename))
+    return [result]
+
+
+async def employee_extract(client, tenant, rng):
+    employee_id, token = rng.choice(tenant.employees)
+    _, filename = rng.choice(tenant.rfps)
+    response, result = await timed_request(
+        client, "POST /api/upload-rfp/", "POST", "/api/upload-rfp/",
+        data={"file_name": filename}, headers={"Authorization": f"Bearer {token}"},
+    )
+    if response is not None and response.status_code == 200:
+        tenant.structured = (tenant.structured + [response.json()["structured_data"]])[-20:]
+    return [result]
+
+
+def structured_for(tenant, rng) -> dict:
+    from benchmarks.fakes import fake_rfp_structure
+    if tenant.structured:
+        return rng.choice(tenant.structured)
+    rfp_id = next((rfp_id for rfp_id, _ in tenant.rfps if rfp_id), None)
+    return {**fake_rfp_structure(), "company_id": tenant.company_id, "rfp_id": rfp_id,
+            "employee_id": tenant.employees[0][0]}
+
+
+async def employee_generate(client, tenant, rng):
+    _, result = await timed_request(
+        client, "POST /api/generate-response", "POST", "/api/generate-response",
+        json={"structured_data": structured_for(tenant, rng), "use_answer_cache": False, "dedup": False},
+    )
+    return [result]
+
+
+async def employee_propose(client, tenant, rng):
+    _, result = await timed_request(
+        client, "POST /api/going_to_edit", "POST", "/api/going_to_edit", json=structured_for(tenant, rng),
+    )
+    return [result]
+
+
+async def admin_list(client, tenant, rng):
+    if rng.random() < 0.5:
+        _, result = await timed_request(
+            client, "GET /api/get_rfps/{companyid}", "GET", f"/api/get_rfps/{tenant.company_id}")
+    else:
+        _, result = await timed_request(
+            client, "GET /api/all-employee/{company_id}", "GET", f"/api/all-employee/{tenant.company_id}")
+    return [result]
+
+
+async def admin_assign(client, tenant, rng):
+    employee_id, _ = rng.choice(tenant.employees)
+    rfp_ids = [rfp_id for rfp_id, _ in tenant.rfps if rfp_id]
+    _, result = await timed_request(
+        client, "POST /api/admin/assign-rfp-to-employee/{employee_id}/{rfp_id}", "POST",
+        f"/api/admin/assign-rfp-to-employee/{employee_id}/{rng.choice(rfp_ids)}",
+    )
+    return [result]
+
+
+SCENARIOS = {
+    "user_upload": user_upload,
+    "employee_extract": employee_extract,
+    "employee_generate": employee_generate,
+    "employee_propose": employee_propose,
+    "admin_list": admin_list,
+    "admin_assign": admin_assign,
+}
+# Statuses that are the expected outcome of a scenario, not errors (re-assigning an RFP)
+EXPECTED_STATUSES = {"POST /api/admin/assign-rfp-to-employee/{employee_id}/{rfp_id}": {409}}
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+async def drive(client, tenants, args) -> tuple:
+    """Fire scenarios open-loop for args.duration seconds; returns (results, dropped, elapsed)."""
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    tenant_weights = [1.0 / (rank + 1) ** args.tenant_skew for rank in range(len(tenants))]
+    in_flight = asyncio.Semaphore(args.max_in_flight)
+    results, tasks = [], []
+    dropped = 0
+
+    async def one(scenario, tenant, scenario_rng):
+        try:
+            results.extend(await SCENARIOS[scenario](client, tenant, scenario_rng))
+        except Exception as e:
+            results.append((scenario, f"exception:{type(e).__name__}", 0.0))
+        finally:
+            in_flight.release()
+
+    started = time.perf_counter()
+    next_arrival = started
+    while next_arrival - started < args.duration:
+        await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        if in_flight.locked():
+            dropped += 1
+        else:
+            await in_flight.acquire()
+            scenario = rng.choices(names, weights)[0]
+            tenant = rng.choices(tenants, tenant_weights)[0]
+            tasks.append(asyncio.create_task(one(scenario, tenant, random.Random(rng.random()))))
+        next_arrival += rng.expovariate(args.rate)
+    await asyncio.gather(*tasks)
+    return results, dropped, time.perf_counter() - started
+
+
+def report(results, dropped: int, elapsed: float, args) -> dict:
+    by_endpoint = defaultdict(list)
+    for sample in results:
+        by_endpoint[sample[0]].append(sample)
+
+    def is_error(endpoint, status) -> bool:
+        if not isinstance(status, int):
+            return True
+        return status >= 400 and status not in EXPECTED_STATUSES.get(endpoint, set())
+
+    def summarize(samples):
+        errors = sum(1 for endpoint, status, _ in samples if is_error(endpoint, status))
+        latencies = [seconds * 1000 for _, _, seconds in samples]
+        statuses = defaultdict(int)
+        for _, status, _ in samples:
+            statuses[str(status)] += 1
+        summary = {
+            "requests": len(samples),
+            "throughput_per_s": round(len(samples) / elapsed, 3),
+            "errors": errors,
+            "error_rate": round(errors / len(samples), 4) if samples else 0,
+            "statuses": dict(statuses),
+        }
+        if latencies:
+            summary.update({f"p{pct}_ms": round(percentile(latencies, pct), 1) for pct in PERCENTILES})
+            summary["max_ms"] = round(max(latencies), 1)
+        return summary
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "target": args.base_url or "in-process",
+        "rate_per_s": args.rate,
+        "duration_s": round(elapsed, 2),
+        "tenants": args.tenants,
+        "mix": parse_mix(args.mix),
+        "dropped_arrivals": dropped,
+        "overall": summarize(results),
+        "endpoints": {endpoint: summarize(samples) for endpoint, samples in sorted(by_endpoint.items())},
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from loadtest.fakes import FakeS3, install_fakes
+
+    if args.base_url:
+        # The server installs its own fakes (python -m loadtest.serve) on the same storage dir
+        storage = FakeS3(STORAGE_DIR, 0)
+        transport, base_url = None, args.base_url
+    else:
+        storage = install_fakes(STORAGE_DIR, args.llm_latency, args.storage_latency, args.seed)
+        from main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://loadtest"
+    tenants = seed_tenants(storage, args.tenants, args.users, args.employees, args.rfps)
+    print(f"Seeded {len(tenants)} tenants; driving {args.rate}/s for {args.duration}s...", file=sys.stderr)
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+        results, dropped, elapsed = await drive(client, tenants, args)
+    return report(results, dropped, elapsed, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic multi-tenant load against the RFP API")
+    parser.add_argument("--base-url", help="running server to target (default: the app in-process)")
+    parser.add_argument("--rate", type=float, default=10.0, help="mean arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight list, from: " + ",".join(SCENARIOS))
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--tenant-skew", type=float, default=1.0, help="Zipf exponent; 0 spreads load evenly")
+    parser.add_argument("--users", type=int, default=2, help="uploading users per tenant")
+    parser.add_argument("--employees", type=int, default=3, help="employees per tenant")
+    parser.add_argument("--rfps", type=int, default=3, help="seeded RFP files per tenant")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="median fake LLM latency in seconds")
+    parser.add_argument("--storage-latency", type=float, default=0.02, help="median fake S3 latency in seconds")
+    parser.add_argument("--max-in-flight", type=int, default=200, help="arrivals beyond this are dropped")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the report JSON here (default: stdout)")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+
+    output = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# Serve the app with fake LLMs and S3 for load tests over real sockets
+# Usage (from backend/):
+#   DATABASE_URL=postgresql://... python -m loadtest.serve --port 8000
+#   python -m loadtest.run_load --base-url http://localhost:8000
+#
+# Use the same DATABASE_URL and LOADTEST_STORAGE_DIR for both processes.
+
+import argparse
+from loadtest.run_load import STORAGE_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RFP API with fake LLM and storage providers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="median fake LLM latency in seconds")
+    parser.add_argument("--storage-latency", type=float, default=0.02, help="median fake S3 latency in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+    from loadtest.fakes import install_fakes
+    install_fakes(STORAGE_DIR, args.llm_latency, args.storage_latency, args.seed)
+    from main import app
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
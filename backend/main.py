@@ -1,8 +1,10 @@
 import os
+import time
+_import_started = time.perf_counter()
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
-import google.generativeai as genai
 from api import response_for_each, final_rfp, authendication,upload_rfp
 # from api.super_admin import super_admin
 from api.admin import admin
@@ -17,6 +19,16 @@ from api.pdf_url import router as pdf_url_router
 from api.google_oauth import router as google_oauth_router
 from starlette.middleware.sessions import SessionMiddleware
 from api.forget_pass import router as forget_pass
+from api.generation_jobs import router as generation_jobs_router
+from api.answer_cache import router as answer_cache_router
+from api.llm_usage import router as llm_usage_router
+from agents.llm_gateway import close_gateway
+from methods.llm_usage import usage_recorder
+from methods.resources import resource_status, is_ready, warm_up_in_background
+from methods.executor import cpu_pool
+from methods.metrics import metrics_middleware, render_metrics
+from methods.tracing import setup_tracing, trace_header_middleware
+from models.upgrade import upgrade_schema
 # Initialize FastAPI app
 app = FastAPI(title="RFP Response Agent API")
 
@@ -27,11 +39,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["traceparent"],
 )
 
 # Add SessionMiddleware for OAuth2 session management
 app.add_middleware(SessionMiddleware, secret_key="your-secret-key")
 
+# Request counts and latency per route template
+app.middleware("http")(metrics_middleware)
+
+# Spans for requests, DB statements, S3 and LLM calls (TRACING_EXPORTER=file|otlp)
+app.middleware("http")(trace_header_middleware)
+setup_tracing(app)
+
 # Create necessary directories
 # os.makedirs("uploads", exist_ok=True)
 # os.makedirs("company_docs", exist_ok=True)
@@ -42,14 +62,29 @@ app.add_middleware(SessionMiddleware, secret_key="your-secret-key")
 # Load your .env
 load_dotenv()
 
-# Configure with your Gemini API key
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY")
-# Use the Gemini 1.5 Flash model
-model = genai.GenerativeModel("gemini-1.5-flash")
+# GEMINI_API_KEY and GROQ_API_KEY are read by agents/llm_gateway.py
+
+# Seconds spent importing the app and its routers (model loading is deferred)
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 3)
+print(f"App imported in {IMPORT_SECONDS}s")
+
+@app.on_event("startup")
+async def upgrade_database():
+    """Add columns and tables introduced since the database was created (idempotent)."""
+    if os.getenv("SCHEMA_UPGRADE_ON_STARTUP", "1") == "1":
+        upgrade_schema()
 
-# Make a request
-response = model.generate_content("Explain LangChain in one sentence.")
+@app.on_event("startup")
+async def warm_resources():
+    """Load the embedding model and vector store after the server is accepting connections."""
+    if os.getenv("WARM_UP_ON_STARTUP", "1") == "1":
+        warm_up_in_background()
+
+@app.on_event("shutdown")
+async def stop_cpu_pool():
+    cpu_pool.shutdown()
+    close_gateway()
+    usage_recorder.flush()
 
 # Health check endpoint
 @app.get("/health")
@@ -57,6 +92,27 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "ok", "version": "1.0.0"}
 
+# Readiness probe: 503 until the heavy resources are loaded
+@app.get("/ready")
+async def readiness_check():
+    body = {
+        "ready": is_ready(),
+        "import_seconds": IMPORT_SECONDS,
+        "resources": resource_status,
+    }
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+# Queue depth and worker utilization of the CPU process pool
+@app.get("/metrics/executor")
+async def executor_metrics():
+    return cpu_pool.stats()
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def prometheus_metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # app.include_router(upload_company_docs.router)
 app.include_router(response_for_each.router)
 app.include_router(final_rfp.router)
@@ -74,6 +130,9 @@ app.include_router(proposal_edit_llm_router)
 app.include_router(pdf_url_router)
 app.include_router(google_oauth_router)
 app.include_router(forget_pass)
+app.include_router(generation_jobs_router)
+app.include_router(answer_cache_router)
+app.include_router(llm_usage_router)
 
 if __name__ == "__main__":
     import uvicorn
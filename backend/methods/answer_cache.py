@@ -0,0 +1,140 @@
+import os
+from typing import Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from models.schema import AnswerCache, Company
+from methods.resources import get_embeddings
+from methods.functions import SessionLocal
+
+# Minimum cosine similarity for a cached answer to be reused
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+# Default of the use_answer_cache generation option (the table is created by models/upgrade.py)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "0") == "1"
+
+
+def get_corpus_version(db: Session, company_id: int) -> int:
+    company = db.query(Company).filter(Company.id == company_id).first()
+    return (company.corpus_version or 0) if company else 0
+
+
+def bump_corpus_version(db: Session, company_id: int):
+    """Invalidate generated cache entries after the company's documents change."""
+    company = db.query(Company).filter(Company.id == company_id).first()
+    if company:
+        company.corpus_version = (company.corpus_version or 0) + 1
+        db.commit()
+
+
+def lookup_answer(db: Session, company_id: int, question: str, corpus_version: int, vector=None) -> Optional[dict]:
+    """Closest cached answer for a question, or None below the threshold.
+
+    Generated answers only count for the current corpus version; answers
+    edited by an employee stay valid until they are edited again.
+    """
+    vector = vector if vector is not None else get_embeddings().embed_query(question)
+    distance = AnswerCache.embedding.cosine_distance(vector)
+    row = (
+        db.query(AnswerCache, distance.label("distance"))
+        .filter(AnswerCache.company_id == company_id)
+        .filter(or_(
+            AnswerCache.corpus_version == corpus_version,
+            AnswerCache.edited_by_employee.isnot(None),
+        ))
+        .order_by(distance)
+        .first()
+    )
+    if not row:
+        return None
+    entry, dist = row
+    similarity = 1.0 - float(dist)
+    if similarity < ANSWER_CACHE_THRESHOLD:
+        return None
+    entry.hit_count = (entry.hit_count or 0) + 1
+    db.commit()
+    return {
+        "cache_id": entry.id,
+        "question": entry.question_text,
+        "answer": entry.answer,
+        "similarity": similarity,
+        "edited": entry.edited_by_employee is not None,
+    }
+
+
+def store_answer(
+    db: Session,
+    company_id: int,
+    question: str,
+    answer: str,
+    corpus_version: int,
+    employee_id: Optional[int] = None,
+    vector=None,
+) -> AnswerCache:
+    """Insert or replace the cache entry for this exact question text."""
+    entry = (
+        db.query(AnswerCache)
+        .filter(AnswerCache.company_id == company_id, AnswerCache.question_text == question)
+        .first()
+    )
+    if entry and entry.edited_by_employee is not None and employee_id is None:
+        # Never let a regenerated answer overwrite an employee's edit
+        return entry
+    if not entry:
+        entry = AnswerCache(company_id=company_id, question_text=question)
+        db.add(entry)
+    entry.embedding = vector if vector is not None else get_embeddings().embed_query(question)
+    entry.answer = answer
+    entry.corpus_version = corpus_version
+    entry.edited_by_employee = employee_id
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+
+class TenantAnswerCache:
+    """Answer cache bound to one company for a single generation run.
+
+    Each operation uses its own short-lived session so the cache can be used
+    from long-running generators and worker threads. Database errors turn
+    the cache off (or into a miss) instead of failing the generation.
+    """
+
+    def __init__(self, company_id: int, enabled: bool = True, regenerate: bool = False):
+        self.session_factory = SessionLocal
+        self.company_id = company_id
+        self.enabled = enabled
+        self.regenerate = regenerate
+        self.corpus_version = None
+        if enabled:
+            try:
+                with self.session_factory() as db:
+                    self.corpus_version = get_corpus_version(db, company_id)
+            except Exception as e:
+                print(f"Answer cache unavailable for company {company_id}: {e}")
+                self.enabled = False
+
+    def get(self, question: str) -> Optional[dict]:
+        if not self.enabled or self.regenerate or not question.strip():
+            return None
+        try:
+            with self.session_factory() as db:
+                return lookup_answer(db, self.company_id, question, self.corpus_version)
+        except Exception as e:
+            print(f"Answer cache lookup failed for company {self.company_id}: {e}")
+            return None
+
+    def put(self, question: str, answer: str):
+        if not self.enabled or not question.strip():
+            return
+        try:
+            with self.session_factory() as db:
+                store_answer(db, self.company_id, question, answer, self.corpus_version)
+        except Exception as e:
+            print(f"Failed to cache answer for company {self.company_id}: {e}")
+
+
+def cache_fields(cached: Optional[dict]) -> dict:
+    """Extra fields added to a generated entry to say whether it came from the cache."""
+    return {
+        "cached": cached is not None,
+        "cache_similarity": cached["similarity"] if cached else None,
+    }
@@ -0,0 +1,157 @@
+import os
+import time
+import random
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+# "memory" for a single worker, "postgres" when several workers or nodes share state
+CONTEXT_STORE_BACKEND = os.getenv("CONTEXT_STORE_BACKEND", "memory")
+CONTEXT_TTL_SECONDS = int(os.getenv("CONTEXT_TTL_SECONDS", str(12 * 3600)))
+CONTEXT_MAX_ENTRIES = int(os.getenv("CONTEXT_MAX_ENTRIES", "10000"))
+# How long the Postgres backend may serve a value from its local cache
+CONTEXT_LOCAL_CACHE_SECONDS = float(os.getenv("CONTEXT_LOCAL_CACHE_SECONDS", "5"))
+
+
+class ContextStore:
+    """Key/value store for small JSON-serialisable working context."""
+
+    def get(self, key) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class LRUContextStore(ContextStore):
+    """In-process store with TTL expiry, evicting least recently used keys past max_size."""
+
+    def __init__(self, max_size: int = CONTEXT_MAX_ENTRIES, ttl: int = CONTEXT_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at monotonic, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        key = str(key)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        key = str(key)
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(str(key), None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PostgresContextStore(ContextStore):
+    """Store backed by the working_context table, fronted by a short-lived local LRU.
+
+    Writes go straight to Postgres and refresh the local cache; reads are
+    served locally for up to CONTEXT_LOCAL_CACHE_SECONDS, so another worker's
+    write becomes visible within that window. Expired rows are purged
+    opportunistically on write. The table is created on first use if it
+    does not exist yet.
+    """
+
+    PURGE_PROBABILITY = 0.01
+
+    def __init__(self, namespace: str, ttl: int = CONTEXT_TTL_SECONDS,
+                 local_ttl: float = CONTEXT_LOCAL_CACHE_SECONDS, local_size: int = CONTEXT_MAX_ENTRIES):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUContextStore(max_size=local_size, ttl=local_ttl)
+        from methods.functions import engine
+        from models.schema import WorkingContext
+        WorkingContext.__table__.create(bind=engine, checkfirst=True)
+
+    def _session(self):
+        from methods.functions import SessionLocal
+        return SessionLocal()
+
+    def get(self, key):
+        cached = self.local.get(key)
+        if cached is not None:
+            return cached
+        from models.schema import WorkingContext
+        with self._session() as db:
+            row = (
+                db.query(WorkingContext)
+                .filter(
+                    WorkingContext.namespace == self.namespace,
+                    WorkingContext.key == str(key),
+                    WorkingContext.expires_at > datetime.utcnow(),
+                )
+                .first()
+            )
+            value = row.value if row else None
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    def set(self, key, value, ttl=None):
+        from sqlalchemy.dialects.postgresql import insert
+        from models.schema import WorkingContext
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl if ttl is not None else self.ttl)
+        statement = insert(WorkingContext).values(
+            namespace=self.namespace, key=str(key), value=value,
+            expires_at=expires_at, updated_at=datetime.utcnow(),
+        ).on_conflict_do_update(
+            index_elements=["namespace", "key"],
+            set_={"value": value, "expires_at": expires_at, "updated_at": datetime.utcnow()},
+        )
+        with self._session() as db:
+            db.execute(statement)
+            if random.random() < self.PURGE_PROBABILITY:
+                db.query(WorkingContext).filter(WorkingContext.expires_at <= datetime.utcnow()).delete()
+            db.commit()
+        self.local.set(key, value)
+
+    def delete(self, key):
+        from models.schema import WorkingContext
+        with self._session() as db:
+            db.query(WorkingContext).filter(
+                WorkingContext.namespace == self.namespace,
+                WorkingContext.key == str(key),
+            ).delete()
+            db.commit()
+        self.local.delete(key)
+
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+
+def get_context_store(namespace: str) -> ContextStore:
+    """Shared store for a namespace, using the backend chosen by CONTEXT_STORE_BACKEND."""
+    with _stores_lock:
+        if namespace not in _stores:
+            if CONTEXT_STORE_BACKEND == "postgres":
+                _stores[namespace] = PostgresContextStore(namespace)
+            elif CONTEXT_STORE_BACKEND == "memory":
+                _stores[namespace] = LRUContextStore()
+            else:
+                raise ValueError(f"Unknown CONTEXT_STORE_BACKEND: {CONTEXT_STORE_BACKEND}")
+        return _stores[namespace]
@@ -0,0 +1,87 @@
+import os
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+# Overall budget of one generation request (override per request with the deadline_seconds option)
+RFP_GENERATION_DEADLINE = float(os.getenv("RFP_GENERATION_DEADLINE_SECONDS", "300"))
+# Items are not started with less than this left, and never get more than the max
+RFP_ITEM_MIN_SECONDS = float(os.getenv("RFP_ITEM_MIN_SECONDS", "3"))
+RFP_ITEM_MAX_SECONDS = float(os.getenv("RFP_ITEM_MAX_SECONDS", "60"))
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline:
+    """A point in monotonic time by which a piece of work has to be done."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def share(self, parts: int, minimum: float = 0.0, maximum: Optional[float] = None) -> float:
+        """Budget for the next of `parts` remaining pieces of work, clamped and never past the deadline."""
+        budget = max(minimum, self.remaining() / max(1, parts))
+        if maximum:
+            budget = min(budget, maximum)
+        return min(budget, self.remaining())
+
+    def child(self, seconds: float) -> "Deadline":
+        """A deadline `seconds` from now, or this one if it is earlier."""
+        child = Deadline(0)
+        child.expires_at = min(self.expires_at, time.monotonic() + seconds)
+        return child
+
+    def check(self, stage: str):
+        if self.expired:
+            raise DeadlineExceeded(f"deadline exceeded before {stage}")
+
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Make `deadline` the current one for this context (LLM calls and retrieval read it)."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def check_deadline(stage: str):
+    """Raise DeadlineExceeded if the current deadline (if any) has passed."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+async def run_in_thread(deadline: Deadline, fn, *args):
+    """fn(*args) in a worker thread under `deadline`; waiting stops when it expires.
+
+    The thread itself cannot be interrupted, but every LLM call and
+    retrieval it makes fails fast once the deadline has passed.
+    """
+    def call():
+        with deadline_scope(deadline):
+            return fn(*args)
+
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(call), deadline.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"deadline exceeded in {getattr(fn, '__name__', 'call')}")
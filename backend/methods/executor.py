@@ -0,0 +1,103 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from methods.tracing import tracing_enabled, current_traceparent, traced_call
+
+# Worker processes for CPU-bound parsing and document building
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Tasks allowed to wait for a free worker before new ones are rejected with 503
+CPU_POOL_MAX_QUEUE = int(os.getenv("CPU_POOL_MAX_QUEUE", "16"))
+
+
+class BoundedProcessPool:
+    """Process pool with a bounded backlog and simple utilization counters.
+
+    The pool is created on first use so every server worker owns its own
+    children (nothing is inherited across a gunicorn fork). Children are
+    spawned, not forked, because the parent runs threads.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server is busy processing documents, please retry shortly.")
+        with self._stats_lock:
+            self.in_flight += 1
+            self.submitted += 1
+        if tracing_enabled():
+            # The child continues the submitting request's trace
+            fn, args = traced_call, (current_traceparent(), fn, *args)
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._release(failed=True)
+            raise
+        future.add_done_callback(lambda f: self._release(failed=f.exception() is not None))
+        return future
+
+    def _release(self, failed: bool):
+        with self._stats_lock:
+            self.in_flight -= 1
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+        self._slots.release()
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in a child process from async code without blocking the event loop."""
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def run_sync(self, fn, *args):
+        """Run fn(*args) in a child process from a sync (threadpool) handler."""
+        return self._submit(fn, *args).result()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            busy = min(self.in_flight, self.max_workers)
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self.in_flight - busy,
+                "busy_workers": busy,
+                "utilization": busy / self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+cpu_pool = BoundedProcessPool(CPU_POOL_WORKERS, CPU_POOL_MAX_QUEUE)
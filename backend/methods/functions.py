@@ -181,3 +181,9 @@ def extract_text_from_excel(file_bytes: bytes) -> str:
             line = ' | '.join([str(cell) if cell is not None else '' for cell in row])
             text_chunks.append(line)
     return "\n".join(text_chunks)
+
+
+def extract_text_with_pdfreader(file_bytes: bytes) -> str:
+    from PyPDF2 import PdfReader
+    reader = PdfReader(BytesIO(file_bytes))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
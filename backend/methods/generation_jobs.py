@@ -0,0 +1,128 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from models.schema import GenerationJob, GenerationJobItem
+from agents.generation import iter_generated_items, output_skeleton, count_items
+from methods.tracing import current_traceparent, span
+
+# A running job whose worker stopped heartbeating for this long is picked up again
+STALE_AFTER = timedelta(seconds=int(os.getenv("GENERATION_JOB_STALE_SECONDS", "300")))
+MAX_ATTEMPTS = int(os.getenv("GENERATION_JOB_MAX_ATTEMPTS", "3"))
+
+
+def create_job(db: Session, structured_data: dict, options: dict = None) -> GenerationJob:
+    job = GenerationJob(
+        rfp_id=structured_data["rfp_id"],
+        company_id=structured_data["company_id"],
+        employee_id=structured_data["employee_id"],
+        structured_data=structured_data,
+        options=options or {},
+        total_items=count_items(structured_data),
+        status="queued",
+        traceparent=current_traceparent(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def is_stale(job: GenerationJob) -> bool:
+    """A running job whose worker stopped heartbeating."""
+    return (job.status == "running"
+            and (job.heartbeat_at is None or job.heartbeat_at < datetime.utcnow() - STALE_AFTER))
+
+
+def fail_exhausted_jobs(db: Session, cutoff: datetime):
+    """Fail stale running jobs whose worker died on their last allowed attempt; no worker takes them again."""
+    db.query(GenerationJob).filter(
+        GenerationJob.status == "running",
+        GenerationJob.heartbeat_at < cutoff,
+        GenerationJob.attempts >= MAX_ATTEMPTS,
+    ).update({"status": "failed", "error": "worker stopped during the last attempt"}, synchronize_session=False)
+    db.commit()
+
+
+def claim_next_job(db: Session, worker_id: str):
+    """Take the oldest queued (or stale running) job using SKIP LOCKED.
+
+    Several worker processes can poll concurrently; each row is handed to
+    exactly one of them.
+    """
+    cutoff = datetime.utcnow() - STALE_AFTER
+    fail_exhausted_jobs(db, cutoff)
+    job = (
+        db.query(GenerationJob)
+        .filter(or_(
+            GenerationJob.status == "queued",
+            and_(GenerationJob.status == "running", GenerationJob.heartbeat_at < cutoff),
+        ))
+        .filter(GenerationJob.attempts < MAX_ATTEMPTS)
+        .order_by(GenerationJob.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        db.rollback()
+        return None
+    job.status = "running"
+    job.worker_id = worker_id
+    job.attempts = (job.attempts or 0) + 1
+    job.heartbeat_at = datetime.utcnow()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def completed_items(db: Session, job_id: int) -> dict:
+    """{(kind, item_id): answer} for every checkpointed item of a job."""
+    items = db.query(GenerationJobItem).filter(GenerationJobItem.job_id == job_id).all()
+    return {(item.kind, item.item_id): item.answer for item in items}
+
+
+def assemble_job_output(db: Session, job: GenerationJob) -> dict:
+    """Build the /generate-response payload from the items finished so far, in RFP order."""
+    done = completed_items(db, job.id)
+    output = output_skeleton(job.structured_data)
+    for kind in ("section", "question", "requirement"):
+        for item in job.structured_data[f"{kind}s"]:
+            answer = done.get((kind, str(item["id"])))
+            if answer is not None:
+                output[f"{kind}s"].append(answer)
+    return output
+
+
+async def run_job(db: Session, job: GenerationJob):
+    """Generate the remaining items of a job, checkpointing each one as it completes."""
+    done = set(completed_items(db, job.id).keys())
+    pending = 0
+    try:
+        with span("generation_job.run", job.traceparent, job_id=job.id, rfp_id=job.rfp_id,
+                  company_id=job.company_id, attempt=job.attempts):
+            async for kind, entry in iter_generated_items(job.structured_data, job.options, set(done)):
+                if entry.get("pending"):
+                    # Out of time: not checkpointed, so the next attempt answers it
+                    pending += 1
+                    continue
+                db.add(GenerationJobItem(job_id=job.id, kind=kind, item_id=str(entry["id"]), answer=entry))
+                done.add((kind, str(entry["id"])))
+                job.completed_items = len(done)
+                job.heartbeat_at = datetime.utcnow()
+                db.commit()
+        if pending:
+            job.status = "queued" if job.attempts < MAX_ATTEMPTS else "failed"
+            job.error = f"{pending} items ran out of time"
+        else:
+            job.status = "completed"
+            job.error = None
+    except Exception as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+    db.commit()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,154 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, text
+from sqlalchemy.orm import Session
+from models.schema import LLMUsage, LLMUsageDaily
+from methods.metrics import record_llm_call
+
+# Key of the Postgres advisory lock that serializes rollup runs
+LLM_USAGE_ROLLUP_LOCK = 0x4C4C4D55
+# Usage rows are buffered and written in one insert per batch
+LLM_USAGE_FLUSH_SIZE = int(os.getenv("LLM_USAGE_FLUSH_SIZE", "50"))
+LLM_USAGE_FLUSH_SECONDS = float(os.getenv("LLM_USAGE_FLUSH_SECONDS", "5"))
+
+
+class UsageRecorder:
+    """Buffers llm_usage rows and inserts them from a background thread.
+
+    Recording never raises: accounting must not fail an RFP.
+    """
+
+    def __init__(self, flush_size: int = LLM_USAGE_FLUSH_SIZE, flush_seconds: float = LLM_USAGE_FLUSH_SECONDS):
+        self.flush_size = flush_size
+        self.flush_seconds = flush_seconds
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._table_ready = False
+
+    def add(self, row: dict):
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.flush_size
+            if self._thread is None or not self._thread.is_alive():
+                # Started lazily so forked or spawned workers get their own thread
+                self._thread = threading.Thread(target=self._run, name="llm-usage-flush", daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return
+        from methods.functions import SessionLocal, engine
+        try:
+            if not self._table_ready:
+                LLMUsage.__table__.create(bind=engine, checkfirst=True)
+                self._table_ready = True
+            with SessionLocal() as db:
+                db.bulk_insert_mappings(LLMUsage, rows)
+                db.commit()
+        except Exception as e:
+            print(f"[llm-usage] dropped {len(rows)} usage rows: {e}")
+
+
+usage_recorder = UsageRecorder()
+
+
+def record_usage(provider: str, model: str, operation: str, latency: float = 0.0,
+                 prompt_tokens: int = 0, completion_tokens: int = 0, company_id=None, rfp_id=None,
+                 cache_hit: bool = False, retries: int = 0, error: bool = False):
+    """Account one LLM call (latency in seconds) in Prometheus and in llm_usage."""
+    if not cache_hit:
+        record_llm_call(provider, latency, prompt_tokens, completion_tokens, company_id, error)
+    usage_recorder.add({
+        "company_id": company_id,
+        "rfp_id": rfp_id,
+        "provider": provider,
+        "model": model,
+        "operation": operation,
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+        "latency_ms": int(latency * 1000),
+        "cache_hit": cache_hit,
+        "retries": retries,
+        "error": error,
+        "created_at": datetime.utcnow(),
+    })
+
+
+ROLLUP_KEYS = ("company_id", "rfp_id", "provider", "model", "operation")
+
+
+def rollup_usage(db: Session, day: datetime):
+    """Recompute llm_usage_daily for one UTC day from the raw llm_usage rows.
+
+    Does not commit; rollup_recent() runs it inside its transaction.
+    """
+    start = datetime(day.year, day.month, day.day)
+    end = start + timedelta(days=1)
+    keys = [getattr(LLMUsage, key) for key in ROLLUP_KEYS]
+    rows = (
+        db.query(
+            *keys,
+            func.count(LLMUsage.id),
+            func.sum(case((LLMUsage.error.is_(True), 1), else_=0)),
+            func.sum(case((LLMUsage.cache_hit.is_(True), 1), else_=0)),
+            func.coalesce(func.sum(LLMUsage.retries), 0),
+            func.coalesce(func.sum(LLMUsage.prompt_tokens), 0),
+            func.coalesce(func.sum(LLMUsage.completion_tokens), 0),
+            func.coalesce(func.sum(LLMUsage.latency_ms), 0),
+            func.coalesce(func.max(LLMUsage.latency_ms), 0),
+        )
+        .filter(LLMUsage.created_at >= start, LLMUsage.created_at < end)
+        .group_by(*keys)
+        .all()
+    )
+    db.query(LLMUsageDaily).filter(LLMUsageDaily.day == start).delete()
+    db.bulk_insert_mappings(LLMUsageDaily, [
+        {
+            "day": start,
+            **dict(zip(ROLLUP_KEYS, row[:len(ROLLUP_KEYS)])),
+            **dict(zip(
+                ("calls", "errors", "cache_hits", "retries", "prompt_tokens", "completion_tokens",
+                 "total_latency_ms", "max_latency_ms"),
+                (int(value or 0) for value in row[len(ROLLUP_KEYS):]),
+            )),
+        }
+        for row in rows
+    ])
+    return len(rows)
+
+
+def rollup_recent(db: Session, days: int = 2):
+    """Refresh the rollup for today and the previous `days - 1` days.
+
+    All days are replaced in one transaction, so readers see either the old
+    or the new rows. On Postgres a transaction-level advisory lock makes
+    concurrent runs wait for each other instead of interleaving their
+    deletes and inserts and counting the same calls twice.
+    """
+    from methods.functions import engine
+    usage_recorder.flush()
+    LLMUsage.__table__.create(bind=engine, checkfirst=True)
+    LLMUsageDaily.__table__.create(bind=engine, checkfirst=True)
+    today = datetime.utcnow()
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LLM_USAGE_ROLLUP_LOCK})
+        for offset in range(days):
+            rollup_usage(db, today - timedelta(days=offset))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
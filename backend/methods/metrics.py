@@ -0,0 +1,152 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest,
+)
+from methods.tracing import span
+
+# Tenants beyond this many distinct companies share the "other" label value
+METRICS_MAX_TENANTS = int(os.getenv("METRICS_MAX_TENANTS", "50"))
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+QUEUE_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"],
+)
+STAGE_LATENCY = Histogram(
+    "rfp_stage_duration_seconds", "Latency of RFP pipeline stages", ["stage", "tenant"], buckets=STAGE_BUCKETS,
+)
+STAGE_ERRORS = Counter("rfp_stage_errors_total", "Failed RFP pipeline stages", ["stage", "tenant"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by provider and kind", ["provider", "kind", "tenant"])
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "LLM call latency by provider", ["provider"], buckets=STAGE_BUCKETS,
+)
+LLM_ERRORS = Counter("llm_errors_total", "Failed LLM calls by provider", ["provider"])
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds", "Time LLM calls wait in the scheduler before starting",
+    ["provider", "priority", "tenant"], buckets=QUEUE_BUCKETS,
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth", "LLM calls waiting in the scheduler", ["provider", "priority"], multiprocess_mode="livesum",
+)
+AGENT_ITERATIONS = Histogram(
+    "agent_iterations", "ReAct agent iterations per run", ["tenant"], buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+)
+AGENT_TOOL_LATENCY = Histogram(
+    "agent_tool_duration_seconds", "Agent tool call latency", ["tool", "tenant"], buckets=STAGE_BUCKETS,
+)
+AGENT_PARSE_ERRORS = Counter("agent_parse_errors_total", "Unparseable agent LLM outputs", ["tenant"])
+DB_POOL = Gauge("db_pool_connections", "SQLAlchemy pool connections by state", ["state"], multiprocess_mode="livesum")
+EXECUTOR = Gauge("cpu_pool_tasks", "CPU process pool tasks by state", ["state"], multiprocess_mode="livesum")
+
+_tenants: set = set()
+_tenants_lock = threading.Lock()
+
+
+def tenant_label(company_id) -> str:
+    """Bounded-cardinality label for a company id ("other" once the cap is reached)."""
+    if company_id is None:
+        return "none"
+    value = str(company_id)
+    with _tenants_lock:
+        if value in _tenants:
+            return value
+        if len(_tenants) < METRICS_MAX_TENANTS:
+            _tenants.add(value)
+            return value
+    return "other"
+
+
+@contextmanager
+def stage_timer(stage: str, company_id=None):
+    """Observe the duration of a pipeline stage in a trace span; failures are also counted."""
+    tenant = tenant_label(company_id)
+    started = time.perf_counter()
+    try:
+        with span(f"stage.{stage}", company_id=company_id):
+            yield
+    except Exception:
+        STAGE_ERRORS.labels(stage, tenant).inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(stage, tenant).observe(time.perf_counter() - started)
+
+
+def observe_stage(stage: str, seconds: float, company_id=None):
+    STAGE_LATENCY.labels(stage, tenant_label(company_id)).observe(seconds)
+
+
+def record_llm_call(provider: str, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                    company_id=None, error: bool = False):
+    LLM_LATENCY.labels(provider).observe(seconds)
+    if error:
+        LLM_ERRORS.labels(provider).inc()
+        return
+    tenant = tenant_label(company_id)
+    if prompt_tokens:
+        LLM_TOKENS.labels(provider, "prompt", tenant).inc(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(provider, "completion", tenant).inc(completion_tokens)
+
+
+def observe_queue_wait(provider: str, priority: str, company_id, seconds: float):
+    LLM_QUEUE_WAIT.labels(provider, priority, tenant_label(company_id)).observe(seconds)
+
+
+def record_agent_trace(trace: dict, company_id=None):
+    """Aggregate one agent run (agents.agent_trace summary) per tenant."""
+    from agents.agent_trace import tool_label
+    tenant = tenant_label(company_id)
+    AGENT_ITERATIONS.labels(tenant).observe(trace["iterations"])
+    for step in trace["steps"]:
+        if step["tool_ms"] is not None:
+            AGENT_TOOL_LATENCY.labels(tool_label(step["tool"]), tenant).observe(step["tool_ms"] / 1000)
+    if trace["parse_errors"]:
+        AGENT_PARSE_ERRORS.labels(tenant).inc(trace["parse_errors"])
+
+
+def collect_gauges():
+    """Refresh gauges that are sampled at scrape time (DB pool, CPU pool)."""
+    from methods.functions import engine
+    from methods.executor import cpu_pool
+    pool = engine.pool
+    for state, reader in (("size", "size"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+        if hasattr(pool, reader):
+            DB_POOL.labels(state).set(getattr(pool, reader)())
+    stats = cpu_pool.stats()
+    EXECUTOR.labels("queued").set(stats["queue_depth"])
+    EXECUTOR.labels("running").set(stats["busy_workers"])
+    EXECUTOR.labels("rejected_total").set(stats["rejected"])
+
+
+def render_metrics() -> tuple:
+    """(body, content type) for /metrics, aggregating all workers in multiprocess mode."""
+    collect_gauges()
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+async def metrics_middleware(request, call_next):
+    """Count and time requests by route template (never the raw path, to keep labels bounded)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_REQUESTS.labels(request.method, path, str(status)).inc()
+        HTTP_LATENCY.labels(request.method, path).observe(time.perf_counter() - started)
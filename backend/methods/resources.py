@@ -0,0 +1,117 @@
+import os
+import time
+import threading
+from functools import wraps
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# {resource name: {"status": "pending" | "ready" | "error", "seconds": float, "error": str}}
+resource_status: dict = {}
+_status_lock = threading.Lock()
+
+
+def _track(name):
+    """Build a resource once on first use and record its load time or failure.
+
+    A per-resource lock makes concurrent first calls (background warm-up and
+    an early request) share one load instead of building the model twice.
+    """
+    def decorator(factory):
+        lock = threading.Lock()
+        holder = {}
+
+        @wraps(factory)
+        def wrapper():
+            if "value" in holder:
+                return holder["value"]
+            with lock:
+                if "value" in holder:
+                    return holder["value"]
+                started = time.perf_counter()
+                try:
+                    holder["value"] = factory()
+                except Exception as e:
+                    with _status_lock:
+                        resource_status[name] = {"status": "error", "error": str(e)}
+                    raise
+                with _status_lock:
+                    resource_status[name] = {"status": "ready", "seconds": round(time.perf_counter() - started, 3)}
+            return holder["value"]
+
+        wrapper.resource_name = name
+        with _status_lock:
+            resource_status.setdefault(name, {"status": "pending"})
+        return wrapper
+    return decorator
+
+
+def pgvector_connection_string() -> str:
+    raw_url = os.getenv("VECTOR_DATABASE_URL")
+    if not raw_url:
+        raise ValueError("VECTOR_DATABASE_URL environment variable is not set")
+    return raw_url.replace("postgresql://", "postgresql+psycopg2://", 1)
+
+
+@_track("embeddings")
+def get_embeddings():
+    """The shared sentence-transformer embedding model (loaded once per process)."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+
+@_track("vectorstore")
+def get_vectorstore():
+    """The company_docs PGVector store; per-company filtering is done by callers."""
+    from langchain_community.vectorstores import PGVector
+    return PGVector(
+        collection_name="company_docs",
+        connection_string=pgvector_connection_string(),
+        embedding_function=get_embeddings(),
+    )
+
+
+@_track("vector_engine")
+def get_vector_engine():
+    from sqlalchemy import create_engine
+    return create_engine(pgvector_connection_string())
+
+
+# Resources that must be loaded before the app reports ready
+WARM_RESOURCES = [get_embeddings, get_vectorstore]
+
+
+def warm_up():
+    """Build every heavy resource; errors are kept in resource_status for /ready."""
+    for factory in WARM_RESOURCES:
+        try:
+            factory()
+        except Exception as e:
+            print(f"Warm-up failed for {factory.__name__}: {e}")
+
+
+def warm_up_in_background() -> threading.Thread:
+    thread = threading.Thread(target=warm_up, name="resource-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    names = [factory.resource_name for factory in WARM_RESOURCES]
+    return all(resource_status.get(name, {}).get("status") == "ready" for name in names)
+
+
+def preload_for_fork():
+    """Load the models in a pre-fork parent so workers share them copy-on-write.
+
+    Only process-safe resources are loaded here; database-backed ones (the
+    vector store and engines) are created per worker after the fork. The heap
+    is frozen so the garbage collector does not touch, and thereby copy, the
+    shared model pages in every worker.
+    """
+    import gc
+    get_embeddings()
+    gc.collect()
+    gc.freeze()
@@ -0,0 +1,84 @@
+import os
+import gzip
+from typing import Optional
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is used instead
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Lists of RFP items that a `fields` projection applies to
+PROJECTED_LISTS = ("sections", "questions", "requirements")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[set]:
+    """`fields=id,answer` -> {"id", "answer"}; None/empty means no projection."""
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(",") if field.strip()}
+
+
+def project_items(payload, fields: Optional[set]):
+    """Keep only `fields` on every section/question/requirement, at any depth.
+
+    Other keys (metadata, ids of the RFP, messages...) are left untouched.
+    """
+    if not fields:
+        return payload
+    if isinstance(payload, dict):
+        projected = {}
+        for key, value in payload.items():
+            if key in PROJECTED_LISTS and isinstance(value, list):
+                projected[key] = [
+                    {k: v for k, v in item.items() if k in fields} if isinstance(item, dict) else item
+                    for item in value
+                ]
+            else:
+                projected[key] = project_items(value, fields)
+        return projected
+    if isinstance(payload, list):
+        return [project_items(item, fields) for item in payload]
+    return payload
+
+
+def _accepted_encodings(request: Request) -> set:
+    header = request.headers.get("accept-encoding", "")
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def fast_json_response(request: Request, content, fields: Optional[str] = None, status_code: int = 200) -> Response:
+    """orjson-encoded response, optionally projected and compressed (br, then gzip).
+
+    Compression is only applied when the client accepts it and the body is
+    at least COMPRESS_MIN_BYTES.
+    """
+    body = dumps(project_items(content, parse_fields(fields)))
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= COMPRESS_MIN_BYTES:
+        accepted = _accepted_encodings(request)
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from models.schema import RFP
+from agents.extract_rfp_structure import EXTRACTOR_VERSION
+
+# Keys added per request on top of the stored extraction
+REQUEST_KEYS = ("company_id", "employee_id", "rfp_id")
+
+
+def file_sha256(fileobj) -> str:
+    """Hex SHA-256 of a binary file object, read in blocks; the position is restored afterwards."""
+    position = fileobj.tell()
+    digest = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(1 << 20), b""):
+        digest.update(block)
+    fileobj.seek(position)
+    return digest.hexdigest()
+
+
+def path_sha256(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return file_sha256(f)
+
+
+def structure_payload(rfp: RFP, employee_id=None) -> dict:
+    """The stored structure in the shape /generate-response takes."""
+    return {**rfp.structured_data, "company_id": rfp.company_id, "employee_id": employee_id, "rfp_id": rfp.id}
+
+
+def current_structure(rfp: RFP) -> Optional[dict]:
+    """The RFP's stored structure if it was produced by this extractor version."""
+    if rfp.structured_data and rfp.extractor_version == EXTRACTOR_VERSION:
+        return rfp.structured_data
+    return None
+
+
+def find_structure_by_hash(db: Session, company_id: int, file_hash: str) -> Optional[dict]:
+    """A current-version structure already extracted from the same file for this company."""
+    if not file_hash:
+        return None
+    other = (
+        db.query(RFP)
+        .filter(RFP.company_id == company_id)
+        .filter(RFP.file_hash == file_hash)
+        .filter(RFP.extractor_version == EXTRACTOR_VERSION)
+        .filter(RFP.structured_data.isnot(None))
+        .first()
+    )
+    return other.structured_data if other else None
+
+
+def store_structure(db: Session, rfp: RFP, file_hash: str, structured_data: dict):
+    rfp.structured_data = {key: value for key, value in structured_data.items() if key not in REQUEST_KEYS}
+    rfp.file_hash = file_hash
+    rfp.extractor_version = EXTRACTOR_VERSION
+    rfp.structured_at = datetime.utcnow()
+    db.commit()
+
+
+def load_structured_data(db: Session, json_data: dict) -> dict:
+    """structured_data from the request body, or the stored structure of its rfp_id.
+
+    Clients that uploaded the RFP can send {"rfp_id": ..., "employee_id": ...}
+    instead of echoing the whole structure back.
+    """
+    if json_data.get("structured_data"):
+        return json_data["structured_data"]
+    rfp_id = json_data.get("rfp_id")
+    if rfp_id is None:
+        raise HTTPException(status_code=400, detail="structured_data or rfp_id is required")
+    rfp = db.query(RFP).filter(RFP.id == rfp_id).first()
+    if not rfp:
+        raise HTTPException(status_code=404, detail="RFP not found")
+    if not rfp.structured_data:
+        raise HTTPException(status_code=409, detail="RFP has not been processed yet, call /api/upload-rfp/ first")
+    return structure_payload(rfp, json_data.get("employee_id"))
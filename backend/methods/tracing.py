@@ -0,0 +1,212 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+from opentelemetry import context as otel_context, propagate, trace
+
+# "none" disables export, "file" appends OTLP/JSON lines to TRACING_FILE, "otlp" posts to a collector
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+# Collector endpoint for the "otlp" exporter, e.g. http://localhost:4318/v1/traces
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "http://localhost:4318/v1/traces")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "rfp-backend")
+
+tracer = trace.get_tracer("rfp")
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+def tracing_enabled() -> bool:
+    return TRACING_EXPORTER != "none"
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes) -> list:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in (attributes or {}).items()]
+
+
+def span_to_otlp(span) -> dict:
+    """One finished SDK span in the OTLP/JSON encoding (hex ids, nanosecond strings)."""
+    context = span.get_span_context()
+    encoded = {
+        "traceId": format(context.trace_id, "032x"),
+        "spanId": format(context.span_id, "016x"),
+        "name": span.name,
+        # OTLP kinds start at 1 (INTERNAL); the SDK enum starts at 0
+        "kind": span.kind.value + 1,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": _otlp_attributes(span.attributes),
+        "events": [
+            {"timeUnixNano": str(event.timestamp), "name": event.name, "attributes": _otlp_attributes(event.attributes)}
+            for event in span.events
+        ],
+        "status": {"code": span.status.status_code.value, "message": span.status.description or ""},
+    }
+    if span.parent is not None:
+        encoded["parentSpanId"] = format(span.parent.span_id, "016x")
+    return encoded
+
+
+def encode_spans(spans) -> dict:
+    """ExportTraceServiceRequest in OTLP/JSON, grouped by resource and scope."""
+    grouped = {}
+    for span in spans:
+        scope = span.instrumentation_scope.name if span.instrumentation_scope else ""
+        grouped.setdefault(id(span.resource), (span.resource, {}))[1].setdefault(scope, []).append(span_to_otlp(span))
+    return {"resourceSpans": [
+        {
+            "resource": {"attributes": _otlp_attributes(resource.attributes)},
+            "scopeSpans": [{"scope": {"name": scope}, "spans": encoded} for scope, encoded in scopes.items()],
+        }
+        for resource, scopes in grouped.values()
+    ]}
+
+
+def _file_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class OTLPJsonFileExporter(SpanExporter):
+        """Appends one OTLP/JSON request per batch, the format read by the collector's otlpjsonfile receiver."""
+
+        def __init__(self):
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            line = json.dumps(encode_spans(spans), separators=(",", ":")) + "\n"
+            try:
+                with self._lock, open(path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    return OTLPJsonFileExporter()
+
+
+def setup_tracing(app=None):
+    """Install the tracer provider and library instrumentation once per process.
+
+    With app, incoming FastAPI requests join the caller's `traceparent` trace.
+    SQLAlchemy statements, boto3 (S3) and outgoing requests calls get their
+    own spans when the matching instrumentation package is installed.
+    """
+    global _configured
+    if not tracing_enabled():
+        return
+    with _setup_lock:
+        if not _configured:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            if TRACING_EXPORTER == "file":
+                exporter = _file_exporter(TRACING_FILE)
+            elif TRACING_EXPORTER == "otlp":
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                exporter = OTLPSpanExporter(endpoint=OTLP_ENDPOINT)
+            else:
+                raise ValueError(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}")
+            provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+            provider.add_span_processor(BatchSpanProcessor(exporter))
+            trace.set_tracer_provider(provider)
+            _instrument_libraries()
+            _configured = True
+    if app is not None:
+        try:
+            from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        except ImportError:
+            return
+        FastAPIInstrumentor.instrument_app(app)
+
+
+def _instrument_libraries():
+    try:
+        from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+        from methods.functions import engine
+        SQLAlchemyInstrumentor().instrument(engine=engine)
+    except ImportError:
+        pass
+    try:
+        from opentelemetry.instrumentation.botocore import BotocoreInstrumentor
+        BotocoreInstrumentor().instrument()
+    except ImportError:
+        pass
+    try:
+        from opentelemetry.instrumentation.requests import RequestsInstrumentor
+        RequestsInstrumentor().instrument()
+    except ImportError:
+        pass
+
+
+def flush():
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "force_flush"):
+        provider.force_flush()
+
+
+@contextmanager
+def span(name: str, parent_traceparent: str = None, **attributes):
+    """Child span of the current one (or of `parent_traceparent`); None attributes are dropped."""
+    parent = extract_context(parent_traceparent) if parent_traceparent else None
+    with tracer.start_as_current_span(name, context=parent) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+def set_attributes(**attributes):
+    """Tag the current span, e.g. with the rfp.id of a request once it is known."""
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def current_traceparent():
+    """W3C traceparent of the current span, or None outside a recorded trace."""
+    carrier = {}
+    propagate.inject(carrier)
+    return carrier.get("traceparent")
+
+
+def extract_context(traceparent: str):
+    return propagate.extract({"traceparent": traceparent})
+
+
+def traced_call(traceparent, fn, *args):
+    """Run fn(*args) in a pool child as a span of the submitting request's trace."""
+    setup_tracing()
+    token = otel_context.attach(extract_context(traceparent)) if traceparent else None
+    try:
+        with span(f"cpu_pool.{fn.__name__}"):
+            return fn(*args)
+    finally:
+        if token is not None:
+            otel_context.detach(token)
+        flush()
+
+
+async def trace_header_middleware(request, call_next):
+    """Echo the request's traceparent so the frontend can send it on the next pipeline call."""
+    response = await call_next(request)
+    traceparent = current_traceparent()
+    if traceparent:
+        response.headers["traceparent"] = traceparent
+    return response
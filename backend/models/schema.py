@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum as SQLEnum, LargeBinary
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum as SQLEnum, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -38,6 +38,7 @@ class Company(Base):
     subscription_status = Column(SQLEnum(SubscriptionStatus), default=SubscriptionStatus.ACTIVE)
     created_at = Column(DateTime, default=datetime.utcnow)
     userid = Column(Integer, ForeignKey("users.id"))
+    corpus_version = Column(Integer, default=0)  # bumped whenever a company document is added
     # # Relationships
     # admin = relationship("User", back_populates="company", foreign_keys="User.company_id")
     # employees = relationship("User", back_populates="company", foreign_keys="User.company_id")
@@ -65,6 +66,12 @@ class User(Base):
 
 class RFP(Base):
     __tablename__ = "rfps"
+    __table_args__ = (
+        # Containment queries on the extracted structure (structured_data @> '{"requirements": [...]}')
+        Index("ix_rfps_structured_data", "structured_data", postgresql_using="gin",
+              postgresql_ops={"structured_data": "jsonb_path_ops"}),
+        Index("ix_rfps_company_file_hash", "company_id", "file_hash"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, index=True)
@@ -80,6 +87,10 @@ class RFP(Base):
     docx_url = Column(String)
     pdf_url = Column(String)
     message = Column(MutableList.as_mutable(JSON), default=list)  # Store messages as a list of dictionaries
+    file_hash = Column(String)  # SHA-256 of the uploaded file
+    structured_data = Column(JSONB)  # extract_rfp_structure output, without request ids
+    extractor_version = Column(String)  # EXTRACTOR_VERSION that produced structured_data
+    structured_at = Column(DateTime)
 
 
 class Employee(Base):
@@ -97,6 +108,105 @@ class Employee(Base):
     # Relationships
     # company = relationship("Company", back_populates="employees")
 
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rfp_id = Column(Integer, ForeignKey("rfps.id"), index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"))
+    status = Column(String, default="queued", index=True)  # queued, running, completed, failed
+    structured_data = Column(JSONB)
+    options = Column(JSONB, default=dict)  # generation flags, see GENERATION_OPTIONS
+    total_items = Column(Integer, default=0)
+    completed_items = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    error = Column(Text)
+    worker_id = Column(String)
+    heartbeat_at = Column(DateTime)
+    traceparent = Column(String)  # trace of the request that queued the job
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GenerationJobItem(Base):
+    __tablename__ = "generation_job_items"
+    __table_args__ = (UniqueConstraint("job_id", "kind", "item_id", name="uq_generation_job_item"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("generation_jobs.id", ondelete="CASCADE"), index=True)
+    kind = Column(String)  # section, question, requirement
+    item_id = Column(String)
+    answer = Column(JSONB)  # the entry as it appears in the final output
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AnswerCache(Base):
+    __tablename__ = "answer_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
+    question_text = Column(Text)
+    embedding = Column(Vector(384))  # all-MiniLM-L6-v2
+    answer = Column(Text)
+    corpus_version = Column(Integer, default=0)
+    edited_by_employee = Column(Integer, ForeignKey("employees.id"), nullable=True)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class WorkingContext(Base):
+    """Short-lived per-user state shared by all server workers (see methods/context_store.py)."""
+    __tablename__ = "working_context"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(JSONB)
+    expires_at = Column(DateTime, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LLMUsage(Base):
+    """One LLM call (or answer-cache hit), see methods/llm_usage.py."""
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, index=True)
+    rfp_id = Column(Integer, index=True)
+    provider = Column(String)  # groq, gemini, cache
+    model = Column(String)
+    operation = Column(String)  # call site, e.g. extract_rfp_structure
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    latency_ms = Column(Integer, default=0)
+    cache_hit = Column(Boolean, default=False)
+    retries = Column(Integer, default=0)
+    error = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class LLMUsageDaily(Base):
+    """Daily rollup of llm_usage per company, RFP, provider, model and operation."""
+    __tablename__ = "llm_usage_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(DateTime, index=True)
+    company_id = Column(Integer, index=True)
+    rfp_id = Column(Integer, index=True)
+    provider = Column(String)
+    model = Column(String)
+    operation = Column(String)
+    calls = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    cache_hits = Column(Integer, default=0)
+    retries = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_latency_ms = Column(Integer, default=0)
+    max_latency_ms = Column(Integer, default=0)
+
+
 # Pydantic Models
 class UserCreate(BaseModel):
     username: str
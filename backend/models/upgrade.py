@@ -0,0 +1,41 @@
+from sqlalchemy import text
+from models.schema import AnswerCache, GenerationJob, GenerationJobItem
+
+# Key of the Postgres advisory lock held while upgrading, so workers starting together take turns
+SCHEMA_UPGRADE_LOCK = 0x52465055
+
+# Idempotent DDL for columns and indexes added to tables that already exist in deployed databases
+UPGRADE_STATEMENTS = [
+    # rfps: stored structure extraction (upload_rfp caches it by file hash)
+    "ALTER TABLE rfps ADD COLUMN IF NOT EXISTS file_hash varchar",
+    "ALTER TABLE rfps ADD COLUMN IF NOT EXISTS structured_data jsonb",
+    "ALTER TABLE rfps ADD COLUMN IF NOT EXISTS extractor_version varchar",
+    "ALTER TABLE rfps ADD COLUMN IF NOT EXISTS structured_at timestamp",
+    "CREATE INDEX IF NOT EXISTS ix_rfps_structured_data ON rfps USING gin (structured_data jsonb_path_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_rfps_company_file_hash ON rfps (company_id, file_hash)",
+    # companies: answer cache invalidation when documents change
+    "ALTER TABLE companies ADD COLUMN IF NOT EXISTS corpus_version integer DEFAULT 0",
+    # pgvector, for answer_cache.embedding (already present where company documents are indexed)
+    "CREATE EXTENSION IF NOT EXISTS vector",
+]
+# Tables added since, created from their models when missing
+NEW_TABLES = [AnswerCache.__table__, GenerationJob.__table__, GenerationJobItem.__table__]
+
+
+def upgrade_schema(engine=None):
+    """Bring an existing Postgres database up to models/schema.py.
+
+    Every statement is a no-op when already applied, so this runs on each
+    start. Other databases (SQLite in tests and load runs) are created from
+    the models instead and are left alone.
+    """
+    if engine is None:
+        from methods.functions import engine
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_UPGRADE_LOCK})
+        for statement in UPGRADE_STATEMENTS:
+            conn.execute(text(statement))
+        for table in NEW_TABLES:
+            table.create(bind=conn, checkfirst=True)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 
 RFP_STORE = []
@@ -28,3 +28,68 @@ class UserCreate(BaseModel):
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
+
+
+class BatchItemAnswer(BaseModel):
+    """One entry of the JSON array returned by a batched LLM call."""
+    id: Union[str, int]
+    answer: str
+    satisfied: Optional[bool] = None
+
+
+class ComplianceVerdict(BaseModel):
+    """Structured compliance decision for one requirement."""
+    id: Union[str, int]
+    satisfied: Optional[bool] = None
+    confidence: float
+    evidence: str
+    decided_by: str  # "embedding" or "llm"
+
+
+class RFPContactInfo(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+
+class RFPMetadata(BaseModel):
+    """The "metadata" object of an extracted RFP structure."""
+    model_config = ConfigDict(extra="allow")
+    title: Optional[str] = None
+    issuer: Optional[str] = None
+    issue_date: Optional[str] = None
+    due_date: Optional[str] = None
+    contact_info: RFPContactInfo = RFPContactInfo()
+    submission_requirements: List[str] = []
+
+
+class RFPSection(BaseModel):
+    """One entry of "sections"; extra keys (parent_title of a window extraction) are kept."""
+    model_config = ConfigDict(extra="allow")
+    id: Union[str, int]
+    title: str
+    parent_id: Optional[Union[str, int]] = None
+    content: str = ""
+    level: int = 1
+
+
+class RFPQuestion(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    id: Union[str, int]
+    text: str
+    section: Optional[Union[str, int]] = None
+    type: Optional[str] = None
+    response_format: Optional[str] = None
+    word_limit: Optional[int] = None
+    related_requirements: List[Union[str, int]] = []
+
+
+class RFPRequirement(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    id: Union[str, int]
+    text: str
+    section: Optional[Union[str, int]] = None
+    category: Optional[str] = None
+    mandatory: bool = True
+    related_questions: List[Union[str, int]] = []
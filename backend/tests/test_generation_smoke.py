@@ -0,0 +1,40 @@
+import os
+import asyncio
+import pytest
+
+# The gateway and the database engine read these at import time
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MEDIAN_SECONDS", "0")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+pytest.importorskip("langchain.agents")
+
+
+def test_iter_generated_items_answers_every_item():
+    """Generation end to end on the fake provider, with the retrieval agent swapped for a stand-in."""
+    from agents import generation
+    from agents.llm_gateway import GatewayChatModel
+    from benchmarks.fakes import FakeAgentExecutor, fake_rfp_structure
+
+    def build_agent(company_id, rfp_id=None):
+        llm = GatewayChatModel(operation="generate_response", route="fast", company_id=company_id, rfp_id=rfp_id)
+        return FakeAgentExecutor(llm), llm
+
+    original = generation.build_agent
+    generation.build_agent = build_agent
+    try:
+        structured_data = {**fake_rfp_structure(sections=2, requirements=3), "company_id": 1, "rfp_id": 1}
+        options = {"use_answer_cache": False, "dedup": False, "deadline_seconds": 60}
+
+        async def collect():
+            return [item async for item in generation.iter_generated_items(structured_data, options)]
+
+        items = asyncio.run(collect())
+    finally:
+        generation.build_agent = original
+
+    assert [kind for kind, _ in items] == ["section"] * 2 + ["question"] + ["requirement"] * 3
+    for kind, entry in items:
+        text = entry["answer"] if kind != "requirement" else entry["evidence"]
+        assert not entry.get("pending"), entry
+        assert not text.startswith("Error occurred"), entry